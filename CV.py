@@ -1,10 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
-from datetime import datetime, timedelta
-from PIL import Image
-import os
+import uuid
+from caching import cached, CACHES
+from assets import resize_image, read_css, STATIC_URL
+
+# La page CV n'utilise que Streamlit : pandas, NumPy, Plotly, PyArrow et les modules du tableau
+# de bord sont importés dans les fonctions du tableau de bord, au premier affichage de celui-ci
 
 # --- CONFIGURATION INITIALE & THÈME GLOBAL ---
 st.set_page_config(
@@ -13,201 +13,115 @@ st.set_page_config(
     layout="wide"
 )
 
+# --- RESSOURCES STATIQUES (préparées une fois par processus) ---
+@st.cache_resource
+def load_css():
+    # Feuille de style lue une seule fois (static/cv.css)
+    return read_css()
+
+@st.cache_resource
+def load_profile_image():
+    # Photo réduite à sa largeur d'affichage (200 px) et réencodée une fois par processus.
+    # Servie comme fichier statique : le navigateur la met en cache au lieu de la recevoir à chaque exécution.
+    try:
+        chemin = resize_image("profile.jpg", 200)
+    except FileNotFoundError:
+        return None
+    except OSError:
+        # Dossier static/ en lecture seule : image d'origine
+        return "profile.jpg"
+    if st.get_option("server.enableStaticServing"):
+        return f"{STATIC_URL}/{chemin.name}"
+    return str(chemin)
+
 # --- CSS GLOBAL STYLÉ (Dark Mode Overlays) ---
-st.markdown("""
-<style>
-    /* Import d'une police moderne */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap');
-    
-    html, body, [class*="css"] {
-        font-family: 'Inter', sans-serif;
-    }
-
-    /* Couleurs du thème */
-    :root {
-        --primary-color: #00FFFF; /* Cyan Électrique */
-        --background-color: #050711; /* Fond sombre global renforcé */
-        --secondary-background-color: rgba(31, 36, 48, 0.95); /* Cartes sombres légèrement translucides */
-        --text-color: #FAFAFA;
-        --accent-color: #FF8C00;
-        --danger-color: #FF6347;
-    }
-
-    /* Fond global de l'app */
-    .stApp {
-        background: radial-gradient(circle at top left, #1f2933 0, #050711 45%, #000000 100%);
-        color: var(--text-color);
-    }
-
-    /* Barre latérale */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #050711 0%, #111827 100%);
-        border-right: 1px solid rgba(255, 255, 255, 0.06);
-    }
-    section[data-testid="stSidebar"] * {
-        color: #e5e7eb !important;
-    }
-
-    /* Titres */
-    h1, h2, h3, h4 {
-        font-family: 'Inter', sans-serif;
-        letter-spacing: 0.03em;
-    }
-    h1 { font-weight: 700; }
-    h2, h3 { font-weight: 600; }
-
-    /* Styles pour le CV */
-    .cv-header-card {
-        background: linear-gradient(135deg, rgba(31, 36, 48, 0.96), rgba(15, 23, 42, 0.96));
-        padding: 30px;
-        border-radius: 18px;
-        border: 1px solid rgba(255, 255, 255, 0.06);
-        box-shadow: 0 20px 45px rgba(0, 0, 0, 0.65);
-        margin-bottom: 30px;
-    }
-
-    /* Cartes pour les projets */
-    .project-card {
-        background: var(--secondary-background-color);
-        border-left: 4px solid var(--primary-color);
-        border-radius: 12px;
-        padding: 20px 22px;
-        margin-bottom: 18px;
-        box-shadow: 0 10px 25px rgba(0, 0, 0, 0.45);
-        transition: transform 0.2s ease, box-shadow 0.2s ease, border-color 0.2s ease;
-    }
-    .project-card:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 16px 35px rgba(0, 0, 0, 0.6);
-        border-left-color: var(--accent-color);
-    }
-
-    /* Styles pour les KPIs du Dashboard */
-    .kpi-card {
-        background: linear-gradient(145deg, rgba(31, 36, 48, 0.97), rgba(15, 23, 42, 0.97));
-        border-radius: 14px;
-        padding: 20px 18px;
-        text-align: center;
-        box-shadow: 0 12px 30px rgba(0, 0, 0, 0.55);
-        border: 1px solid rgba(255, 255, 255, 0.05);
-        transition: transform 0.25s ease, box-shadow 0.25s ease, border-color 0.25s ease;
-    }
-    .kpi-card:hover {
-        transform: translateY(-3px) scale(1.01);
-        box-shadow: 0 18px 40px rgba(0, 0, 0, 0.7);
-        border-color: rgba(0, 255, 255, 0.4);
-    }
-    .kpi-value {
-        font-size: 2.4em;
-        font-weight: 700;
-        color: var(--accent-color);
-    }
-    .kpi-label {
-        font-size: 0.9em;
-        color: #9CA3AF;
-        margin-top: 5px;
-        text-transform: uppercase;
-        letter-spacing: 0.08em;
-    }
-
-    /* Style des barres de progression */
-    .stProgress > div > div > div > div {
-        background: linear-gradient(90deg, var(--primary-color), #00C896);
-    }
-
-    /* Bouton principal */
-    .stButton button {
-        border-radius: 999px;
-        padding: 0.6rem 1.4rem;
-        border: 1px solid rgba(255, 255, 255, 0.16);
-        background: radial-gradient(circle at top left, #22d3ee 0, #0ea5e9 40%, #0369a1 100%);
-        color: white;
-        font-weight: 600;
-        letter-spacing: 0.03em;
-        box-shadow: 0 12px 30px rgba(34, 211, 238, 0.4);
-        transition: transform 0.2s ease, box-shadow 0.2s ease, background 0.2s ease;
-    }
-    .stButton button:hover {
-        transform: translateY(-1px);
-        box-shadow: 0 18px 40px rgba(56, 189, 248, 0.55);
-        background: radial-gradient(circle at top left, #22c55e 0, #16a34a 40%, #15803d 100%);
-    }
-
-    /* Onglets */
-    button[data-baseweb="tab"] {
-        border-radius: 999px !important;
-        background-color: transparent !important;
-        color: #9CA3AF !important;
-        border: 1px solid transparent !important;
-    }
-    button[data-baseweb="tab"][aria-selected="true"] {
-        background: rgba(31, 41, 55, 0.9) !important;
-        color : #F9FAFB !important;
-        border-color: rgba(148, 163, 184, 0.6) !important;
-    }
-
-    /* Petits séparateurs plus discrets */
-    hr {
-        border-color: rgba(148, 163, 184, 0.4);
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # --- FONCTIONS DE CHARGEMENT ET DE PRÉPARATION DES DONNEES (Pour le Dashboard) ---
-@st.cache_data
-def load_simulation_data():
-    dates = pd.date_range(start="2023-01-01", end="2023-12-31", freq='D')
-    lignes = [str(i) for i in range(1, 15)]
-    data = []
-    
-    for ligne in lignes:
-        base_reg = 98.0 if ligne in ['1', '14'] else (92.0 if ligne == '13' else 95.0)
-        for date in dates:
-            variation = np.random.normal(0, 1.5)
-            is_weekend = date.weekday() >= 5
-            factor = 0.5 if is_weekend else 0.0
-            taux = min(100, max(0, base_reg + variation - factor))
-            
-            data.append({
-                'Date': date,
-                'Ligne': ligne,
-                'Taux_Regularite': round(taux, 2),
-                'Trafic': int(np.random.normal(500000, 50000))
-            })
-            
-    df = pd.DataFrame(data)
-    df['Mois'] = df['Date'].dt.month_name()
-    df['Jour_Semaine'] = df['Date'].dt.day_name()
-    
-    ordre_jours = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    df['Jour_Semaine'] = pd.Categorical(df['Jour_Semaine'], categories=ordre_jours, ordered=True)
-    
-    return df
+# Chargeurs mémoïsés dans les caches bornés du processus (caching.py) : DataFrames partagés, en lecture seule
+@cached('simulation', max_entries=4)
+def load_simulation_data(**params):
+    # Paramètres de datasets.simulation_frame (taille, période, graine, processus)
+    from datasets import simulation_frame
+    return simulation_frame(**params)
+
+@cached('fontaines', max_entries=2)
+def read_real_csv(file_path):
+    from datasets import fontaines_frame
+    try:
+        # Lecture en flux (pyarrow) des colonnes utiles, ou relecture de l'instantané disque
+        return fontaines_frame(file_path)
+    except FileNotFoundError:
+        return None
 
-@st.cache_data
 def load_real_csv_data():
     file_path = "fontaines-a-eau-dans-le-reseau-ratp.csv"
     try:
-        df = pd.read_csv(file_path, sep=';')
-        df['Ligne'] = df['Ligne'].astype(str)
-        df = df.rename(columns={'Latitude': 'latitude', 'Longitude': 'longitude'})
-        return df
-    except FileNotFoundError:
-        return None
+        # Une erreur n'est pas mise en cache : elle est signalée à chaque exécution
+        return read_real_csv(file_path)
     except Exception as e:
         st.error(f"Erreur lors de la lecture du CSV ({file_path}): {e}. Vérifiez le chemin et le format du fichier.")
         return None
 
-df_sim = load_simulation_data()
-df_real = load_real_csv_data()
+@st.cache_resource
+def get_history_store():
+    # Historique partagé entre sessions (trié, index (Ligne, Date), cube d'agrégats),
+    # enrichi à chaud par les fichiers journaliers du dossier de dépôt (préparé par warmup.py si lancé ainsi).
+    # Avec RATP_STOCKAGE=memmap : historique horaire par station lu hors mémoire (outofcore.py) ;
+    # avec RATP_MOTEUR=duckdb : historique Parquet interrogé sur disque par DuckDB, sans pandas (sqlbackend.py).
+    # Compté dans le budget global des caches (caching.py), comme l'index spatial et les cellules de carte
+    from datasets import memmap_history, simulation_parquet, STOCKAGE
+    from incremental import HistoryStore
+    from outofcore import MemmapStore
+    from sqlbackend import SqlStore, sql_engine_selected
+    from warmup import preloaded
+    if preloaded('history') is not None:
+        store = preloaded('history')
+    elif STOCKAGE == 'memmap':
+        store = MemmapStore(memmap_history())
+    elif sql_engine_selected():
+        store = SqlStore(simulation_parquet())
+    else:
+        store = HistoryStore(load_simulation_data())
+    return CACHES.track('historique', store)
+
+@st.cache_resource
+def get_figure_cache():
+    # Figures partagées entre sessions, évincées en LRU au-delà de 64 Mo
+    from figure_cache import FigureCache
+    from warmup import preloaded
+    return preloaded('figures') or FigureCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+
+@st.cache_resource
+def load_spatial_index():
+    # Index spatial en grille (250 m) des fontaines pour les recherches de proximité
+    from spatial import build_spatial_index
+    from warmup import preloaded
+    if preloaded('spatial_index') is not None:
+        return CACHES.track('index_spatial', preloaded('spatial_index'))
+    df = load_real_csv_data()
+    return CACHES.track('index_spatial', build_spatial_index(df)) if df is not None else None
+
+@st.cache_resource
+def load_map_bins():
+    # Cellules pré-agrégées (ligne x cellule) par zoom standard pour les cartes denses
+    from spatial import build_map_bins
+    from warmup import preloaded
+    if preloaded('map_bins') is not None:
+        return CACHES.track('cellules_carte', preloaded('map_bins'))
+    df = load_real_csv_data()
+    return CACHES.track('cellules_carte', build_map_bins(df)) if df is not None else None
+
+def load_dashboard_data():
+    # Chargé au premier affichage du tableau de bord (puis servi par les caches), jamais pour la page CV
+    history = get_history_store()
+    history.refresh()
+    return history, load_real_csv_data(), get_figure_cache(), load_spatial_index(), load_map_bins()
 
 # --- BLOCS DE RENDU DES PAGES ---
 def render_cv_page():
-    img = None
-    try:
-        image_path = "profile.jpg"
-        img = Image.open(image_path)
-    except FileNotFoundError:
+    img = load_profile_image()
+    if img is None:
         st.warning("L'image 'profile.jpg' est introuvable. Veuillez la placer dans le même répertoire que app.py.")
 
     # EN-TÊTE
@@ -215,7 +129,10 @@ def render_cv_page():
     col1, col2 = st.columns([1, 4], gap="medium")
     
     with col1:
-        if img:
+        if img and img.startswith(STATIC_URL):
+            # Fichier statique : simple balise <img> (st.image importerait NumPy et Pillow pour une URL)
+            st.markdown(f'<img src="{img}" width="200" alt="Asaad Saadi">', unsafe_allow_html=True)
+        elif img:
             # CORRECTION ICI: suppression de use_column_width=False
             st.image(img, width=200)
             
@@ -305,52 +222,105 @@ def render_cv_page():
     st.caption("Fait avec Streamlit pour un affichage dynamique et moderne.")
 
 
-def render_dashboard_page(df_sim, df_real):
+def finish_profiling(profiler):
+    # Ligne JSON de l'exécution dans les logs (et compteurs des caches, au plus une fois par minute) ;
+    # tableaux des étapes et des caches sous le tableau de bord si demandé
+    from profiling import render_perf_panel, render_cache_panel
+    enregistrement = profiler.finish()
+    CACHES.log_metrics()
+    if st.session_state.get('debug_perf'):
+        render_perf_panel(st, enregistrement)
+        render_cache_panel(st, CACHES.metrics())
+
+
+def render_dashboard_page(history, df_real, figures, spatial_index, map_bins):
     st.title("🚇 Tableau de Bord RATP : Qualité de Service (POC)")
     st.markdown("Analyse combinée de la **Régularité (Simulée)** et des **Services (Réels)**. Thème sombre pour un impact maximal.")
 
-    # FILTRES
-    liste_lignes = sorted(df_sim['Ligne'].unique())
-    st.sidebar.header("🔍 Filtres d'Analyse")
-    
-    choix_lignes = st.sidebar.multiselect(
-        "Choisir les lignes :",
-        options=liste_lignes,
-        default=['1', '14', '13']
-    )
+    st.sidebar.checkbox("🛠️ Panneau de performance", key='debug_perf', help="Durée et pic mémoire (tracemalloc) de chaque étape.")
+
+    render_dashboard_view(history, df_real, figures, spatial_index, map_bins)
+
+    st.divider()
+    st.caption("Projet Streamlit (POC Data Viz).")
+
+
+@st.fragment
+def render_dashboard_view(history, df_real, figures, spatial_index, map_bins):
+    # Fragment : un changement de filtre, d'onglet ou de zoom ne ré-exécute que ce bloc
+    # (ni le CSS global, ni la navigation, ni les en-têtes de la page)
+    from profiling import RerunProfiler
+
+    # Chronométrage par étape de chaque exécution (pic mémoire seulement si le panneau est ouvert),
+    # mesure mémoire libérée même si l'exécution est interrompue
+    session = st.session_state.setdefault('session_perf', uuid.uuid4().hex[:8])
+    with RerunProfiler('CV.py', session=session, memoire=st.session_state.get('debug_perf', False)) as profiler:
+        render_dashboard_content(profiler, history, df_real, figures, spatial_index, map_bins)
 
-    min_date = df_sim['Date'].min()
-    max_date = df_sim['Date'].max()
-    
-    date_range = st.sidebar.date_input(
-        "Période d'analyse (Ponctualité) :",
-        value=(min_date, max_date),
-        min_value=min_date,
-        max_value=max_date
-    )
+
+def render_dashboard_content(profiler, history, df_real, figures, spatial_index, map_bins):
+    from charts import dashboard_figure
+    from export import export_file, frame_chunks, FORMATS, LIGNES_PAR_MORCEAU
+    from outofcore import history_lines, history_period, history_kpis, history_chunks
+    from spatial import query_radius, nearest, map_layer, map_zoom, ZOOMS_CARTE, ZOOM_AUTO, ZOOM_POINTS_BRUTS
+
+    # Un seul état de l'historique par exécution, même si un dépôt est intégré entre-temps
+    snapshot = history.current()
+
+    # FILTRES (dans le corps du fragment : un fragment ne peut pas écrire dans la barre latérale)
+    with profiler.stage('filtres'), st.container(border=True):
+        liste_lignes = history_lines(snapshot)
+        st.markdown("#### 🔍 Filtres d'Analyse")
+        col_lignes, col_dates, col_options = st.columns([3, 2, 1])
+        
+        choix_lignes = col_lignes.multiselect(
+            "Choisir les lignes :",
+            options=liste_lignes,
+            default=['1', '14', '13']
+        )
+
+        min_date, max_date = history_period(snapshot)
+        
+        date_range = col_dates.date_input(
+            "Période d'analyse (Ponctualité) :",
+            value=(min_date, max_date),
+            min_value=min_date,
+            max_value=max_date
+        )
+
+        lttb = col_options.checkbox(
+            "Alléger les courbes (LTTB)",
+            value=True,
+            help="Réduit chaque courbe à ~2 points par pixel en gardant pics et creux sous l'objectif."
+        )
+        webgl = col_options.checkbox(
+            "Rendu WebGL (Scattergl)",
+            value=False,
+            help="Dessine la courbe temporelle avec WebGL : plus fluide sur les longues séries."
+        )
+        tendances = col_options.checkbox(
+            "Tendances et anomalies",
+            value=False,
+            help="Moyennes glissantes 7 / 30 jours et jours hors norme (z-score > 3 sur les 30 jours précédents)."
+        )
 
     if not choix_lignes:
         st.warning("Veuillez sélectionner au moins une ligne.")
+        finish_profiling(profiler)
         return
 
-    mask_sim = (
-        (df_sim['Date'].dt.date >= date_range[0]) & 
-        (df_sim['Date'].dt.date <= date_range[1]) & 
-        (df_sim['Ligne'].isin(choix_lignes))
-    )
-    df_sim_filtered = df_sim[mask_sim]
-
-    if df_real is not None:
-        df_real_filtered = df_real[df_real['Ligne'].isin(choix_lignes)]
-    else:
-        df_real_filtered = None
+    with profiler.stage('filtrage_csv'):
+        if df_real is not None:
+            df_real_filtered = df_real[df_real['Ligne'].isin(choix_lignes)]
+        else:
+            df_real_filtered = None
 
     # KPI
     col1, col2, col3 = st.columns(3)
     
-    avg_reg = df_sim_filtered['Taux_Regularite'].mean()
-    min_reg = df_sim_filtered['Taux_Regularite'].min()
-    nb_fontaines = len(df_real_filtered) if df_real_filtered is not None else 0
+    with profiler.stage('kpis'):
+        avg_reg, min_reg = history_kpis(snapshot, choix_lignes, date_range[0], date_range[1])
+        nb_fontaines = len(df_real_filtered) if df_real_filtered is not None else 0
 
     col1.markdown(f"""
     <div class="kpi-card">
@@ -373,91 +343,107 @@ def render_dashboard_page(df_sim, df_real):
     </div>
     """, unsafe_allow_html=True)
 
+    # Export de la sélection : le fichier n'est construit (par morceaux) qu'au clic sur un bouton
+    with st.expander("📥 Exporter la sélection"):
+        col_format, col_export_sim, col_export_csv = st.columns([2, 2, 2])
+        format_export = col_format.radio("Format", list(FORMATS), horizontal=True, key='format_export')
+        extension, mime = FORMATS[format_export]
+        debut, fin = date_range[0], date_range[1]
+        col_export_sim.download_button(
+            "Régularité (Sim.)",
+            data=lambda: export_file(history_chunks(snapshot, choix_lignes, debut, fin, LIGNES_PAR_MORCEAU), format_export),
+            file_name=f"regularite_{debut}_{fin}.{extension}",
+            mime=mime,
+            on_click="ignore"
+        )
+        col_export_csv.download_button(
+            "Fontaines (CSV réel)",
+            data=lambda: export_file(frame_chunks(df_real_filtered), format_export),
+            file_name=f"fontaines.{extension}",
+            mime=mime,
+            on_click="ignore",
+            disabled=df_real_filtered is None
+        )
+
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # Onglets
+    # Onglets : seul l'onglet ouvert est calculé et envoyé, les autres le sont à leur ouverture (nouvelle exécution)
     tab1, tab2, tab3, tab4 = st.tabs([
         "📈 Évolution Temporelle",
         "🏆 Comparaison Lignes",
         "📅 Analyse Hebdomadaire",
         "🗺️ Carte des Services (CSV)"
-    ])
-
-    with tab1:
-        st.subheader("Suivi de la performance jour après jour")
-        fig_line = px.line(
-            df_sim_filtered, 
-            x='Date', 
-            y='Taux_Regularite', 
-            color='Ligne',
-            title="Taux de régularité journalier par ligne (Thème Sombre)",
-            labels={'Taux_Regularite': 'Régularité (%)'},
-            template="plotly_dark",
-            color_discrete_sequence=px.colors.sequential.Plasma
-        )
-        fig_line.add_hline(
-            y=95, 
-            line_dash="dash", 
-            line_color="#22C55E", 
-            annotation_text="Objectif 95%", 
-            annotation_position="bottom right"
-        )
-        st.plotly_chart(fig_line, use_container_width=True)
-
-    with tab2:
-        st.subheader("Classement des lignes sur la période sélectionnée")
-        df_grouped = df_sim_filtered.groupby('Ligne')['Taux_Regularite'].mean().reset_index()
-        df_grouped = df_grouped.sort_values(by='Taux_Regularite', ascending=False)
-        
-        fig_bar = px.bar(
-            df_grouped,
-            x='Taux_Regularite',
-            y='Ligne',
-            orientation='h',
-            color='Taux_Regularite',
-            color_continuous_scale='Reds',
-            range_color=[90, 100],
-            text_auto='.1f',
-            labels={'Taux_Regularite': 'Régularité Moyenne (%)'},
-            template="plotly_dark"
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
-
-    with tab3:
-        st.subheader("Visualisation des plages horaires et jours critiques")
-        heatmap_data = df_sim_filtered.pivot_table(
-            index='Ligne', 
-            columns='Jour_Semaine', 
-            values='Taux_Regularite', 
-            aggfunc='mean'
-        )
-        fig_heat = px.imshow(
-            heatmap_data,
-            color_continuous_scale='Viridis',
-            aspect="auto",
-            text_auto='.1f',
-            title="Régularité moyenne par Ligne et Jour de la semaine (Plus le chiffre est élevé, mieux c'est)",
-            template="plotly_dark"
-        )
-        st.plotly_chart(fig_heat, use_container_width=True)
-
-    with tab4:
-        st.subheader("🗺️ Localisation des Fontaines à eau (Services Réels)")
-        if df_real is None:
-            file_path_display = r"fontaines-a-eau-dans-le-reseau-ratp.csv"
-            st.error(f"⚠️ Fichier CSV introuvable ou illisible. Vérifiez qu'il est bien à côté de app.py.")
-        elif df_real_filtered.empty:
-            st.info("Aucune fontaine n'est répertoriée pour les lignes sélectionnés.")
-        else:
-            st.markdown(f"Affichage des **{len(df_real_filtered)}** fontaines disponibles pour ces lignes.")
-            map_data = df_real_filtered.dropna(subset=['latitude', 'longitude'])
-            st.map(map_data, zoom=11, size=20, color='#00C080')
+    ], key='vue_dashboard', on_change="rerun")
+
+    if tab1.open:
+        with tab1:
+            st.subheader("Suivi de la performance jour après jour")
+            with profiler.stage('figure_line'):
+                fig_line = dashboard_figure(
+                    figures, 'line', 'cv', snapshot, choix_lignes, date_range[0], date_range[1], lttb=lttb, webgl=webgl,
+                    tendances=tendances
+                )
+            with profiler.stage('envoi_line'):
+                st.plotly_chart(fig_line, use_container_width=True)
+
+    if tab2.open:
+        with tab2:
+            st.subheader("Classement des lignes sur la période sélectionnée")
+            with profiler.stage('figure_bar'):
+                fig_bar = dashboard_figure(figures, 'bar', 'cv', snapshot, choix_lignes, date_range[0], date_range[1])
+            with profiler.stage('envoi_bar'):
+                st.plotly_chart(fig_bar, use_container_width=True)
+
+    if tab3.open:
+        with tab3:
+            st.subheader("Visualisation des plages horaires et jours critiques")
+            with profiler.stage('figure_heat'):
+                fig_heat = dashboard_figure(figures, 'heat', 'cv', snapshot, choix_lignes, date_range[0], date_range[1])
+            with profiler.stage('envoi_heat'):
+                st.plotly_chart(fig_heat, use_container_width=True)
+
+    if tab4.open:
+        with tab4:
+            st.subheader("🗺️ Localisation des Fontaines à eau (Services Réels)")
+            if df_real is None:
+                file_path_display = r"fontaines-a-eau-dans-le-reseau-ratp.csv"
+                st.error(f"⚠️ Fichier CSV introuvable ou illisible. Vérifiez qu'il est bien à côté de app.py.")
+            elif df_real_filtered.empty:
+                st.info("Aucune fontaine n'est répertoriée pour les lignes sélectionnés.")
+            else:
+                st.markdown(f"Affichage des **{len(df_real_filtered)}** fontaines disponibles pour ces lignes.")
+                map_data = df_real_filtered.dropna(subset=['latitude', 'longitude'])
+                # Zoom ajusté aux fontaines par défaut ; le même zoom règle la vue et le regroupement
+                choix_zoom = st.select_slider(
+                    "Niveau de zoom :", ZOOMS_CARTE, value=ZOOM_AUTO,
+                    help=f"En dessous du zoom {ZOOM_POINTS_BRUTS}, les fontaines proches sont regroupées par cellule."
+                )
+                zoom = map_zoom(choix_zoom, map_data)
+                with profiler.stage('carte'):
+                    st.map(map_layer(map_bins, map_data, choix_lignes, zoom), zoom=zoom, size='taille', color='#00C080')
             
-            with st.expander("Voir le détail des stations (Tableau)"):
-                st.dataframe(df_real_filtered[['Ligne', 'Station ou Gare', 'Adresse', 'Commune', 'En zone contrôlée ou non']])
+                with st.expander("Voir le détail des stations (Tableau)"), profiler.stage('tableau'):
+                    st.dataframe(df_real_filtered[['Ligne', 'Station ou Gare', 'Adresse', 'Commune', 'En zone contrôlée ou non']])
 
-    st.divider()
-    st.caption("Projet Streamlit (POC Data Viz).")
+                with st.expander("🔎 Fontaines autour d'une station"), profiler.stage('proximite'):
+                    station = st.selectbox("Station :", sorted(map_data['Station ou Gare'].dropna().unique()))
+                    rayon = st.slider("Rayon (mètres) :", 100, 3000, 500, step=100)
+
+                    centre = map_data[map_data['Station ou Gare'] == station]
+                    lat, lon = centre['latitude'].mean(), centre['longitude'].mean()
+                    positions, distances = query_radius(spatial_index, lat, lon, rayon)
+                    proches = df_real.iloc[positions].assign(Distance_m=distances.round(0))
+
+                    st.map(proches, zoom=14, size=20, color='#00C080')
+                    st.dataframe(proches[['Ligne', 'Station ou Gare', 'Adresse', 'Distance_m']])
+
+                    meme_station = (df_real.iloc[positions]['Station ou Gare'] == station).to_numpy()
+                    autres, dist_autres = nearest(spatial_index, lat, lon, k=1, exclure=positions[meme_station])
+                    if len(autres):
+                        voisine = df_real.iloc[autres[0]]
+                        st.caption(f"Fontaine la plus proche hors de {station} : {voisine['Station ou Gare']} (ligne {voisine['Ligne']}), à {dist_autres[0]:.0f} m.")
+
+    finish_profiling(profiler)
 
 
 # --- FONCTION PRINCIPALE DE L'APPLICATION ---
@@ -476,7 +462,7 @@ def main():
     if st.session_state.page == "Mon CV":
         render_cv_page()
     elif st.session_state.page == "Dashboard RATP":
-        render_dashboard_page(df_sim, df_real)
+        render_dashboard_page(*load_dashboard_data())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,18 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
 from datetime import datetime, timedelta
+import uuid
+from simulation import SEED_DEFAUT
+from datasets import simulation_frame, simulation_parquet, fontaines_frame, memmap_history, STOCKAGE, SIM_WORKERS
+from outofcore import MemmapStore, history_lines, history_period, history_kpis, history_chunks
+from export import export_file, frame_chunks, FORMATS, LIGNES_PAR_MORCEAU
+from figure_cache import FigureCache
+from caching import cached, CACHES
+from charts import dashboard_figure
+from warmup import preloaded
+from spatial import build_spatial_index, query_radius, nearest, build_map_bins, map_layer, map_zoom, ZOOMS_CARTE, ZOOM_AUTO, ZOOM_POINTS_BRUTS
+from incremental import HistoryStore
+from sqlbackend import SqlStore, sql_engine_selected
+from profiling import RerunProfiler, render_perf_panel, render_cache_panel
 
 # Configuration de la page
 st.set_page_config(
@@ -13,206 +23,338 @@ st.set_page_config(
 
 # --- 1. CHARGEMENT DES DONNÉES ---
 
-@st.cache_data
-def load_simulation_data():
+@cached('simulation', max_entries=4)
+def load_simulation_data(nb_lignes=14, start="2023-01-01", end="2023-12-31", freq='D', seed=SEED_DEFAUT,
+                         workers=SIM_WORKERS):
     """
     Génère des données simulées pour la régularité (car le CSV ne contient pas d'historique).
+    Le calcul vectorisé est fait par simulation.generate_regularity, le résultat
+    est relu depuis l'instantané disque (voir datasets.simulation_frame), puis gardé
+    dans le cache borné 'simulation' (caching.py) : DataFrame partagé, en lecture seule.
+    Avec `workers` >= 1 (RATP_SIM_WORKERS), la génération est répartie sur un pool de processus.
     """
-    # Génération des dates pour l'année 2023
-    dates = pd.date_range(start="2023-01-01", end="2023-12-31", freq='D')
-    lignes = [str(i) for i in range(1, 15)]  # Lignes 1 à 14
-    
-    data = []
-    for ligne in lignes:
-        # Simulation de la fiabilité : Lignes automatiques (1, 14) meilleures
-        base_reg = 98.0 if ligne in ['1', '14'] else (92.0 if ligne == '13' else 95.0)
-        
-        for date in dates:
-            variation = np.random.normal(0, 1.5)
-            # Week-end souvent plus calme ou travaux
-            is_weekend = date.weekday() >= 5
-            factor = 0.5 if is_weekend else 0.0
-            
-            taux = min(100, max(0, base_reg + variation - factor))
-            
-            data.append({
-                'Date': date,
-                'Ligne': ligne, 
-                'Taux_Regularite': round(taux, 2),
-                'Trafic': int(np.random.normal(500000, 50000))
-            })
-            
-    df = pd.DataFrame(data)
-    
-    # Ajout colonnes temporelles
-    df['Mois'] = df['Date'].dt.month_name()
-    df['Jour_Semaine'] = df['Date'].dt.day_name()
-    
-    # Ordre des jours pour affichage propre
-    ordre_jours = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    df['Jour_Semaine'] = pd.Categorical(df['Jour_Semaine'], categories=ordre_jours, ordered=True)
-    
-    return df
+    return simulation_frame(nb_lignes=nb_lignes, start=start, end=end, freq=freq, seed=seed, workers=workers)
 
-@st.cache_data
-def load_real_csv_data(): # <--- CORRECTION APPORTÉE ICI
+@cached('fontaines', max_entries=2)
+def read_real_csv(file_path):
     """
-    Charge le fichier CSV 'fontaines-a-eau-dans-le-reseau-ratp.csv'
+    Fontaines du fichier `file_path` (None s'il est absent), gardées dans le cache borné 'fontaines'.
     """
     try:
-        # Lecture du fichier avec le séparateur point-virgule
-        # Le nom du fichier est une chaîne de caractères entre guillemets.
-        df = pd.read_csv(r"C:\Users\rayan.rami\Desktop\data viz web\fontaines-a-eau-dans-le-reseau-ratp.csv", sep=';')
-        
-        # Conversion de la colonne Ligne en texte pour matcher avec la simulation
-        df['Ligne'] = df['Ligne'].astype(str)
-        
-        # Renommage des colonnes pour que st.map fonctionne (latitude, longitude en minuscules)
-        df = df.rename(columns={'Latitude': 'latitude', 'Longitude': 'longitude'})
-        
-        return df
+        # Lecture en flux avec le moteur pyarrow (séparateur point-virgule) :
+        # en-têtes normalisés, seules les colonnes utiles sont lues, Ligne lue comme texte,
+        # latitude / longitude renommées en minuscules pour que st.map fonctionne
+        # et types compacts (voir schema.py)
+        return fontaines_frame(file_path)
     except FileNotFoundError:
         return None
+
+def load_real_csv_data(): # <--- CORRECTION APPORTÉE ICI
+    """
+    Charge le fichier CSV 'fontaines-a-eau-dans-le-reseau-ratp.csv'
+    (relu depuis l'instantané disque tant que le fichier n'a pas changé).
+    Une erreur de lecture n'est pas mise en cache : elle est affichée à chaque exécution.
+    """
+    file_path = "fontaines-a-eau-dans-le-reseau-ratp.csv"
+
+    try:
+        return read_real_csv(file_path)
     except Exception as e:
         st.error(f"Erreur lors de la lecture du CSV : {e}")
         return None
 
-# Chargement des données au lancement
-df_sim = load_simulation_data()
-df_real = load_real_csv_data()
+@st.cache_resource
+def get_history_store():
+    """
+    Historique partagé entre les sessions : trié par (Ligne, Date) avec son index
+    (filtrage par recherche dichotomique) et son cube d'agrégats partiels (KPIs,
+    classement, heatmap). Les fichiers journaliers déposés dans drops/regularite
+    y sont ajoutés à chaud, sans reconstruire l'historique.
+    Avec RATP_STOCKAGE=memmap, historique horaire par station hors mémoire (outofcore.py) :
+    les filtres et agrégations ne lisent que les tranches nécessaires.
+    Avec RATP_MOTEUR=duckdb (si le paquet est installé), ils sont exécutés par DuckDB directement
+    sur l'historique Parquet : ni DataFrame, ni cube d'agrégats en mémoire.
+    Repris tel quel s'il a été préparé par warmup.py avant le démarrage du serveur.
+    Sa taille compte dans le budget global des caches (voir caching.py).
+    """
+    if preloaded('history') is not None:
+        store = preloaded('history')
+    elif STOCKAGE == 'memmap':
+        store = MemmapStore(memmap_history())
+    elif sql_engine_selected():
+        store = SqlStore(simulation_parquet())
+    else:
+        store = HistoryStore(load_simulation_data())
+    return CACHES.track('historique', store)
+
+@st.cache_resource
+def get_figure_cache():
+    """
+    Cache LRU des figures Plotly, partagé entre sessions et limité à 64 Mo.
+    La clé est la signature canonique (lignes triées, période, type de graphique).
+    """
+    return preloaded('figures') or FigureCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+
+@st.cache_resource
+def load_spatial_index():
+    """
+    Index spatial en grille (cellules de 250 m) sur les coordonnées des fontaines,
+    construit une fois : recherches par zone et par proximité en moins d'une milliseconde.
+    """
+    if preloaded('spatial_index') is not None:
+        return CACHES.track('index_spatial', preloaded('spatial_index'))
+    df = load_real_csv_data()
+    return CACHES.track('index_spatial', build_spatial_index(df)) if df is not None else None
+
+@st.cache_resource
+def load_map_bins():
+    """
+    Cellules pré-agrégées (ligne x cellule) pour chaque zoom standard de la carte.
+    """
+    if preloaded('map_bins') is not None:
+        return CACHES.track('cellules_carte', preloaded('map_bins'))
+    df = load_real_csv_data()
+    return CACHES.track('cellules_carte', build_map_bins(df)) if df is not None else None
+
+def finish_profiling(profiler, container, caches=True):
+    """
+    Clôt le chronométrage de l'exécution : ligne JSON dans les logs (logger ratp.perf),
+    et compteurs des caches (au plus une fois par minute), puis tableaux des étapes
+    et (si `caches`) des caches dans `container` si le panneau de performance est activé.
+    """
+    enregistrement = profiler.finish()
+    CACHES.log_metrics()
+    if st.session_state.get('debug_perf'):
+        render_perf_panel(container, enregistrement)
+        if caches:
+            render_cache_panel(container, CACHES.metrics())
+
+# Chronométrage par étape de chaque exécution (pic mémoire seulement si le panneau est ouvert),
+# mesure mémoire libérée même si l'exécution est interrompue
+session = st.session_state.setdefault('session_perf', uuid.uuid4().hex[:8])
+with RerunProfiler('D.py', session=session, memoire=st.session_state.get('debug_perf', False)) as profiler:
+    # Chargement des données au lancement
+    with profiler.stage('chargement'):
+        history = get_history_store()
+        history.refresh()
+        df_real = load_real_csv_data()
+
+    with profiler.stage('chargement_index'):
+        figures = get_figure_cache()
+        spatial_index = load_spatial_index()
+        map_bins = load_map_bins()
 
-# --- 2. BARRE LATÉRALE (SIDEBAR) ---
+    # --- 2. EN-TÊTE ---
 
-st.title("🚇 RATP : Qualité & Services")
-st.markdown("""
+    st.title("🚇 RATP : Qualité & Services")
+    st.markdown("""
 Analyse hybride combinant :
 * 📊 **Données Simulées** pour l'historique de régularité.
 * 🗺️ **Fichier CSV Réel** pour la localisation des fontaines à eau.
 """)
 
-st.sidebar.header("🔍 Filtres")
+    # Le chargement est chronométré avec le script complet ; la case du panneau reste dans la barre latérale
+    finish_profiling(profiler, st.sidebar, caches=False)
+st.sidebar.checkbox("🛠️ Panneau de performance", key='debug_perf', help="Durée et pic mémoire (tracemalloc) de chaque étape.")
 
-# Définition de la liste des lignes disponibles
-if df_real is not None:
-    liste_lignes = sorted(df_real['Ligne'].unique())
-else:
-    liste_lignes = sorted(df_sim['Ligne'].unique())
 
-# Sélecteur de lignes
-choix_lignes = st.sidebar.multiselect(
-    "Choisir les lignes :",
-    options=liste_lignes,
-    default=['1', '4', '13']
-)
+@st.fragment
+def tableau_de_bord():
+    """
+    Filtres, KPIs et onglets : un changement de filtre, d'onglet ou de zoom ne ré-exécute
+    que ce fragment (ni les chargements, ni l'en-tête de la page).
+    Les filtres sont dans le corps du fragment : un fragment ne peut pas écrire dans la barre latérale.
+    """
+    # Chronométrage des exécutions du fragment (script complet chronométré à part)
+    session = st.session_state.setdefault('session_perf', uuid.uuid4().hex[:8])
+    with RerunProfiler('D.py/tableau', session=session, memoire=st.session_state.get('debug_perf', False)) as profiler:
+        contenu_tableau_de_bord(profiler)
 
-# Sélecteur de dates (impacte seulement la simulation)
-min_date = df_sim['Date'].min()
-max_date = df_sim['Date'].max()
-date_range = st.sidebar.date_input(
-    "Période d'analyse :",
-    value=(min_date, max_date),
-    min_value=min_date,
-    max_value=max_date
-)
 
-# Arrêt si aucune ligne sélectionnée
-if not choix_lignes:
-    st.warning("Veuillez sélectionner au moins une ligne dans la barre latérale.")
-    st.stop()
+def contenu_tableau_de_bord(profiler):
+    """
+    Corps du fragment tableau_de_bord, chronométré par `profiler`.
+    """
+    # Un seul état de l'historique par exécution du fragment (publication atomique des dépôts)
+    snapshot = history.current()
 
-# --- FILTRAGE ---
+    filtres = st.container(border=True)
+    filtres.markdown("#### 🔍 Filtres")
+    col_lignes, col_dates, col_options = filtres.columns([3, 2, 1])
 
-# Filtrage simulation
-mask_sim = (df_sim['Date'].dt.date >= date_range[0]) & \
-           (df_sim['Date'].dt.date <= date_range[1]) & \
-           (df_sim['Ligne'].isin(choix_lignes))
-df_sim_filtered = df_sim[mask_sim]
+    # Définition de la liste des lignes disponibles
+    if df_real is not None:
+        liste_lignes = sorted(df_real['Ligne'].unique())
+    else:
+        liste_lignes = history_lines(snapshot)
 
-# Filtrage CSV réel
-if df_real is not None:
-    df_real_filtered = df_real[df_real['Ligne'].isin(choix_lignes)]
-else:
-    df_real_filtered = None
+    # Sélecteur de lignes
+    choix_lignes = col_lignes.multiselect(
+        "Choisir les lignes :",
+        options=liste_lignes,
+        default=['1', '4', '13']
+    )
 
-# --- 3. TABLEAU DE BORD ---
+    # Sélecteur de dates (impacte seulement la simulation)
+    min_date, max_date = history_period(snapshot)
+    date_range = col_dates.date_input(
+        "Période d'analyse :",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
 
-# KPIs
-col1, col2, col3 = st.columns(3)
-avg_reg = df_sim_filtered['Taux_Regularite'].mean()
-nb_fontaines = len(df_real_filtered) if df_real_filtered is not None else 0
+    # Sous-échantillonnage des courbes côté serveur (pics et creux sous 95 % conservés)
+    lttb = col_options.checkbox("Alléger les courbes (LTTB)", value=True)
+    # Traces Scattergl (WebGL) pour la courbe temporelle
+    webgl = col_options.checkbox("Rendu WebGL", value=False)
+    # Moyennes glissantes 7 / 30 jours et jours anormaux, précalculés au chargement (trends.py)
+    tendances = col_options.checkbox("Tendances et anomalies", value=False)
 
-col1.metric("Régularité Moyenne", f"{avg_reg:.1f}%")
-col2.metric("Fontaines détectées", f"{nb_fontaines} 🚰")
-col3.metric("Lignes affichées", len(choix_lignes))
+    # Arrêt si aucune ligne sélectionnée
+    if not choix_lignes:
+        st.warning("Veuillez sélectionner au moins une ligne.")
+        finish_profiling(profiler, st)
+        return
 
-st.divider()
+    # --- FILTRAGE ---
 
-# Onglets
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📈 Évolution (Sim)", 
-    "🏆 Classement (Sim)", 
-    "📅 Heatmap (Sim)", 
-    "🗺️ Carte Services (CSV)"
-])
-
-# Onglet 1 : Évolution
-with tab1:
-    st.subheader("Évolution de la régularité")
-    fig_line = px.line(
-        df_sim_filtered, x='Date', y='Taux_Regularite', color='Ligne',
-        title="Régularité journalière par ligne",
-        color_discrete_sequence=px.colors.qualitative.Bold
-    )
-    fig_line.add_hline(y=95, line_dash="dot", line_color="green", annotation_text="Objectif 95%")
-    st.plotly_chart(fig_line, use_container_width=True)
-
-# Onglet 2 : Classement
-with tab2:
-    st.subheader("Classement par fiabilité")
-    df_grouped = df_sim_filtered.groupby('Ligne')['Taux_Regularite'].mean().reset_index()
-    df_grouped = df_grouped.sort_values(by='Taux_Regularite', ascending=False)
-    
-    fig_bar = px.bar(
-        df_grouped, x='Taux_Regularite', y='Ligne', orientation='h',
-        color='Taux_Regularite', color_continuous_scale='RdYlGn',
-        range_color=[90, 100], text_auto='.1f'
-    )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    # Filtrage simulation : fait par tranches (index Ligne, Date) dans charts.dashboard_figure,
+    # uniquement quand la courbe n'est pas déjà dans le cache de figures
 
-# Onglet 3 : Heatmap
-with tab3:
-    st.subheader("Performance par jour de la semaine")
-    heatmap_data = df_sim_filtered.pivot_table(
-        index='Ligne', columns='Jour_Semaine', values='Taux_Regularite', aggfunc='mean'
-    )
-    fig_heat = px.imshow(
-        heatmap_data, color_continuous_scale='RdYlGn', aspect="auto", text_auto='.1f',
-        title="Régularité moyenne par Ligne et Jour de la semaine"
-    )
-    st.plotly_chart(fig_heat, use_container_width=True)
+    # Filtrage CSV réel
+    with profiler.stage('filtrage_csv'):
+        if df_real is not None:
+            df_real_filtered = df_real[df_real['Ligne'].isin(choix_lignes)]
+        else:
+            df_real_filtered = None
+
+    # --- 3. TABLEAU DE BORD ---
+
+    # KPIs
+    col1, col2, col3 = st.columns(3)
+    with profiler.stage('kpis'):
+        avg_reg, _ = history_kpis(snapshot, choix_lignes, date_range[0], date_range[1])
+        nb_fontaines = len(df_real_filtered) if df_real_filtered is not None else 0
+
+    col1.metric("Régularité Moyenne", f"{avg_reg:.1f}%")
+    col2.metric("Fontaines détectées", f"{nb_fontaines} 🚰")
+    col3.metric("Lignes affichées", len(choix_lignes))
+
+    # Export de la sélection en CSV ou Parquet : écrit par morceaux, seulement au clic
+    with st.expander("📥 Exporter la sélection"):
+        format_export = st.radio("Format", list(FORMATS), horizontal=True, key='format_export_d')
+        extension, mime = FORMATS[format_export]
+        debut, fin = date_range[0], date_range[1]
+        col_export_sim, col_export_csv = st.columns(2)
+        col_export_sim.download_button(
+            "Régularité (Sim)",
+            data=lambda: export_file(history_chunks(snapshot, choix_lignes, debut, fin, LIGNES_PAR_MORCEAU), format_export),
+            file_name=f"regularite_{debut}_{fin}.{extension}",
+            mime=mime,
+            on_click="ignore"
+        )
+        col_export_csv.download_button(
+            "Fontaines (CSV)",
+            data=lambda: export_file(frame_chunks(df_real_filtered), format_export),
+            file_name=f"fontaines.{extension}",
+            mime=mime,
+            on_click="ignore",
+            disabled=df_real_filtered is None
+        )
+
+    st.divider()
+
+    # Onglets à exécution paresseuse : seul le contenu de l'onglet ouvert est calculé et envoyé
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📈 Évolution (Sim)", 
+        "🏆 Classement (Sim)", 
+        "📅 Heatmap (Sim)", 
+        "🗺️ Carte Services (CSV)"
+    ], key='vue_d', on_change="rerun")
+
+    # Onglet 1 : Évolution
+    if tab1.open:
+        with tab1:
+            st.subheader("Évolution de la régularité")
+            with profiler.stage('figure_line'):
+                fig_line = dashboard_figure(figures, 'line', 'd', snapshot, choix_lignes, date_range[0], date_range[1], lttb=lttb, webgl=webgl,
+                                           tendances=tendances)
+            with profiler.stage('envoi_line'):
+                st.plotly_chart(fig_line, use_container_width=True)
 
-# Onglet 4 : Carte (Données CSV réelles)
-with tab4:
-    st.subheader("📍 Localisation des Fontaines à eau")
+    # Onglet 2 : Classement
+    if tab2.open:
+        with tab2:
+            st.subheader("Classement par fiabilité")
+            with profiler.stage('figure_bar'):
+                fig_bar = dashboard_figure(figures, 'bar', 'd', snapshot, choix_lignes, date_range[0], date_range[1])
+            with profiler.stage('envoi_bar'):
+                st.plotly_chart(fig_bar, use_container_width=True)
+
+    # Onglet 3 : Heatmap
+    if tab3.open:
+        with tab3:
+            st.subheader("Performance par jour de la semaine")
+            with profiler.stage('figure_heat'):
+                fig_heat = dashboard_figure(figures, 'heat', 'd', snapshot, choix_lignes, date_range[0], date_range[1])
+            with profiler.stage('envoi_heat'):
+                st.plotly_chart(fig_heat, use_container_width=True)
+
+    # Onglet 4 : Carte (Données CSV réelles)
+    if tab4.open:
+        with tab4:
+            st.subheader("📍 Localisation des Fontaines à eau")
     
-    if df_real_filtered is not None and not df_real_filtered.empty:
-        st.markdown(f"Affichage des fontaines pour les lignes : **{', '.join(choix_lignes)}**")
+            if df_real_filtered is not None and not df_real_filtered.empty:
+                st.markdown(f"Affichage des fontaines pour les lignes : **{', '.join(choix_lignes)}**")
         
-        # Vérification des coordonnées
-        map_data = df_real_filtered.dropna(subset=['latitude', 'longitude'])
+                # Vérification des coordonnées
+                map_data = df_real_filtered.dropna(subset=['latitude', 'longitude'])
         
-        if not map_data.empty:
-            st.map(map_data, size=20, color='#0044ff')
+                if not map_data.empty:
+                    # En dessous du zoom ZOOM_POINTS_BRUTS, seules les cellules agrégées sont envoyées ;
+                    # le zoom choisi (par défaut ajusté aux points) est aussi celui de la vue
+                    choix_zoom = st.select_slider("Niveau de zoom :", ZOOMS_CARTE, value=ZOOM_AUTO,
+                                                  help=f"Points regroupés par cellule en dessous du zoom {ZOOM_POINTS_BRUTS}.")
+                    zoom = map_zoom(choix_zoom, map_data)
+                    with profiler.stage('carte'):
+                        st.map(map_layer(map_bins, map_data, choix_lignes, zoom), zoom=zoom, size='taille', color='#0044ff')
             
-            with st.expander("Voir le détail des adresses"):
-                st.dataframe(df_real_filtered[['Ligne', 'Station ou Gare', 'Adresse', 'Commune']])
-        else:
-            st.warning("Données géographiques manquantes pour ces lignes (vérifiez les colonnes 'Latitude' et 'Longitude' dans votre fichier CSV).")
+                    with st.expander("Voir le détail des adresses"), profiler.stage('tableau'):
+                        st.dataframe(df_real_filtered[['Ligne', 'Station ou Gare', 'Adresse', 'Commune']])
             
-    elif df_real is None:
-        st.error("⚠️ Fichier 'fontaines-a-eau-dans-le-reseau-ratp.csv' introuvable. Assurez-vous qu'il est dans le même dossier que D.py.")
-    else:
-        st.info("Aucune fontaine trouvée pour les lignes sélectionnées.")
+                    # Recherche de proximité sur toutes les fontaines (index spatial)
+                    with st.expander("🔎 Fontaines autour d'une station"), profiler.stage('proximite'):
+                        station = st.selectbox("Station :", sorted(map_data['Station ou Gare'].dropna().unique()))
+                        rayon = st.slider("Rayon (mètres) :", 100, 3000, 500, step=100)
+                
+                        centre = map_data[map_data['Station ou Gare'] == station]
+                        lat, lon = centre['latitude'].mean(), centre['longitude'].mean()
+                        positions, distances = query_radius(spatial_index, lat, lon, rayon)
+                        proches = df_real.iloc[positions].assign(Distance_m=distances.round(0))
+                
+                        st.map(proches, size=20, color='#0044ff')
+                        st.dataframe(proches[['Ligne', 'Station ou Gare', 'Adresse', 'Distance_m']])
+                
+                        # Fontaine la plus proche en dehors de la station choisie
+                        meme_station = (df_real.iloc[positions]['Station ou Gare'] == station).to_numpy()
+                        autres, dist_autres = nearest(spatial_index, lat, lon, k=1, exclure=positions[meme_station])
+                        if len(autres):
+                            voisine = df_real.iloc[autres[0]]
+                            st.caption(f"Fontaine la plus proche hors de {station} : {voisine['Station ou Gare']} (ligne {voisine['Ligne']}), à {dist_autres[0]:.0f} m.")
+                else:
+                    st.warning("Données géographiques manquantes pour ces lignes (vérifiez les colonnes 'Latitude' et 'Longitude' dans votre fichier CSV).")
+            
+            elif df_real is None:
+                st.error("⚠️ Fichier 'fontaines-a-eau-dans-le-reseau-ratp.csv' introuvable. Assurez-vous qu'il est dans le même dossier que D.py.")
+            else:
+                st.info("Aucune fontaine trouvée pour les lignes sélectionnées.")
+
+    finish_profiling(profiler, st)
+
+
+tableau_de_bord()
 
 # Footer
 st.divider()
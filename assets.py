@@ -0,0 +1,46 @@
+import shutil
+from pathlib import Path
+
+from fsutil import write_atomic
+
+# --- RESSOURCES STATIQUES DE LA PAGE CV (image de profil, CSS) ---
+
+# Dossier servi par Streamlit sous /app/static/ (server.enableStaticServing dans .streamlit/config.toml)
+STATIC_DIR = Path(__file__).parent / "static"
+STATIC_URL = "/app/static"
+CSS_PATH = STATIC_DIR / "cv.css"
+
+
+def resize_image(src, largeur, dest_dir=STATIC_DIR, qualite=85):
+    """
+    Copie de l'image `src` réduite à `largeur` pixels (proportions conservées) et réencodée
+    en JPEG progressif, écrite dans `dest_dir` (un JPEG déjà assez petit est copié tel quel).
+    Le fichier n'est régénéré que si la source est plus récente.
+    Lève FileNotFoundError si `src` n'existe pas.
+    """
+    src = Path(src)
+    dest = Path(dest_dir) / f"{src.stem}-{largeur}.jpg"
+    if dest.exists() and dest.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+        return dest
+
+    # Import différé : Pillow n'est chargé que si l'image doit être (re)générée
+    from PIL import Image
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(src) as img:
+        if img.width <= largeur and img.format == 'JPEG':
+            # Réencoder un JPEG déjà à la bonne taille l'alourdirait sans gain
+            write_atomic(dest, lambda tmp: shutil.copyfile(src, tmp))
+        else:
+            img = img.convert('RGB')
+            if img.width > largeur:
+                img = img.resize((largeur, round(img.height * largeur / img.width)), Image.LANCZOS)
+            write_atomic(dest, lambda tmp: img.save(tmp, format='JPEG', quality=qualite, optimize=True, progressive=True))
+    return dest
+
+
+def read_css(path=CSS_PATH):
+    """
+    Feuille de style prête à injecter avec st.markdown(..., unsafe_allow_html=True).
+    """
+    return f"<style>\n{Path(path).read_text(encoding='utf-8')}</style>\n"
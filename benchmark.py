@@ -0,0 +1,216 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Instantanés disque dans un dossier jetable : le cache de l'application n'est ni lu ni écrasé.
+# Le dossier (et ses voisins, ex. memmap/) est supprimé à la sortie de l'interpréteur
+if "RATP_CACHE_DIR" not in os.environ:
+    _CACHE_JETABLE = tempfile.TemporaryDirectory(prefix="ratp-bench-")
+    os.environ["RATP_CACHE_DIR"] = str(Path(_CACHE_JETABLE.name) / "snapshots")
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from charts import line_figure, ranking_figure, heatmap_figure
+from datasets import simulation_frame, fontaines_frame, FONTAINES_CSV
+from history_index import build_line_index, slice_history
+from rollup import build_rollup, rollup_kpis, rollup_ranking, rollup_heatmap
+from trends import add_trends
+from snapshots import CACHE_DIR
+
+# --- BANC DE MESURE DU TABLEAU DE BORD (hors Streamlit) ---
+#
+# python benchmark.py                              échelles 1x, 10x et 100x, résultats dans benchmark.json
+# python benchmark.py --scales 1 10 --repeat 5     échelles et nombre de répétitions au choix
+# python benchmark.py --compare avant.json         signale (code 1) les étapes plus lentes que la référence
+
+# Échelle -> taille de l'historique simulé (lignes x jours = 14 x 365 x échelle) et du CSV (81 x échelle)
+ECHELLES = {
+    1: {'nb_lignes': 14, 'start': "2023-01-01", 'end': "2023-12-31"},
+    10: {'nb_lignes': 35, 'start': "2020-01-01", 'end': "2023-12-31"},
+    100: {'nb_lignes': 140, 'start': "2014-01-01", 'end': "2023-12-31"},
+}
+# Sélection type d'un visiteur : trois lignes sur toute la période
+LIGNES_SELECTION = ['1', '14', '13']
+SEUIL_REGRESSION = 1.25
+
+
+def timed(fonction, repeat):
+    """
+    Exécute `fonction` `repeat` fois ; renvoie (dernier résultat, durées en secondes).
+    """
+    durees = []
+    for _ in range(repeat):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return resultat, durees
+
+
+def scaled_csv(echelle, dossier):
+    """
+    Copie du CSV des fontaines dont les lignes de données sont répétées `echelle` fois.
+    """
+    with open(FONTAINES_CSV, encoding='utf-8-sig', newline='') as f:
+        entete, *lignes = list(csv.reader(f, delimiter=';'))
+    path = Path(dossier) / f"fontaines-x{echelle}.csv"
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(entete)
+        for _ in range(echelle):
+            writer.writerows(lignes)
+    return path
+
+
+def clear_snapshots():
+    for path in CACHE_DIR.glob("*.feather"):
+        path.unlink()
+
+
+def run_scale(echelle, repeat):
+    """
+    Mesure chaque étape du tableau de bord à une échelle donnée ; une entrée par étape.
+    """
+    params = ECHELLES[echelle]
+    resultats = []
+
+    def mesure(etape, fonction, n=1):
+        resultat, durees = timed(fonction, n)
+        resultats.append({
+            'echelle': echelle,
+            'etape': etape,
+            'lignes': len(resultat) if isinstance(resultat, pd.DataFrame) else None,
+            'repetitions': n,
+            'min_s': round(min(durees), 6),
+            'mediane_s': round(statistics.median(durees), 6),
+        })
+        return resultat
+
+    # Chargements : à froid (génération / lecture CSV puis écriture de l'instantané), puis relecture
+    def simulation_froide():
+        clear_snapshots()
+        return simulation_frame(**params)
+
+    def simulation_parallele_froide():
+        clear_snapshots()
+        return simulation_frame(**params, workers=os.cpu_count())
+
+    mesure('load_simulation_parallele_froid', simulation_parallele_froide)
+    mesure('load_simulation_froid', simulation_froide)
+    df_sim = mesure('load_simulation_instantane', lambda: simulation_frame(**params), repeat)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        csv_path = scaled_csv(echelle, dossier)
+
+        def fontaines_froid():
+            clear_snapshots()
+            return fontaines_frame(csv_path)
+
+        mesure('load_real_csv_froid', fontaines_froid)
+        mesure('load_real_csv_instantane', lambda: fontaines_frame(csv_path), repeat)
+
+    debut, fin = df_sim['Date'].min().date(), df_sim['Date'].max().date()
+
+    # Filtrage : masque booléen d'origine contre tranches (Ligne, Date)
+    def masque():
+        return df_sim[
+            (df_sim['Date'].dt.date >= debut) &
+            (df_sim['Date'].dt.date <= fin) &
+            (df_sim['Ligne'].isin(LIGNES_SELECTION))
+        ]
+
+    df_filtre = mesure('filtre_masque', masque, repeat)
+    index = mesure('index_lignes', lambda: build_line_index(df_sim))
+    mesure('filtre_tranches', lambda: slice_history(df_sim, index, LIGNES_SELECTION, debut, fin), repeat)
+    df_tendances = mesure('tendances_calcul', lambda: add_trends(df_sim, index))
+
+    # Agrégations : pandas sur la sélection contre requêtes sur le cube
+    cube = mesure('cube_construction', lambda: build_rollup(df_sim))
+    mesure('kpis_pandas', lambda: (df_filtre['Taux_Regularite'].mean(), df_filtre['Taux_Regularite'].min()), repeat)
+    mesure('kpis_cube', lambda: rollup_kpis(cube, LIGNES_SELECTION, debut, fin), repeat)
+
+    def classement_pandas():
+        df_grouped = df_filtre.groupby('Ligne', observed=True)['Taux_Regularite'].mean().reset_index()
+        return df_grouped.sort_values(by='Taux_Regularite', ascending=False)
+
+    df_grouped = mesure('classement_groupby', classement_pandas, repeat)
+    mesure('classement_cube', lambda: rollup_ranking(cube, LIGNES_SELECTION, debut, fin), repeat)
+
+    def heatmap_pandas():
+        return df_filtre.pivot_table(
+            index='Ligne', columns='Jour_Semaine', values='Taux_Regularite', aggfunc='mean', observed=True
+        )
+
+    heatmap_data = mesure('heatmap_pivot_table', heatmap_pandas, repeat)
+    mesure('heatmap_cube', lambda: rollup_heatmap(cube, LIGNES_SELECTION, debut, fin), repeat)
+
+    # Construction des figures Plotly (et sérialisation JSON envoyée au navigateur)
+    fig_line = mesure('figure_line_brute', lambda: line_figure(df_filtre, 'cv', lttb=False), repeat)
+    mesure('figure_line_lttb', lambda: line_figure(df_filtre, 'cv', lttb=True), repeat)
+    df_filtre_tendances = slice_history(df_tendances, index, LIGNES_SELECTION, debut, fin)
+    mesure('figure_line_tendances', lambda: line_figure(df_filtre_tendances, 'cv', lttb=True, tendances=True), repeat)
+    mesure('figure_bar', lambda: ranking_figure(df_grouped, 'cv'), repeat)
+    mesure('figure_heatmap', lambda: heatmap_figure(heatmap_data, 'cv'), repeat)
+    mesure('serialisation_line_brute', lambda: fig_line.to_json(), repeat)
+
+    return resultats
+
+
+def compare(resultats, reference, seuil=SEUIL_REGRESSION):
+    """
+    Étapes dont la durée minimale dépasse `seuil` fois celle de la même étape dans `reference`.
+    """
+    avant = {(r['echelle'], r['etape']): r['min_s'] for r in reference['resultats']}
+    regressions = []
+    for r in resultats:
+        ref = avant.get((r['echelle'], r['etape']))
+        if ref and r['min_s'] > seuil * ref:
+            regressions.append({**r, 'reference_s': ref, 'ratio': round(r['min_s'] / ref, 2)})
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Banc de mesure du tableau de bord RATP (hors Streamlit).")
+    parser.add_argument('--scales', type=int, nargs='+', default=sorted(ECHELLES), choices=sorted(ECHELLES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default="benchmark.json")
+    parser.add_argument('--compare', help="fichier JSON d'un run précédent servant de référence")
+    parser.add_argument('--threshold', type=float, default=SEUIL_REGRESSION)
+    args = parser.parse_args(argv)
+
+    resultats = []
+    for echelle in args.scales:
+        resultats.extend(run_scale(echelle, args.repeat))
+        for r in resultats:
+            if r['echelle'] == echelle:
+                print(f"x{echelle:<4} {r['etape']:<32} {r['min_s'] * 1000:10.2f} ms")
+
+    rapport = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'plateforme': platform.platform(), 'cpus': os.cpu_count()},
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__, 'plotly': plotly.__version__},
+        'echelles': {str(e): ECHELLES[e] for e in args.scales},
+        'resultats': resultats,
+    }
+    Path(args.output).write_text(json.dumps(rapport, indent=2))
+    print(f"Résultats écrits dans {args.output}")
+
+    if args.compare:
+        regressions = compare(resultats, json.loads(Path(args.compare).read_text()), args.threshold)
+        for r in regressions:
+            print(f"RÉGRESSION x{r['echelle']} {r['etape']} : {r['min_s']:.4f} s contre {r['reference_s']:.4f} s (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,355 @@
+import functools
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# --- CACHES BORNÉS ET INSTRUMENTÉS (CHARGEURS, FIGURES, RÉSULTATS PAR FILTRE) ---
+#
+# Chaque cache est borné en entrées, en octets et éventuellement en durée de vie (TTL) ;
+# tous ceux d'un registre partagent en plus un budget mémoire global : au-delà, l'entrée
+# la moins récemment utilisée, tous caches confondus, est évincée. Les compteurs
+# (succès, défauts, évictions, expirations) sont lus par le panneau de performance
+# et écrits périodiquement sur le logger ratp.perf.
+#
+# Les gros objets partagés hors de ces caches (historique et son cube, index spatial,
+# cellules de carte, état DuckDB, gardés par st.cache_resource) sont déclarés au registre
+# par `track()` : ils ne sont pas évincables, mais leur taille est retirée du budget laissé aux caches.
+
+# Budget mémoire global du processus pour tous les caches enregistrés
+BUDGET_OCTETS = int(os.environ.get("RATP_CACHE_BUDGET_MO", "256")) * 1024 * 1024
+INTERVALLE_METRIQUES_S = 60
+# Fraîcheur de la taille mesurée des ressources déclarées (historique, état DuckDB...)
+INTERVALLE_MESURE_S = 10
+# Part du budget toujours laissée aux caches, même si les ressources déclarées dépassent le reste
+PART_MIN_CACHES = 0.25
+
+logger = logging.getLogger("ratp.perf")
+
+
+def estimate_size(obj):
+    """
+    Taille approximative (octets) d'un objet : empreinte mémoire d'un DataFrame, d'une Series
+    ou d'un tableau NumPy, somme des éléments d'un dict, d'une liste ou d'un tuple, sinon taille sérialisée.
+    """
+    # pandas et NumPy ne sont pas importés ici : un objet à mesurer implique qu'ils sont déjà chargés
+    pd, np = sys.modules.get('pandas'), sys.modules.get('numpy')
+    if pd is not None and isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if pd is not None and isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if np is not None and isinstance(obj, np.ndarray) and obj.dtype != object:
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(estimate_size(cle) + estimate_size(valeur) for cle, valeur in obj.items())
+    if isinstance(obj, (list, tuple)) and obj:
+        return sum(estimate_size(element) for element in obj)
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class CacheRegistry:
+    """
+    Ensemble de caches partageant un budget mémoire global, et ressources partagées
+    (non évincables) comptées dans ce budget.
+
+    Chaque cache a son propre verrou ; celui du registre ne protège que la liste des caches
+    et des ressources. La taille des ressources est mesurée hors verrou et gardée
+    INTERVALLE_MESURE_S secondes : une insertion ne paie pas la mesure d'un historique.
+    """
+
+    def __init__(self, budget_octets=BUDGET_OCTETS):
+        self.budget_octets = budget_octets
+        self.lock = threading.Lock()
+        self._caches = {}
+        # nom -> [fonction de mesure (None si la ressource est libérée), octets, instant de la mesure]
+        self._ressources = {}
+        self._dernier_log = float('-inf')
+        self._budget_depasse = False
+
+    def register(self, cache):
+        # Un cache recréé sous le même nom (ex. après st.cache_resource.clear()) remplace l'ancien
+        with self.lock:
+            self._caches[cache.name] = cache
+
+    def get(self, name):
+        with self.lock:
+            return self._caches.get(name)
+
+    def track(self, name, ressource):
+        """
+        Compte `ressource` dans le budget global sous le nom `name` (remplace une ressource de même nom).
+
+        Si elle a une méthode `memory_bytes()` (historiques enrichis à chaud), sa taille est
+        remesurée au plus toutes les INTERVALLE_MESURE_S secondes ; sinon elle est estimée une
+        fois ici. La ressource n'est référencée que faiblement : libérée (ex. st.cache_resource.clear()),
+        elle ne compte plus. Renvoie `ressource`.
+        """
+        mesure = getattr(ressource, 'memory_bytes', None)
+        if mesure is not None:
+            reference = weakref.WeakMethod(mesure)
+            taille = lambda: reference()() if reference() is not None else None
+        else:
+            octets = estimate_size(ressource)
+            try:
+                reference = weakref.ref(ressource)
+                taille = lambda: octets if reference() is not None else None
+            except TypeError:
+                # dict, list... : pas de référence faible possible, comptés jusqu'au remplacement
+                taille = lambda: octets
+        octets = taille()
+        with self.lock:
+            self._ressources[name] = [taille, octets, time.monotonic()]
+        return ressource
+
+    def resource_sizes(self, age_max_s=INTERVALLE_MESURE_S):
+        """
+        Taille des ressources déclarées, remesurée (hors verrou) si plus ancienne que `age_max_s`.
+        """
+        maintenant = time.monotonic()
+        with self.lock:
+            a_mesurer = [(nom, r[0]) for nom, r in self._ressources.items() if maintenant - r[2] >= age_max_s]
+        for nom, taille in a_mesurer:
+            octets = taille()
+            with self.lock:
+                ressource = self._ressources.get(nom)
+                if ressource is None or ressource[0] is not taille:
+                    continue  # remplacée entre-temps
+                if octets is None:
+                    del self._ressources[nom]
+                else:
+                    ressource[1:] = [octets, maintenant]
+        with self.lock:
+            return {nom: r[1] for nom, r in self._ressources.items()}
+
+    def cache_budget(self):
+        """
+        Octets laissés aux caches : le budget moins les ressources, sans descendre sous
+        PART_MIN_CACHES du budget (au-delà, un avertissement est écrit une fois).
+        """
+        ressources = sum(self.resource_sizes().values())
+        plancher = self.budget_octets * PART_MIN_CACHES
+        depasse = self.budget_octets - ressources < plancher
+        if depasse and not self._budget_depasse:
+            logger.warning(json.dumps({
+                'evenement': 'budget_ressources',
+                'budget_octets': self.budget_octets,
+                'ressources_octets': ressources,
+                'plancher_caches_octets': int(plancher),
+            }, ensure_ascii=False))
+        self._budget_depasse = depasse
+        return max(self.budget_octets - ressources, plancher)
+
+    def total_bytes(self):
+        with self.lock:
+            caches = list(self._caches.values())
+        return sum(cache.bytes for cache in caches) + sum(self.resource_sizes().values())
+
+    def enforce_budget(self):
+        """
+        Évince les entrées les moins récemment utilisées, tous caches confondus, jusqu'à tenir
+        `cache_budget()`. Les ressources déclarées par `track()` ne sont jamais évincées.
+        Un seul verrou de cache est tenu à la fois.
+        """
+        limite = self.cache_budget()
+        while True:
+            with self.lock:
+                caches = list(self._caches.values())
+            if sum(cache.bytes for cache in caches) <= limite:
+                return
+            candidats = [(acces, cache) for cache in caches if (acces := cache._oldest_access()) is not None]
+            if not candidats:
+                return
+            min(candidats, key=lambda candidat: candidat[0])[1]._evict_oldest()
+
+    def stats(self):
+        with self.lock:
+            caches = list(self._caches.values())
+        return [cache.stats() for cache in caches]
+
+    def metrics(self):
+        """
+        Instantané des compteurs : une entrée par cache ou ressource déclarée et le total face au budget.
+        """
+        caches = self.stats()
+        ressources = [{'cache': nom, 'octets': octets, 'ressource': True}
+                      for nom, octets in self.resource_sizes(age_max_s=0).items()]
+        return {
+            'evenement': 'caches',
+            'horodatage': round(time.time(), 3),
+            'budget_octets': self.budget_octets,
+            'total_octets': sum(c['octets'] for c in caches + ressources),
+            'ressources_octets': sum(r['octets'] for r in ressources),
+            'caches': caches + ressources,
+        }
+
+    def log_metrics(self, intervalle_s=INTERVALLE_METRIQUES_S):
+        """
+        Écrit les compteurs en JSON sur le logger ratp.perf, au plus une fois par intervalle.
+        """
+        maintenant = time.monotonic()
+        with self.lock:
+            if maintenant - self._dernier_log < intervalle_s:
+                return None
+            self._dernier_log = maintenant
+        metriques = self.metrics()
+        logger.info(json.dumps(metriques, ensure_ascii=False))
+        return metriques
+
+
+# Registre par défaut du processus
+CACHES = CacheRegistry()
+
+
+class _Construction:
+    """
+    Construction en cours d'une clé : les autres demandeurs attendent `fin` puis reprennent `valeur`.
+    """
+
+    def __init__(self):
+        self.fin = threading.Event()
+        self.reussie = False
+        self.valeur = None
+
+
+class BoundedCache:
+    """
+    Cache LRU borné en nombre d'entrées, en octets et, si `ttl` (secondes), en durée de vie.
+
+    La construction d'une valeur manquante se fait hors verrou : les autres clés ne sont
+    pas bloquées. Pour une même clé, une seule construction à la fois : les sessions qui la
+    demandent pendant ce temps attendent son résultat (et retentent elles-mêmes si elle échoue).
+    Les valeurs sont partagées telles quelles (pas de copie) : à traiter en lecture seule.
+    """
+
+    def __init__(self, name, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=None, registry=CACHES):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.registry = registry if registry is not None else CacheRegistry(budget_octets=float('inf'))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (valeur, taille, créée_à, dernier_accès)
+        self._en_cours = {}  # clé -> _Construction
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.waits = 0
+        self.registry.register(self)
+
+    def _expired(self, entree, maintenant):
+        return self.ttl is not None and maintenant - entree[2] > self.ttl
+
+    def _oldest_access(self):
+        with self._lock:
+            return next(iter(self._entries.values()))[3] if self._entries else None
+
+    def _evict_oldest(self):
+        with self._lock:
+            if self._entries:
+                self._evict_oldest_locked()
+
+    def _evict_oldest_locked(self):
+        _, (_, taille, _, _) = self._entries.popitem(last=False)
+        self.bytes -= taille
+        self.evictions += 1
+
+    def _drop(self, key):
+        _, taille, _, _ = self._entries.pop(key)
+        self.bytes -= taille
+
+    def get_or_build(self, key, build):
+        while True:
+            maintenant = time.monotonic()
+            with self._lock:
+                entree = self._entries.get(key)
+                if entree is not None and self._expired(entree, maintenant):
+                    self._drop(key)
+                    self.expirations += 1
+                    entree = None
+                if entree is not None:
+                    self._entries[key] = (*entree[:3], maintenant)
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entree[0]
+                construction = self._en_cours.get(key)
+                if construction is None:
+                    self.misses += 1
+                    construction = self._en_cours[key] = _Construction()
+                    break
+                self.waits += 1
+
+            # Même clé en cours de construction dans une autre session : on attend son résultat
+            construction.fin.wait()
+            if construction.reussie:
+                return construction.valeur
+
+        try:
+            valeur = build()
+            taille = estimate_size(valeur)
+            with self._lock:
+                if taille <= self.max_bytes:
+                    maintenant = time.monotonic()
+                    self._entries[key] = (valeur, taille, maintenant, maintenant)
+                    self.bytes += taille
+                    while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                        self._evict_oldest_locked()
+                construction.valeur, construction.reussie = valeur, True
+        finally:
+            # Entrée publiée avant la fin de la construction ; en cas d'erreur (ou d'exécution
+            # interrompue), les sessions en attente retentent la construction elles-mêmes
+            with self._lock:
+                del self._en_cours[key]
+            construction.fin.set()
+        # Hors du verrou de ce cache : l'éviction globale prend tour à tour celui de chaque cache
+        self.registry.enforce_budget()
+        return valeur
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            demandes = self.hits + self.misses
+            return {
+                'cache': self.name,
+                'entrees': len(self._entries),
+                'octets': self.bytes,
+                'max_octets': self.max_bytes,
+                'ttl_s': self.ttl,
+                'succes': self.hits,
+                'defauts': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'attentes': self.waits,
+                'taux_succes': round(self.hits / demandes, 3) if demandes else None,
+            }
+
+
+def cached(name, max_entries=8, max_bytes=BUDGET_OCTETS, ttl=None, registry=CACHES):
+    """
+    Décorateur : mémoïse une fonction sur ses arguments dans un BoundedCache nommé `name`.
+    Une exception n'est pas mise en cache. Le cache est exposé par `fonction.cache`.
+
+    Un cache déjà enregistré sous ce nom est repris : une fonction redéfinie à chaque
+    exécution d'un script Streamlit garde ainsi ses entrées (comme st.cache_data).
+    """
+    def decorateur(fonction):
+        cache = registry.get(name) if registry is not None else None
+        if cache is None:
+            cache = BoundedCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl, registry=registry)
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return cache.get_or_build(key, lambda: fonction(*args, **kwargs))
+
+        enveloppe.cache = cache
+        enveloppe.clear = cache.clear
+        return enveloppe
+
+    return decorateur
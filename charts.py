@@ -0,0 +1,121 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+from downsampling import downsample_lines
+from figure_cache import figure_key
+from outofcore import history_series, history_ranking, history_heatmap
+from trends import COLONNES_TENDANCES
+
+# --- FIGURES DU TABLEAU DE BORD (partagées par CV.py, D.py, le warm-up et les benchmarks) ---
+
+# Habillage propre à chaque application : 'cv' (thème sombre de CV.py) et 'd' (D.py)
+THEMES = {
+    'cv': {
+        'line': dict(
+            title="Taux de régularité journalier par ligne (Thème Sombre)",
+            labels={'Taux_Regularite': 'Régularité (%)'},
+            template="plotly_dark",
+            color_discrete_sequence=px.colors.sequential.Plasma
+        ),
+        'hline': dict(line_dash="dash", line_color="#22C55E", annotation_text="Objectif 95%", annotation_position="bottom right"),
+        'bar': dict(
+            color_continuous_scale='Reds',
+            labels={'Taux_Regularite': 'Régularité Moyenne (%)'},
+            template="plotly_dark"
+        ),
+        'heat': dict(
+            color_continuous_scale='Viridis',
+            title="Régularité moyenne par Ligne et Jour de la semaine (Plus le chiffre est élevé, mieux c'est)",
+            template="plotly_dark"
+        ),
+    },
+    'd': {
+        'line': dict(title="Régularité journalière par ligne", color_discrete_sequence=px.colors.qualitative.Bold),
+        'hline': dict(line_dash="dot", line_color="green", annotation_text="Objectif 95%"),
+        'bar': dict(color_continuous_scale='RdYlGn'),
+        'heat': dict(color_continuous_scale='RdYlGn', title="Régularité moyenne par Ligne et Jour de la semaine"),
+    },
+}
+
+
+def line_figure(df_sim_filtered, theme, lttb=True, webgl=False, tendances=False):
+    """
+    Courbe de régularité par ligne (sous-échantillonnée en LTTB, traces Scattergl si `webgl`),
+    avec si `tendances` les moyennes glissantes et les jours anormaux précalculés (trends.py).
+    """
+    df_line = downsample_lines(df_sim_filtered) if lttb else df_sim_filtered
+    fig_line = px.line(
+        df_line, x='Date', y='Taux_Regularite', color='Ligne',
+        render_mode='webgl' if webgl else 'svg',
+        **THEMES[theme]['line']
+    )
+    fig_line.add_hline(y=95, **THEMES[theme]['hline'])
+    if tendances and set(COLONNES_TENDANCES) <= set(df_sim_filtered.columns):
+        add_trend_overlay(fig_line, df_line, df_sim_filtered, webgl)
+    return fig_line
+
+
+def add_trend_overlay(fig_line, df_line, df_sim_filtered, webgl=False):
+    """
+    Superpose à chaque courbe ses moyennes 7 jours (pointillés) et 30 jours (tirets, masquée
+    par défaut) dans sa couleur, puis marque les jours anormaux. Ceux-ci sont pris dans la
+    série complète : le sous-échantillonnage ne peut pas les faire disparaître.
+    """
+    trace = go.Scattergl if webgl else go.Scatter
+    couleurs = {t.name: t.line.color for t in fig_line.data}
+    for ligne, groupe in df_line.groupby('Ligne', observed=True, sort=False):
+        ligne = str(ligne)
+        for colonne, libelle, tirets, visible in (('Moyenne_7j', "moy. 7 j", 'dot', True),
+                                                  ('Moyenne_30j', "moy. 30 j", 'dash', 'legendonly')):
+            fig_line.add_trace(trace(
+                x=groupe['Date'], y=groupe[colonne], mode='lines', name=f"{ligne} · {libelle}",
+                legendgroup=ligne, visible=visible, line=dict(color=couleurs.get(ligne), width=1.5, dash=tirets)
+            ))
+
+    anomalies = df_sim_filtered[df_sim_filtered['Anomalie']]
+    if not anomalies.empty:
+        fig_line.add_trace(trace(
+            x=anomalies['Date'], y=anomalies['Taux_Regularite'], mode='markers', name="Jours anormaux",
+            marker=dict(symbol='x', size=9, color='#EF4444'),
+            customdata=anomalies[['Ligne', 'Zscore']].astype({'Ligne': str}).to_numpy(dtype=object),
+            hovertemplate="Ligne %{customdata[0]} · %{x|%d/%m/%Y}<br>%{y:.2f} % (z = %{customdata[1]:.1f})<extra></extra>"
+        ))
+
+
+def ranking_figure(df_grouped, theme):
+    """
+    Classement horizontal des lignes par régularité moyenne.
+    """
+    return px.bar(
+        df_grouped, x='Taux_Regularite', y='Ligne', orientation='h',
+        color='Taux_Regularite', range_color=[90, 100], text_auto='.1f',
+        **THEMES[theme]['bar']
+    )
+
+
+def heatmap_figure(heatmap_data, theme):
+    """
+    Heatmap Ligne x Jour de la semaine.
+    """
+    return px.imshow(heatmap_data, aspect="auto", text_auto='.1f', **THEMES[theme]['heat'])
+
+
+def dashboard_figure(figures, kind, theme, snapshot, lignes, debut, fin, lttb=True, webgl=False, tendances=False):
+    """
+    Figure `kind` ('line', 'bar' ou 'heat') pour la sélection, servie par le cache de figures.
+    Les données ne sont découpées ou agrégées qu'en cas d'absence dans le cache,
+    depuis l'historique en mémoire ou hors mémoire selon l'état `snapshot`.
+    """
+    if kind == 'line':
+        key = figure_key(f'{theme}-line', lignes, debut, fin, lttb=lttb, webgl=webgl, tendances=tendances,
+                         version=snapshot['version'])
+        return figures.get_or_build(key, lambda: line_figure(
+            history_series(snapshot, lignes, debut, fin), theme, lttb, webgl, tendances
+        ))
+    if kind == 'bar':
+        key = figure_key(f'{theme}-bar', lignes, debut, fin, version=snapshot['version'])
+        return figures.get_or_build(key, lambda: ranking_figure(history_ranking(snapshot, lignes, debut, fin), theme))
+    if kind == 'heat':
+        key = figure_key(f'{theme}-heat', lignes, debut, fin, version=snapshot['version'])
+        return figures.get_or_build(key, lambda: heatmap_figure(history_heatmap(snapshot, lignes, debut, fin), theme))
+    raise ValueError(f"Type de figure inconnu : {kind}")
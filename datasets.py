@@ -0,0 +1,115 @@
+import os
+import shutil
+import time
+
+from fsutil import file_lock, publish_dir_atomic
+from history_index import sort_history
+from ingestion import ingest_csv, FONTAINES_COLONNES, FONTAINES_RENOMMAGE
+from schema import compact, SIM_SCHEMA, FONTAINES_SCHEMA
+from outofcore import build_memmap_history
+from simulation import generate_regularity, generate_regularity_parallel, SEED_DEFAUT
+from snapshots import load_or_build, parquet_snapshot, snapshot_key, CACHE_DIR
+
+# --- JEUX DE DONNÉES DU TABLEAU DE BORD (hors Streamlit) ---
+
+FONTAINES_CSV = "fontaines-a-eau-dans-le-reseau-ratp.csv"
+
+# Stockage de l'historique : 'memoire' (DataFrame trié + cube d'agrégats) ou 'memmap'
+# (historique horaire par station sur 10 ans, tableaux memory-mappés, voir outofcore.py)
+STOCKAGE = os.environ.get("RATP_STOCKAGE", "memoire")
+MEMMAP_DIR = CACHE_DIR.parent / "memmap"
+# Un historique hors mémoire d'autres paramètres n'est supprimé qu'après ce délai sans utilisation :
+# une session d'un autre processus peut encore l'avoir ouvert
+DELAI_SUPPRESSION_MEMMAP_S = int(os.environ.get("RATP_MEMMAP_DELAI_SUPPRESSION_S", str(24 * 3600)))
+# Génération de l'historique simulé : 0 = un seul flux aléatoire (d'origine), N >= 1 = flux par
+# ligne et par bloc répartis sur N processus (mêmes données quel que soit N, voir simulation.py)
+SIM_WORKERS = int(os.environ.get("RATP_SIM_WORKERS", "0"))
+MEMMAP_PARAMS = {'nb_lignes': 14, 'stations_par_ligne': 25, 'start': "2014-01-01", 'end': "2023-12-31 23:00",
+                 'freq': 'h', 'seed': SEED_DEFAUT}
+
+
+def _simulation(nb_lignes, start, end, freq, seed, workers):
+    """
+    Clé d'instantané et constructeur de l'historique simulé trié par (Ligne, Date) et compacté.
+    """
+    params = {'nb_lignes': nb_lignes, 'start': start, 'end': end, 'freq': freq, 'seed': seed}
+
+    def build():
+        if workers:
+            df = generate_regularity_parallel(**params, workers=workers)
+        else:
+            df = generate_regularity(**params)
+        return compact(sort_history(df), SIM_SCHEMA, 'simulation')
+
+    return ({**params, 'flux': 'blocs'} if workers else params), build
+
+
+def simulation_frame(nb_lignes=14, start="2023-01-01", end="2023-12-31", freq='D', seed=SEED_DEFAUT,
+                     workers=SIM_WORKERS):
+    """
+    Historique simulé trié par (Ligne, Date) et compacté, relu depuis l'instantané disque si possible.
+    Avec `workers` >= 1, généré en parallèle ; l'instantané est partagé quel que soit le nombre de processus.
+    """
+    return load_or_build('simulation', *_simulation(nb_lignes, start, end, freq, seed, workers))
+
+
+def simulation_parquet(nb_lignes=14, start="2023-01-01", end="2023-12-31", freq='D', seed=SEED_DEFAUT,
+                       workers=SIM_WORKERS):
+    """
+    Chemin de l'historique simulé en Parquet sur disque (mêmes paramètres que simulation_frame),
+    généré au premier appel puis interrogé sans être chargé (moteur SQL, voir sqlbackend.py).
+    """
+    return parquet_snapshot('simulation', *_simulation(nb_lignes, start, end, freq, seed, workers))
+
+
+def fontaines_frame(file_path=FONTAINES_CSV):
+    """
+    Fontaines RATP : lecture en flux (pyarrow) des seules colonnes utiles, relue depuis l'instantané
+    disque tant que le CSV n'a pas changé. Lève FileNotFoundError si le fichier est absent.
+    """
+    def parse_csv():
+        df = ingest_csv(file_path, FONTAINES_COLONNES, FONTAINES_SCHEMA, sep=';', renames=FONTAINES_RENOMMAGE)
+        return compact(df, FONTAINES_SCHEMA, 'fontaines')
+
+    return load_or_build('fontaines', {'sep': ';', 'colonnes': FONTAINES_COLONNES}, parse_csv, source=file_path)
+
+
+def memmap_history(**params):
+    """
+    Dossier de l'historique hors mémoire pour ces paramètres (MEMMAP_PARAMS par défaut),
+    généré sur disque au premier appel.
+
+    La génération est sérialisée entre processus (verrou fichier) et se fait dans un dossier
+    temporaire renommé une fois complet : l'application, le préchauffage et les autres processus
+    ne voient jamais un historique à moitié écrit et ne le génèrent qu'une fois. Les historiques
+    d'autres paramètres (et les dossiers temporaires abandonnés) sont supprimés après
+    DELAI_SUPPRESSION_MEMMAP_S secondes sans utilisation.
+    """
+    params = {**MEMMAP_PARAMS, **params}
+    path = MEMMAP_DIR / snapshot_key('memmap', params)
+    if not (path / "meta.json").exists():
+        MEMMAP_DIR.mkdir(parents=True, exist_ok=True)
+        with file_lock(MEMMAP_DIR / ".memmap.lock"):
+            # Un autre processus a pu le générer pendant l'attente du verrou
+            if not (path / "meta.json").exists():
+                # Reste incomplet d'une génération interrompue : jamais ouvert (pas de meta.json)
+                shutil.rmtree(path, ignore_errors=True)
+                publish_dir_atomic(path, lambda tmp: build_memmap_history(tmp, **params))
+            prune_memmap(path)
+    # Date d'utilisation, lue par prune_memmap des autres processus
+    os.utime(path)
+    return path
+
+
+def prune_memmap(courant, delai_s=DELAI_SUPPRESSION_MEMMAP_S):
+    """
+    Supprime les historiques hors mémoire autres que `courant` inutilisés depuis plus de `delai_s` secondes.
+    """
+    limite = time.time() - delai_s
+    for old in [*MEMMAP_DIR.glob("memmap-*"), *MEMMAP_DIR.glob(".memmap-*.tmp")]:
+        try:
+            perime = old != courant and old.stat().st_mtime < limite
+        except FileNotFoundError:  # supprimé entre-temps par un autre processus
+            continue
+        if perime:
+            shutil.rmtree(old, ignore_errors=True)
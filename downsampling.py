@@ -0,0 +1,91 @@
+import numpy as np
+
+# --- SOUS-ÉCHANTILLONNAGE DES SÉRIES TEMPORELLES (LTTB) ---
+
+LARGEUR_GRAPHIQUE_PX = 1200   # largeur type du graphique en mode "wide"
+POINTS_PAR_PIXEL = 2          # au-delà, les points supplémentaires ne sont plus visibles
+MIN_POINTS_PAR_COURBE = 200   # plancher par courbe quand beaucoup de lignes se partagent le budget
+OBJECTIF_REGULARITE = 95.0
+
+
+def point_budget(n_courbes=1, largeur_px=LARGEUR_GRAPHIQUE_PX, points_par_pixel=POINTS_PAR_PIXEL):
+    """
+    Nombre de points à garder par courbe pour `n_courbes` courbes sur un graphique de `largeur_px` pixels :
+    le budget du graphique est partagé entre les courbes (au moins MIN_POINTS_PAR_COURBE chacune).
+    """
+    return max(3, MIN_POINTS_PAR_COURBE, int(largeur_px * points_par_pixel) // max(1, n_courbes))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets : indices des `n_out` points qui conservent au mieux
+    la forme de la courbe (x croissant). Premier et dernier points toujours gardés.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bornes des n_out - 2 seaux intermédiaires
+    bords = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        debut, fin = bords[i], bords[i + 1]
+        # Point moyen du seau suivant (ou dernier point pour le dernier seau)
+        suivant = slice(fin, bords[i + 2]) if i + 2 < len(bords) else slice(n - 1, n)
+        cx, cy = x[suivant].mean(), y[suivant].mean()
+        # Aire du triangle (a, candidat, moyenne du seau suivant)
+        aires = np.abs((x[a] - cx) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (cy - y[a]))
+        a = debut + int(np.argmax(aires))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_series(x, y, n_out, objectif=OBJECTIF_REGULARITE):
+    """
+    LTTB sur la moitié du budget, complété par le minimum de chaque seau quand il passe
+    sous l'objectif : les creux sous 95 % restent visibles même s'ils ne forment pas
+    le plus grand triangle. Le résultat tient dans `n_out` points.
+    """
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+
+    n_lttb = max(3, n_out // 2)
+    indices = lttb_indices(x, y, n_lttb)
+
+    y = np.asarray(y, dtype=np.float64)
+    bords = np.unique(np.linspace(0, n, n_out - n_lttb + 1).astype(np.int64))
+    minimums = np.array([d + np.argmin(y[d:f]) for d, f in zip(bords[:-1], bords[1:])], dtype=np.int64)
+    creux = minimums[y[minimums] < objectif]
+
+    return np.union1d(indices, creux)
+
+
+def downsample_lines(df, x='Date', y='Taux_Regularite', par='Ligne', n_out=None):
+    """
+    Applique downsample_series à chaque ligne de `df` (supposé trié par `par` puis `x`), avec
+    par défaut le budget du graphique partagé entre ses lignes (point_budget).
+    Renvoie `df` tel quel si aucune courbe ne dépasse le budget.
+    """
+    if df.empty:
+        return df
+    tailles = df.groupby(par, observed=True).size()
+    n_out = n_out or point_budget(n_courbes=int((tailles > 0).sum()))
+    if tailles.max() <= n_out:
+        return df
+
+    valeurs_x = df[x].to_numpy()
+    if np.issubdtype(valeurs_x.dtype, np.datetime64):
+        valeurs_x = valeurs_x.astype('datetime64[ns]').astype(np.int64)
+    valeurs_y = df[y].to_numpy(dtype=np.float64)
+
+    positions = []
+    for groupe in df.groupby(par, observed=True, sort=False).indices.values():
+        positions.append(groupe[downsample_series(valeurs_x[groupe], valeurs_y[groupe], n_out)])
+
+    return df.iloc[np.sort(np.concatenate(positions))]
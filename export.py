@@ -0,0 +1,89 @@
+import io
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- EXPORT DE LA SÉLECTION EN CSV / PARQUET, PAR MORCEAUX ---
+#
+# Les morceaux (vues du DataFrame) sont écrits l'un après l'autre dans un fichier temporaire :
+# ni texte CSV complet, ni table Arrow complète, ni copie de la sélection en mémoire.
+# Le fichier est rendu rembobiné à st.download_button, qui le lit lui-même une seule fois.
+
+LIGNES_PAR_MORCEAU = 50_000
+# Format -> (extension, type MIME)
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def frame_chunks(df, taille=LIGNES_PAR_MORCEAU):
+    """
+    Morceaux successifs (vues iloc) d'au plus `taille` lignes de `df` ;
+    un seul morceau vide si `df` est vide, pour que l'export garde ses colonnes et leurs types.
+    """
+    if df.empty:
+        yield df.iloc[:0]
+        return
+    for a in range(0, len(df), taille):
+        yield df.iloc[a:a + taille]
+
+
+def write_csv(morceaux, dest, sep=';'):
+    """
+    CSV (séparateur `sep`, comme les fichiers sources) écrit morceau par morceau dans le fichier binaire `dest`.
+    """
+    entete = True
+    for morceau in morceaux:
+        dest.write(morceau.to_csv(sep=sep, index=False, header=entete).encode('utf-8'))
+        entete = False
+
+
+def write_parquet(morceaux, dest):
+    """
+    Parquet écrit morceau par morceau (un groupe de lignes par morceau) dans le fichier binaire `dest`.
+    Le schéma est celui du premier morceau, qui peut être vide (fichier valide sans ligne) ;
+    sans aucun morceau, le schéma est inconnu et aucun fichier valide ne peut être écrit.
+    """
+    writer = None
+    try:
+        for morceau in morceaux:
+            if writer is None:
+                table = pa.Table.from_pandas(morceau, preserve_index=False)
+                writer = pq.ParquetWriter(dest, table.schema)
+            else:
+                table = pa.Table.from_pandas(morceau, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Export Parquet sans aucun morceau : schéma inconnu (voir frame_chunks).")
+
+
+def export_file(morceaux, fmt):
+    """
+    Fichier temporaire `fmt` ('CSV' ou 'Parquet') construit depuis l'itérable `morceaux`, rembobiné.
+    Pensé pour le paramètre `data` (appelable) de st.download_button : rien n'est calculé avant
+    le clic, et Streamlit lit le fichier lui-même (pas de copie en octets ici). Le fichier
+    disparaît quand il est fermé ou libéré.
+    """
+    # Sans tampon : un fichier brut (io.RawIOBase), type de fichier que st.download_button sait lire
+    fichier = tempfile.TemporaryFile(buffering=0)
+    try:
+        if fmt == 'Parquet':
+            write_parquet(morceaux, fichier)
+        elif fmt == 'CSV':
+            write_csv(morceaux, fichier)
+        else:
+            raise ValueError(f"Format d'export inconnu : {fmt}")
+        fichier.seek(0)
+    except BaseException:
+        fichier.close()
+        raise
+    if isinstance(fichier, io.RawIOBase):
+        return fichier
+    # Enveloppe de TemporaryFile (Windows) : contenu relu en octets
+    with fichier:
+        return fichier.read()
@@ -0,0 +1,22 @@
+from caching import BoundedCache, CACHES
+
+# --- CACHE DE FIGURES (LRU + BUDGET MÉMOIRE) ---
+
+
+def figure_key(kind, lignes, debut, fin, **options):
+    """
+    Signature canonique d'une figure : type de graphique, lignes triées, période et options.
+    L'ordre de sélection des lignes dans le multiselect n'a donc pas d'effet sur la clé.
+    """
+    return (kind, tuple(sorted(str(l) for l in lignes)), str(debut), str(fin), tuple(sorted(options.items())))
+
+
+class FigureCache(BoundedCache):
+    """
+    Cache LRU de figures Plotly partagé entre les sessions, borné en nombre d'entrées
+    et en octets. Les figures les moins récemment utilisées sont évincées en premier,
+    y compris pour tenir le budget global des caches (voir caching.py).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=None, registry=CACHES):
+        super().__init__('figures', max_entries=max_entries, max_bytes=max_bytes, ttl=ttl, registry=registry)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- ÉCRITURES ATOMIQUES SUR DISQUE (sans dépendance : importé par les ressources légères de la page CV) ---
+
+
+def write_atomic(path, write):
+    """
+    Écrit `path` par `write(chemin_temporaire)` puis le publie avec os.replace : un lecteur ne voit
+    jamais de fichier à moitié écrit, et chaque écrivain (processus, pod partageant le volume)
+    a son propre fichier temporaire, supprimé en cas d'échec.
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def publish_dir_atomic(path, write):
+    """
+    Remplit un dossier temporaire voisin de `path` par `write(dossier_temporaire)` puis le renomme
+    en `path` (os.replace) : `path` n'existe jamais à moitié écrit. Le dossier temporaire est
+    supprimé en cas d'échec. `path` ne doit pas exister (à vérifier sous file_lock).
+    """
+    path = Path(path)
+    tmp_path = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp"))
+    try:
+        write(tmp_path)
+        # mkdtemp crée le dossier en 0700 : lisible par les autres processus du volume une fois publié
+        os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Verrou exclusif entre processus (et pods partageant le volume) sur le fichier `path`, créé au besoin.
+    Bloque jusqu'à l'obtention du verrou, relâché en sortie (ou à la mort du processus).
+    """
+    with open(path, 'a+b') as fichier:
+        if fcntl is not None:
+            fcntl.flock(fichier, fcntl.LOCK_EX)
+        else:
+            fichier.seek(0)
+            msvcrt.locking(fichier.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fichier, fcntl.LOCK_UN)
+            else:
+                fichier.seek(0)
+                msvcrt.locking(fichier.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# --- INDEX (Ligne, Date) POUR LE FILTRAGE PAR TRANCHES ---
+
+
+def sort_history(df):
+    """
+    Range l'historique par (Ligne, Date) : chaque ligne occupe un bloc contigu trié par date.
+    """
+    return df.sort_values(['Ligne', 'Date'], kind='stable').reset_index(drop=True)
+
+
+def build_line_index(df):
+    """
+    Index d'un historique trié par sort_history : bornes [début, fin) de chaque ligne
+    et tableau des dates (datetime64) pour la recherche dichotomique.
+    """
+    lignes = df['Ligne'].astype(str).to_numpy()
+    debuts = np.flatnonzero(np.r_[True, lignes[1:] != lignes[:-1]])
+    fins = np.r_[debuts[1:], len(lignes)]
+    return {
+        'bornes': {lignes[d]: (d, f) for d, f in zip(debuts, fins)},
+        'dates': df['Date'].to_numpy()
+    }
+
+
+def find_keys(index, lignes, dates):
+    """
+    Positions d'insertion des couples (`lignes`, `dates`) dans un historique trié et masque
+    des couples déjà présents. Seuls les blocs des lignes concernées sont parcourus
+    (recherche dichotomique) ; une ligne absente de l'index a la position -1.
+    `dates` doit avoir le type de index['dates'].
+    """
+    positions = np.full(len(lignes), -1, dtype=np.int64)
+    presents = np.zeros(len(lignes), dtype=bool)
+    for ligne in np.unique(lignes):
+        if ligne not in index['bornes']:
+            continue
+        d, f = index['bornes'][ligne]
+        bloc = index['dates'][d:f]
+        choix = np.flatnonzero(lignes == ligne)
+        p = np.searchsorted(bloc, dates[choix], side='left')
+        positions[choix] = d + p
+        presents[choix] = (p < len(bloc)) & (bloc[np.minimum(p, len(bloc) - 1)] == dates[choix])
+    return positions, presents
+
+
+def merge_history(df, index, df_nouveau):
+    """
+    Insère `df_nouveau` (colonnes et types de `df`, couples (Ligne, Date) absents de `df`)
+    dans l'historique trié sans le retrier : chaque nouvelle ligne de données est placée dans
+    le bloc de sa ligne par recherche dichotomique (find_keys), une nouvelle ligne de métro
+    à sa place dans l'ordre des noms (celui de sort_history), puis les colonnes sont fusionnées en une passe.
+
+    Renvoie (historique fusionné, index) ; None si les blocs de `df` ne sont pas rangés par nom
+    de ligne, auquel cas il faut passer par sort_history.
+    """
+    bornes = index['bornes']
+    noms = sorted(bornes)
+    if sorted(bornes, key=lambda ligne: bornes[ligne][0]) != noms:
+        return None
+
+    lignes = df_nouveau['Ligne'].astype(str).to_numpy()
+    dates = df_nouveau['Date'].to_numpy()
+    rang = np.lexsort((dates, lignes))
+    df_nouveau, lignes = df_nouveau.take(rang), lignes[rang]
+
+    positions, _ = find_keys(index, lignes, dates[rang])
+    absentes = positions < 0
+    if absentes.any():
+        # Début du bloc de la première ligne de nom supérieur (fin de l'historique sinon)
+        debuts = np.array([bornes[nom][0] for nom in noms] + [len(df)], dtype=np.int64)
+        positions[absentes] = debuts[np.searchsorted(np.array(noms, dtype=str), lignes[absentes], side='right')]
+
+    # Ordre de la fusion : les lignes insérées sont décalées des insertions qui les précèdent
+    n, k = len(df), len(df_nouveau)
+    cibles = positions + np.arange(k)
+    inserees = np.zeros(n + k, dtype=bool)
+    inserees[cibles] = True
+    ordre = np.empty(n + k, dtype=np.int64)
+    ordre[cibles] = n + np.arange(k)
+    ordre[~inserees] = np.arange(n)
+
+    colonnes = {}
+    for col in df.columns:
+        a, b = df[col], df_nouveau[col]
+        if isinstance(a.dtype, pd.CategoricalDtype) and a.dtype != b.dtype:
+            # Catégories réunies (et triées, comme après sort_history + apply_schema)
+            categories = a.cat.categories.union(b.cat.categories)
+            if not categories.equals(a.cat.categories):
+                a = a.cat.set_categories(categories)
+            b = b.cat.set_categories(categories)
+        colonnes[col] = pd.concat([a, b], ignore_index=True).array.take(ordre)
+    fusion = pd.DataFrame(colonnes)
+
+    longueurs = {ligne: f - d for ligne, (d, f) in bornes.items()}
+    for ligne, nombre in zip(*np.unique(lignes, return_counts=True)):
+        longueurs[str(ligne)] = longueurs.get(str(ligne), 0) + int(nombre)
+    nouvelles_bornes, d = {}, 0
+    for ligne in sorted(longueurs):
+        nouvelles_bornes[ligne] = (d, d + longueurs[ligne])
+        d += longueurs[ligne]
+    return fusion, {'bornes': nouvelles_bornes, 'dates': fusion['Date'].to_numpy()}
+
+
+def history_ranges(index, lignes, debut, fin):
+    """
+    Bornes [a, b) des lignes de l'historique retenues pour les lignes choisies entre `debut`
+    et `fin` inclus, une par ligne de métro, dans l'ordre de l'historique.
+    """
+    dates = index['dates']
+    borne_basse = np.datetime64(debut, 'D').astype(dates.dtype)
+    borne_haute = (np.datetime64(fin, 'D') + 1).astype(dates.dtype)
+
+    choisies = {str(ligne) for ligne in lignes}
+    tranches = []
+    for ligne, (d, f) in sorted(index['bornes'].items(), key=lambda item: item[1]):
+        if ligne not in choisies:
+            continue
+        a = d + np.searchsorted(dates[d:f], borne_basse, side='left')
+        b = d + np.searchsorted(dates[d:f], borne_haute, side='left')
+        if b > a:
+            tranches.append((a, b))
+    return tranches
+
+
+def slice_history(df, index, lignes, debut, fin):
+    """
+    Lignes de `df` pour les lignes choisies entre `debut` et `fin` inclus (dates calendaires).
+
+    Chaque ligne est résolue par deux recherches dichotomiques dans son bloc de dates,
+    sans construire de masque sur tout le tableau. Pour une seule ligne le résultat
+    est une tranche (iloc) du DataFrame ; sinon seules les lignes retenues sont copiées.
+    """
+    tranches = history_ranges(index, lignes, debut, fin)
+    if len(tranches) == 1:
+        a, b = tranches[0]
+        return df.iloc[a:b]
+    positions = np.concatenate([np.arange(a, b) for a, b in tranches]) if tranches else np.array([], dtype=np.int64)
+    return df.take(positions)
@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from caching import estimate_size
+from history_index import sort_history, build_line_index, find_keys, merge_history
+from rollup import build_rollup, merge_rollup
+from schema import apply_schema, SIM_SCHEMA
+from simulation import add_calendar_columns
+from trends import add_trends, update_trends, COLONNES_TENDANCES
+
+logger = logging.getLogger(__name__)
+# Fichiers rejetés : une ligne JSON sur le logger des mesures, comme les exécutions et les caches
+perf_logger = logging.getLogger("ratp.perf")
+
+# --- INGESTION INCRÉMENTALE DES FICHIERS JOURNALIERS DE RÉGULARITÉ ---
+
+# Dossier de dépôt : un fichier par jour (CSV ';' ou Parquet) avec Date, Ligne, Taux_Regularite, Trafic.
+# Un fichier est écrit sous un autre nom (ex. 2024-01-02.csv.tmp, ou caché .2024-01-02.csv) puis renommé :
+# seuls les .csv / .parquet visibles sont lus, et seulement une fois stables depuis DELAI_STABILITE_S
+DROP_DIR = Path(os.environ.get("RATP_DROP_DIR", Path(__file__).parent / "drops" / "regularite"))
+# Fichiers illisibles ou mal formés, déplacés hors du dossier de dépôt
+QUARANTAINE = "rejets"
+COLONNES_DEPOT = ['Date', 'Ligne', 'Taux_Regularite', 'Trafic']
+INTERVALLE_SCAN_S = 30
+DELAI_STABILITE_S = 5
+
+
+def list_new_partitions(drop_dir, deja_integres, delai_stabilite_s=DELAI_STABILITE_S):
+    """
+    Fichiers du dossier de dépôt pas encore intégrés, dans l'ordre des noms (donc des dates).
+    Un fichier modifié depuis moins de `delai_stabilite_s` secondes (copie en cours) est laissé au scan suivant.
+    """
+    if not Path(drop_dir).is_dir():
+        return []
+    limite = time.time() - delai_stabilite_s
+    fichiers = []
+    for p in sorted(Path(drop_dir).iterdir()):
+        if p.suffix not in ('.csv', '.parquet') or p.name.startswith('.') or p.name in deja_integres:
+            continue
+        try:
+            if p.is_file() and p.stat().st_mtime <= limite:
+                fichiers.append(p)
+        except FileNotFoundError:  # renommé ou supprimé pendant le scan
+            continue
+    return fichiers
+
+
+def read_partition(path):
+    """
+    Lit un fichier journalier et lui donne la forme de l'historique (colonnes temporelles, schéma compact).
+    """
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path, columns=COLONNES_DEPOT)
+    else:
+        df = pd.read_csv(path, sep=';', usecols=COLONNES_DEPOT, dtype={'Ligne': str}, parse_dates=['Date'])
+    return apply_schema(add_calendar_columns(df), SIM_SCHEMA)
+
+
+def conform_partition(df_nouveau, df):
+    """
+    `df_nouveau` avec les colonnes de l'historique `df`, dans ses types : les tendances, absentes
+    des dépôts, sont initialisées (puis recalculées par update_trends) ; les catégories propres
+    aux données (Ligne) sont réunies à la fusion (voir merge_history).
+    """
+    defauts = {nom: np.nan for nom in COLONNES_TENDANCES}
+    defauts['Anomalie'] = False
+    colonnes = {}
+    for col, dtype in df.dtypes.items():
+        serie = df_nouveau[col] if col in df_nouveau.columns else pd.Series(defauts.get(col), index=df_nouveau.index)
+        if isinstance(dtype, pd.CategoricalDtype) and not dtype.ordered:
+            colonnes[col] = serie.astype('category')
+        else:
+            colonnes[col] = serie.astype(dtype)
+    return pd.DataFrame(colonnes)
+
+
+def make_snapshot(df, partitions=(), version=0):
+    """
+    État immuable servi aux sessions : historique trié (avec ses tendances glissantes, voir trends.py),
+    index (Ligne, Date) et cube d'agrégats.
+    """
+    index = build_line_index(df)
+    return {
+        'df': add_trends(df, index),
+        'index': index,
+        'cube': build_rollup(df),
+        'partitions': frozenset(partitions),
+        'version': version,
+    }
+
+
+class DropScanner(ABC):
+    """
+    Scan périodique du dossier de dépôt, commun aux historiques enrichis à chaud
+    (HistoryStore en mémoire, sqlbackend.SqlStore sur disque).
+
+    Une sous-classe expose son état immuable par `current()` (avec l'ensemble 'partitions'
+    des fichiers déjà intégrés) et intègre les fichiers lus dans `_integrate()`.
+    """
+
+    def __init__(self, drop_dir=DROP_DIR, intervalle_s=INTERVALLE_SCAN_S):
+        self.drop_dir = drop_dir
+        self.intervalle_s = intervalle_s
+        self._lock = threading.Lock()
+        self._dernier_scan = float('-inf')
+        # Fichiers rejetés qui n'ont pas pu être déplacés : (nom, date de modification), relus s'ils changent
+        self._rejets = set()
+
+    @abstractmethod
+    def current(self):
+        """
+        État immuable servi aux sessions, avec l'ensemble 'partitions' des fichiers déjà intégrés.
+        """
+
+    def _reject(self, path, erreur):
+        """
+        Écarte un fichier illisible ou mal formé : journalisé sur ratp.perf puis déplacé
+        dans le sous-dossier QUARANTAINE (ou, si le déplacement échoue, ignoré tant qu'il ne change pas).
+        """
+        perf_logger.warning(json.dumps({
+            'evenement': 'partition_rejetee',
+            'horodatage': round(time.time(), 3),
+            'fichier': str(path),
+            'erreur': f"{type(erreur).__name__}: {erreur}",
+        }, ensure_ascii=False))
+        try:
+            signature = (path.name, path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return
+        try:
+            quarantaine = Path(self.drop_dir) / QUARANTAINE
+            quarantaine.mkdir(exist_ok=True)
+            os.replace(path, quarantaine / path.name)
+        except OSError:
+            self._rejets.add(signature)
+
+    def _read_partitions(self, fichiers):
+        """
+        Lit chaque fichier séparément : un fichier en erreur est écarté (voir _reject) sans bloquer les autres.
+        Renvoie les DataFrames lus et les fichiers correspondants.
+        """
+        lus, integres = [], []
+        for path in fichiers:
+            try:
+                if (path.name, path.stat().st_mtime_ns) in self._rejets:
+                    continue
+                lus.append(read_partition(path))
+                integres.append(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:  # colonnes absentes, fichier tronqué, valeurs non convertibles...
+                self._reject(path, e)
+        return lus, integres
+
+    def refresh(self, force=False):
+        """
+        Intègre les nouveaux fichiers du dossier de dépôt (au plus un scan par intervalle).
+        Les fichiers illisibles sont écartés sans interrompre l'exécution qui a déclenché le scan.
+        Renvoie True si un nouvel état a été publié.
+        """
+        if not force and time.monotonic() - self._dernier_scan < self.intervalle_s:
+            return False
+        if not self._lock.acquire(blocking=False):
+            # Une autre session intègre déjà les fichiers
+            return False
+        try:
+            self._dernier_scan = time.monotonic()
+            debut = time.perf_counter()
+            lus, nouveaux = self._read_partitions(list_new_partitions(self.drop_dir, self.current()['partitions']))
+            if not nouveaux:
+                return False
+            df_nouveau = pd.concat(lus, ignore_index=True).drop_duplicates(['Ligne', 'Date'], keep='last')
+            ajoutees = self._integrate(df_nouveau, {p.name for p in nouveaux})
+            logger.info("%d fichier(s), %d nouvelles lignes intégrées en %.3f s",
+                        len(nouveaux), ajoutees, time.perf_counter() - debut)
+            return ajoutees > 0
+        finally:
+            self._lock.release()
+
+    @abstractmethod
+    def _integrate(self, df_nouveau, noms):
+        """
+        Publie l'état enrichi des lignes de `df_nouveau` absentes de l'historique (mode ajout seul)
+        et des fichiers `noms`. Renvoie le nombre de lignes ajoutées.
+        """
+
+
+class HistoryStore(DropScanner):
+    """
+    Historique de régularité partagé entre sessions, enrichi à chaud par le dossier de dépôt.
+
+    Chaque session lit `current()` une fois par exécution et travaille sur cet état.
+    `refresh()` prépare le nouvel état à côté (fusion des seules nouvelles partitions,
+    mise à jour du cube pour les lignes et jours concernés) puis le publie en une seule
+    affectation : une session en cours ne voit jamais un historique à moitié chargé.
+    """
+
+    def __init__(self, df, drop_dir=DROP_DIR, intervalle_s=INTERVALLE_SCAN_S):
+        super().__init__(drop_dir, intervalle_s)
+        self._snapshot = make_snapshot(df)
+        self._taille = (None, 0)  # (version mesurée, octets)
+
+    def current(self):
+        return self._snapshot
+
+    def memory_bytes(self):
+        """
+        Octets occupés par l'état courant (historique et tendances, index, cube), mesurés une fois par version.
+        """
+        snap = self._snapshot
+        version, octets = self._taille
+        if version != snap['version']:
+            octets = estimate_size([snap['df'], snap['index'], snap['cube']])
+            self._taille = (snap['version'], octets)
+        return octets
+
+    def _integrate(self, df_nouveau, noms):
+        snap = self._snapshot
+        df_nouveau = conform_partition(df_nouveau, snap['df'])
+
+        # Mode ajout seul : un couple (Ligne, Date) déjà présent n'est pas remplacé
+        # (recherché dans les seuls blocs des lignes concernées)
+        _, presents = find_keys(snap['index'], df_nouveau['Ligne'].astype(str).to_numpy(), df_nouveau['Date'].to_numpy())
+        df_nouveau = df_nouveau[~presents]
+
+        partitions = snap['partitions'] | noms
+        if df_nouveau.empty:
+            self._snapshot = {**snap, 'partitions': partitions}
+            return 0
+
+        # Insertion dans les blocs des lignes concernées, sans retrier tout l'historique
+        fusion = merge_history(snap['df'], snap['index'], df_nouveau)
+        if fusion is None:
+            df = apply_schema(sort_history(pd.concat([snap['df'], df_nouveau], ignore_index=True)), SIM_SCHEMA)
+            fusion = df, build_line_index(df)
+        df, index = fusion
+        # Tendances recalculées pour les seules lignes touchées, à partir du premier jour ajouté
+        depuis = df_nouveau.groupby('Ligne', observed=True)['Date'].min()
+        nouvel_etat = {
+            'df': update_trends(df, index, depuis),
+            'index': index,
+            'cube': merge_rollup(snap['cube'], df_nouveau),
+            'partitions': partitions,
+            'version': snap['version'] + 1,
+        }
+        # Publication atomique (simple changement de référence)
+        self._snapshot = nouvel_etat
+        return len(df_nouveau)
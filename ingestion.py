@@ -0,0 +1,109 @@
+import csv
+import logging
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+logger = logging.getLogger(__name__)
+
+# --- INGESTION EN FLUX DES EXPORTS CSV OPEN DATA RATP (moteur Arrow) ---
+
+TAILLE_BLOC = 4 * 1024 * 1024   # octets lus par bloc : borne la mémoire pendant la lecture
+
+# Colonnes utiles à l'onglet carte (noms normalisés)
+FONTAINES_COLONNES = [
+    'Ligne', 'Station ou Gare', 'Adresse', 'Code postal', 'Commune',
+    'En zone contrôlée ou non', 'Latitude', 'Longitude', 'Point_geographique'
+]
+FONTAINES_RENOMMAGE = {'Latitude': 'latitude', 'Longitude': 'longitude'}
+
+
+def normalize_header(nom):
+    """
+    Nettoie un nom de colonne open data : BOM, retours à la ligne dans les en-têtes
+    entre guillemets ("Identifiant \\nRATP") et espaces multiples ou finaux.
+    """
+    return ' '.join(nom.replace('\ufeff', '').split())
+
+
+def read_header(path, sep=';'):
+    """
+    Noms de colonnes bruts du fichier (le module csv gère les en-têtes sur plusieurs lignes).
+    """
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f, delimiter=sep))
+
+
+def arrow_type(dtype):
+    """
+    Type Arrow appliqué dès la lecture pour un type pandas du schéma (None = inférence Arrow).
+    """
+    dtype = str(dtype)
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype.startswith('string') or dtype == 'str':
+        return pa.string()
+    if dtype in ('int32', 'int64', 'float32', 'float64'):
+        return pa.from_numpy_dtype(dtype)
+    return None
+
+
+def iter_csv_batches(path, colonnes=None, schema=None, sep=';', block_size=TAILLE_BLOC):
+    """
+    Lit `path` par blocs avec le lecteur CSV en flux de pyarrow.
+
+    En-têtes normalisés une seule fois, projection sur `colonnes` (noms normalisés)
+    et types du `schema` appliqués pendant le parsing. Produit des RecordBatch Arrow
+    dont les colonnes portent les noms normalisés.
+    """
+    bruts = read_header(path, sep)
+    normalises = [normalize_header(nom) for nom in bruts]
+    vers_brut = dict(zip(normalises, bruts))
+
+    colonnes = [c for c in (colonnes or normalises) if c in vers_brut]
+    types = {}
+    for col, dtype in (schema or {}).items():
+        if col in vers_brut and arrow_type(dtype) is not None:
+            types[vers_brut[col]] = arrow_type(dtype)
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        parse_options=pa_csv.ParseOptions(delimiter=sep, newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=[vers_brut[c] for c in colonnes],
+            column_types=types
+        )
+    )
+    for batch in reader:
+        yield pa.RecordBatch.from_arrays(batch.columns, names=colonnes)
+
+
+def ingest_csv(path, colonnes=None, schema=None, sep=';', renames=None, block_size=TAILLE_BLOC, progress=None):
+    """
+    Charge un export CSV en DataFrame via iter_csv_batches, en mémoire bornée par bloc.
+
+    Le débit (lignes/s) est journalisé à chaque bloc et transmis à `progress(lignes, secondes)`
+    si fourni. `renames` renomme les colonnes normalisées en fin de lecture.
+    """
+    debut = time.perf_counter()
+    batches, lignes = [], 0
+    for batch in iter_csv_batches(path, colonnes, schema, sep, block_size):
+        batches.append(batch)
+        lignes += batch.num_rows
+        ecoule = time.perf_counter() - debut
+        logger.debug("%s : %d lignes (%.0f lignes/s)", path, lignes, lignes / max(ecoule, 1e-9))
+        if progress is not None:
+            progress(lignes, ecoule)
+
+    if batches:
+        table = pa.Table.from_batches(batches).unify_dictionaries()
+        df = table.to_pandas()
+    else:
+        df = pd.DataFrame(columns=colonnes or [])
+
+    ecoule = time.perf_counter() - debut
+    logger.info("%s : %d lignes en %.3f s (%.0f lignes/s)", path, lignes, ecoule, lignes / max(ecoule, 1e-9))
+    return df.rename(columns=renames or {})
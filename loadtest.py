@@ -0,0 +1,252 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+from profiling import logger as perf_logger
+
+# --- TEST DE CHARGE : SESSIONS SIMULTANÉES SUR UNE INSTANCE (AppTest, sans navigateur) ---
+#
+# python loadtest.py --app D.py --sessions 10                  10 sessions, 20 actions chacune
+# python loadtest.py --app CV.py --sessions 1 5 20 --think 300  paliers successifs, pause de 0 à 300 ms entre actions
+#
+# Toutes les sessions tournent dans ce processus et partagent donc caches et historique,
+# comme sur un pod. Chaque interaction rejoue le script complet (AppTest ne rejoue pas les
+# fragments seuls) : les latences mesurées sont un majorant de celles du navigateur.
+
+APPS = {
+    'CV.py': {'page': "Dashboard RATP", 'onglets': 'vue_dashboard'},
+    'D.py': {'page': None, 'onglets': 'vue_d'},
+}
+# Poids des interactions d'un visiteur type
+ACTIONS = {'lignes': 0.35, 'periode': 0.25, 'onglet': 0.3, 'options': 0.1}
+TIMEOUT_S = 120
+
+
+@contextmanager
+def shared_runtime():
+    """
+    AppTest installe un Runtime factice global au début de chaque exécution, le retire à la fin
+    et bascule l'option global.appTest autour : des sessions simultanées se les retireraient
+    mutuellement. Pendant le test, le dernier Runtime installé reste visible de toutes les
+    sessions et l'option reste active. Comme sur le serveur, le script n'est compilé qu'une
+    fois pour toutes les sessions (AppTest le recompile à chaque exécution, et compile()
+    n'est pas sûr entre threads en Python 3.11).
+    """
+    instance, exists = Runtime.__dict__['instance'], Runtime.__dict__['exists']
+    get_bytecode = ScriptCache.get_bytecode
+    cache_partage = ScriptCache()
+    dernier = []
+
+    def courant(cls):
+        if cls._instance is not None:
+            dernier[:] = [cls._instance]
+        return dernier[0] if dernier else None
+
+    def instance_partagee(cls):
+        runtime = courant(cls)
+        if runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    Runtime.instance = classmethod(instance_partagee)
+    Runtime.exists = classmethod(lambda cls: courant(cls) is not None)
+    ScriptCache.get_bytecode = lambda self, script_path: get_bytecode(cache_partage, script_path)
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance, Runtime.exists = instance, exists
+        ScriptCache.get_bytecode = get_bytecode
+
+
+def current_rss():
+    """
+    Mémoire résidente actuelle du processus (octets), None hors Linux.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+
+def peak_rss():
+    """
+    Pic de mémoire résidente du processus depuis son démarrage (octets).
+    """
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic if sys.platform == 'darwin' else pic * 1024
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))]
+
+
+class Session:
+    """
+    Un visiteur : ouvre le tableau de bord puis enchaîne des interactions tirées au hasard
+    (choix des lignes, période, onglet, options d'affichage) depuis sa propre graine.
+    """
+
+    def __init__(self, app, numero, seed, think_ms=0):
+        self.app = app
+        self.config = APPS[Path(app).name]
+        self.rng = random.Random(seed * 1000 + numero)
+        self.think_ms = think_ms
+        self.mesures = []    # (action, durée en s)
+        self.erreurs = []
+        self.at = None
+
+    def _run(self, action):
+        debut = time.perf_counter()
+        self.at.run(timeout=TIMEOUT_S)
+        self.mesures.append((action, time.perf_counter() - debut))
+        self.erreurs.extend(f"{action}: {e.value}" for e in self.at.exception)
+
+    def open(self):
+        self.at = AppTest.from_file(str(Path(self.app).resolve()), default_timeout=TIMEOUT_S)
+        if self.config['page']:
+            # Page choisie par l'état de session lu par main() : pas d'exécution intermédiaire
+            self.at.session_state['page'] = self.config['page']
+        self._run('ouverture')
+        # Bornes de la période et lignes disponibles, lues sur les filtres par défaut
+        self.periode = self.at.date_input[0].value
+        self.lignes = list(self.at.multiselect[0].options)
+
+    def act(self):
+        action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        if action == 'lignes':
+            self.at.multiselect[0].set_value(self.rng.sample(self.lignes, self.rng.randint(1, min(5, len(self.lignes)))))
+        elif action == 'periode':
+            debut, fin = self.periode
+            jours = (fin - debut).days
+            a = self.rng.randint(0, max(jours - 7, 0))
+            b = self.rng.randint(min(a + 7, jours), jours)
+            self.at.date_input[0].set_value((debut + timedelta(days=a), debut + timedelta(days=b)))
+        elif action == 'onglet':
+            self.at.session_state[self.config['onglets']] = self.rng.choice([t.label for t in self.at.tabs])
+        else:
+            case = self.rng.choice([c for c in self.at.checkbox if c.key != 'debug_perf'])
+            case.set_value(not case.value)
+        self._run(action)
+
+    def play(self, actions):
+        self.open()
+        for _ in range(actions):
+            if self.think_ms:
+                time.sleep(self.rng.uniform(0, self.think_ms) / 1000)
+            self.act()
+
+
+def run_level(app, sessions, actions, seed, think_ms):
+    """
+    Lance `sessions` visiteurs en parallèle (un thread chacun) ; latences et mémoire du palier.
+    Les sessions restent ouvertes jusqu'à la mesure de la mémoire, comme des onglets actifs.
+    La mémoire par session est une estimation (écart de RSS / sessions) : la mémoire libérée
+    par un palier précédent n'est pas toujours rendue au système, lancer un palier seul pour la chiffrer.
+    """
+    rss_avant = current_rss()
+    visiteurs = [Session(app, i, seed, think_ms) for i in range(sessions)]
+    echecs = []
+
+    def jouer(visiteur):
+        try:
+            visiteur.play(actions)
+        except Exception as e:  # une session en échec ne doit pas arrêter les autres
+            echecs.append(f"{type(e).__name__}: {e}")
+
+    debut = time.perf_counter()
+    threads = [threading.Thread(target=jouer, args=(v,)) for v in visiteurs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duree = time.perf_counter() - debut
+    rss_apres = current_rss()
+
+    mesures = [m for v in visiteurs for m in v.mesures]
+    interactions = [d for action, d in mesures if action != 'ouverture']
+    par_action = {}
+    for action, d in mesures:
+        par_action.setdefault(action, []).append(d)
+
+    def ms(valeur):
+        return round(valeur * 1000, 1) if valeur is not None else None
+
+    resultat = {
+        'app': Path(app).name,
+        'sessions': sessions,
+        'actions_par_session': actions,
+        'duree_s': round(duree, 2),
+        'reruns': len(interactions),
+        'reruns_par_s': round(len(interactions) / duree, 2) if duree else None,
+        'p50_ms': ms(percentile(interactions, 50)),
+        'p95_ms': ms(percentile(interactions, 95)),
+        'max_ms': ms(max(interactions, default=None)),
+        'par_action_p50_ms': {a: ms(percentile(d, 50)) for a, d in sorted(par_action.items())},
+        'rss_avant_mo': round(rss_avant / 1024 ** 2, 1) if rss_avant else None,
+        'rss_apres_mo': round(rss_apres / 1024 ** 2, 1) if rss_apres else None,
+        'rss_pic_mo': round(peak_rss() / 1024 ** 2, 1),
+        'memoire_par_session_mo': round((rss_apres - rss_avant) / sessions / 1024 ** 2, 2) if rss_avant and rss_apres else None,
+        'erreurs': [e for v in visiteurs for e in v.erreurs][:20],
+        'echecs': echecs[:20],
+    }
+    del visiteurs
+    return resultat
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Test de charge des applications Streamlit RATP (sessions simultanées).")
+    parser.add_argument('--app', default="D.py", choices=sorted(APPS))
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--actions', type=int, default=20, help="interactions par session")
+    parser.add_argument('--think', type=int, default=0, help="pause maximale entre deux interactions (ms)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="loadtest.json")
+    args = parser.parse_args(argv)
+
+    # Une ligne JSON par exécution sur ratp.perf noierait le rapport
+    perf_logger.setLevel(logging.WARNING)
+
+    paliers = []
+    with shared_runtime():
+        # Session d'amorçage : chargements et caches partagés prêts avant la première mesure
+        Session(args.app, -1, args.seed).play(0)
+
+        for sessions in args.sessions:
+            r = run_level(args.app, sessions, args.actions, args.seed, args.think)
+            paliers.append(r)
+            print(f"{r['app']:<6} {sessions:>4} sessions  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                  f"{r['reruns_par_s']:>6} reruns/s  RSS pic {r['rss_pic_mo']:>7} Mo  "
+                  f"~{r['memoire_par_session_mo']} Mo/session  erreurs {len(r['erreurs']) + len(r['echecs'])}")
+
+    rapport = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'plateforme': platform.platform(), 'cpus': os.cpu_count()},
+        'parametres': vars(args),
+        'paliers': paliers,
+    }
+    Path(args.output).write_text(json.dumps(rapport, indent=2, ensure_ascii=False))
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
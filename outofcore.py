@@ -0,0 +1,311 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from export import frame_chunks
+from history_index import slice_history, history_ranges
+from rollup import rollup_kpis, rollup_ranking, rollup_heatmap
+from simulation import SEED_DEFAUT, ORDRE_JOURS, base_regularite
+
+# --- HISTORIQUE HORS MÉMOIRE (tableaux NumPy memory-mappés sur disque) ---
+#
+# Un dossier par historique : taux.npy (float32) et trafic.npy (int32) de forme
+# [lignes x stations, dates], plus meta.json (écrit en dernier, il marque un historique complet).
+# Les dates sont régulières : la colonne d'un instant se calcule, aucune colonne Date n'est stockée.
+
+COLONNES = {'taux': np.float32, 'trafic': np.int32}
+VALEURS_PAR_TRANCHE = 1 << 22   # valeurs lues à la fois (16 Mo en float32), quelle que soit la taille de l'historique
+_NS_JOUR = 86_400 * 10**9
+
+
+def build_memmap_history(path, nb_lignes=14, stations_par_ligne=25, start="2014-01-01", end="2023-12-31 23:00",
+                         freq='h', seed=SEED_DEFAUT):
+    """
+    Génère l'historique simulé par station directement dans des tableaux memory-mappés.
+
+    Mêmes règles que simulation.generate_regularity (taux de base par ligne, bruit normal
+    d'écart-type 1.5, malus de 0.5 point le week-end, trafic autour de 500 000), tirées ligne
+    par ligne avec un flux aléatoire indépendant par ligne : la mémoire utilisée ne dépend
+    que de `stations_par_ligne` x nombre de dates, jamais de la taille totale.
+    `path` doit être un dossier neuf (datasets.memmap_history le remplit à part puis le publie).
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    pas_ns = dates.freq.nanos  # ValueError si la fréquence n'est pas fixe (ex. 'MS')
+    lignes = [str(i) for i in range(1, nb_lignes + 1)]
+    n_dates = len(dates)
+
+    tableaux = {
+        nom: np.lib.format.open_memmap(path / f"{nom}.npy", mode='w+', dtype=dtype,
+                                       shape=(nb_lignes * stations_par_ligne, n_dates))
+        for nom, dtype in COLONNES.items()
+    }
+    factor = np.where(dates.weekday >= 5, 0.5, 0.0)[None, :]
+
+    for i, (ligne, flux) in enumerate(zip(lignes, np.random.SeedSequence(seed).spawn(nb_lignes))):
+        rng = np.random.default_rng(flux)
+        rangees = slice(i * stations_par_ligne, (i + 1) * stations_par_ligne)
+        variation = rng.normal(0, 1.5, size=(stations_par_ligne, n_dates))
+        tableaux['taux'][rangees] = np.clip(base_regularite(ligne) + variation - factor, 0, 100).round(2)
+        tableaux['trafic'][rangees] = rng.normal(500000, 50000, size=(stations_par_ligne, n_dates))
+
+    for tableau in tableaux.values():
+        tableau.flush()
+    del tableaux
+
+    meta = {
+        'lignes': lignes,
+        'stations': [f"{ligne}-{k:02d}" for ligne in lignes for k in range(1, stations_par_ligne + 1)],
+        'stations_par_ligne': stations_par_ligne,
+        'debut_ns': int(dates[0].value),
+        'pas_ns': int(pas_ns),
+        'n_dates': n_dates,
+    }
+    (path / "meta.json").write_text(json.dumps(meta))
+    return path
+
+
+def open_memmap_history(path):
+    """
+    Ouvre un historique en lecture seule : seules les pages lues sont chargées (et évictables).
+    Lève FileNotFoundError si l'historique n'est pas complet.
+    """
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    return {
+        **meta,
+        'path': str(path),
+        **{nom: np.load(path / f"{nom}.npy", mmap_mode='r') for nom in COLONNES},
+    }
+
+
+def memmap_period(hist):
+    """
+    Premier et dernier instant de l'historique (Timestamps).
+    """
+    return (pd.Timestamp(hist['debut_ns']),
+            pd.Timestamp(hist['debut_ns'] + (hist['n_dates'] - 1) * hist['pas_ns']))
+
+
+def _columns(hist, debut, fin):
+    """
+    Colonnes [c0, c1) des instants compris entre le début du jour `debut` et la fin du jour `fin`.
+    """
+    t0, pas = hist['debut_ns'], hist['pas_ns']
+    d = pd.Timestamp(debut).normalize().value
+    f = (pd.Timestamp(fin).normalize() + pd.Timedelta(days=1)).value
+    c0 = min(max(-((t0 - d) // pas), 0), hist['n_dates'])
+    c1 = min(max(-((t0 - f) // pas), 0), hist['n_dates'])
+    return c0, max(c0, c1)
+
+
+def _line_rows(hist, lignes):
+    """
+    (ligne, tranche de rangées) pour chaque ligne demandée présente, dans l'ordre lexicographique.
+    """
+    s = hist['stations_par_ligne']
+    position = {ligne: i for i, ligne in enumerate(hist['lignes'])}
+    return [(ligne, slice(position[ligne] * s, (position[ligne] + 1) * s))
+            for ligne in sorted(set(map(str, lignes))) if ligne in position]
+
+
+def _chunks(hist, rangees, c0, c1):
+    """
+    Blocs (colonnes de début, tableau taux) d'au plus VALEURS_PAR_TRANCHE valeurs.
+    """
+    largeur = max(VALEURS_PAR_TRANCHE // (rangees.stop - rangees.start), 1)
+    for a in range(c0, c1, largeur):
+        b = min(a + largeur, c1)
+        yield a, hist['taux'][rangees, a:b]
+
+
+def _instants(hist, a, n):
+    return hist['debut_ns'] + (a + np.arange(n, dtype=np.int64)) * hist['pas_ns']
+
+
+def memmap_kpis(hist, lignes, debut, fin):
+    """
+    Régularité moyenne et pire valeur (station x instant) sur la sélection (NaN si vide).
+    """
+    c0, c1 = _columns(hist, debut, fin)
+    total, nombre, minimum = 0.0, 0, np.inf
+    for _, rangees in _line_rows(hist, lignes):
+        for _, bloc in _chunks(hist, rangees, c0, c1):
+            total += bloc.sum(dtype=np.float64)
+            nombre += bloc.size
+            minimum = min(minimum, float(bloc.min()))
+    if nombre == 0:
+        return np.nan, np.nan
+    return total / nombre, minimum
+
+
+def memmap_ranking(hist, lignes, debut, fin):
+    """
+    Régularité moyenne par ligne, triée du meilleur au moins bon (comme rollup_ranking).
+    """
+    c0, c1 = _columns(hist, debut, fin)
+    resultats = []
+    if c1 > c0:
+        for ligne, rangees in _line_rows(hist, lignes):
+            total = sum(bloc.sum(dtype=np.float64) for _, bloc in _chunks(hist, rangees, c0, c1))
+            resultats.append((ligne, total / ((rangees.stop - rangees.start) * (c1 - c0))))
+    df_grouped = pd.DataFrame(resultats, columns=['Ligne', 'Taux_Regularite'])
+    return df_grouped.sort_values(by='Taux_Regularite', ascending=False)
+
+
+def memmap_heatmap(hist, lignes, debut, fin):
+    """
+    Moyenne par Ligne x Jour_Semaine sur la période (même forme que rollup_heatmap).
+    """
+    c0, c1 = _columns(hist, debut, fin)
+    lignes_sel = _line_rows(hist, lignes)
+    total = np.zeros((len(lignes_sel), 7))
+    nombre = np.zeros((len(lignes_sel), 7))
+    for i, (_, rangees) in enumerate(lignes_sel):
+        for a, bloc in _chunks(hist, rangees, c0, c1):
+            # 1970-01-01 était un jeudi (3 avec lundi = 0)
+            jours = (_instants(hist, a, bloc.shape[1]) // _NS_JOUR + 3) % 7
+            total[i] += np.bincount(jours, weights=bloc.sum(axis=0, dtype=np.float64), minlength=7)
+            nombre[i] += np.bincount(jours, minlength=7) * bloc.shape[0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyenne = np.where(nombre > 0, total / np.maximum(nombre, 1), np.nan)
+
+    heatmap_data = pd.DataFrame(
+        moyenne,
+        index=pd.Index([ligne for ligne, _ in lignes_sel], name='Ligne'),
+        columns=pd.CategoricalIndex(ORDRE_JOURS, categories=ORDRE_JOURS, ordered=True, name='Jour_Semaine')
+    )
+    return heatmap_data.dropna(how='all').dropna(axis=1, how='all')
+
+
+def memmap_daily(hist, lignes, debut, fin):
+    """
+    Régularité journalière moyenne par ligne (toutes stations et heures du jour confondues),
+    au format de l'historique en mémoire (Date, Ligne, Taux_Regularite) pour la courbe temporelle.
+    """
+    vide = pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Ligne': pd.Series(dtype=str),
+                         'Taux_Regularite': pd.Series(dtype=float)})
+    c0, c1 = _columns(hist, debut, fin)
+    if c1 <= c0:
+        return vide
+
+    jour0 = _instants(hist, c0, 1)[0] // _NS_JOUR
+    n_jours = int(_instants(hist, c1 - 1, 1)[0] // _NS_JOUR - jour0 + 1)
+    morceaux = []
+    for ligne, rangees in _line_rows(hist, lignes):
+        total = np.zeros(n_jours)
+        nombre = np.zeros(n_jours)
+        for a, bloc in _chunks(hist, rangees, c0, c1):
+            jours = _instants(hist, a, bloc.shape[1]) // _NS_JOUR - jour0
+            total += np.bincount(jours, weights=bloc.sum(axis=0, dtype=np.float64), minlength=n_jours)
+            nombre += np.bincount(jours, minlength=n_jours) * bloc.shape[0]
+        presents = nombre > 0
+        morceaux.append(pd.DataFrame({
+            'Date': pd.to_datetime((jour0 + np.flatnonzero(presents)) * _NS_JOUR),
+            'Ligne': ligne,
+            'Taux_Regularite': total[presents] / nombre[presents],
+        }))
+    # Aucune des lignes demandées dans l'historique (ex. RER A/B) : série vide
+    return pd.concat(morceaux, ignore_index=True) if morceaux else vide
+
+
+class MemmapStore:
+    """
+    Historique hors mémoire servi aux sessions, avec la même interface que incremental.HistoryStore
+    (`current()`, `refresh()`). L'état est immuable : aucun fichier journalier n'y est intégré.
+    """
+
+    def __init__(self, path):
+        self._snapshot = {'memmap': open_memmap_history(path), 'version': f"memmap:{Path(path).name}"}
+
+    def current(self):
+        return self._snapshot
+
+    def refresh(self, force=False):
+        return False
+
+    def memory_bytes(self):
+        # Les tableaux projetés restent sur disque (pages du cache système, récupérables) : rien à compter
+        return 0
+
+
+# --- ACCÈS COMMUNS AUX MODES DE STOCKAGE (état de HistoryStore, MemmapStore ou sqlbackend.SqlStore) ---
+
+def history_lines(snapshot):
+    if 'sql' in snapshot:
+        return snapshot['sql'].lines()
+    if 'memmap' in snapshot:
+        return sorted(snapshot['memmap']['lignes'])
+    return sorted(snapshot['df']['Ligne'].unique())
+
+
+def history_period(snapshot):
+    """
+    Premier et dernier jour de l'historique (dates).
+    """
+    if 'sql' in snapshot:
+        return snapshot['sql'].period()
+    if 'memmap' in snapshot:
+        debut, fin = memmap_period(snapshot['memmap'])
+    else:
+        debut, fin = snapshot['df']['Date'].min(), snapshot['df']['Date'].max()
+    return debut.date(), fin.date()
+
+
+def history_kpis(snapshot, lignes, debut, fin):
+    if 'sql' in snapshot:
+        return snapshot['sql'].kpis(lignes, debut, fin)
+    if 'memmap' in snapshot:
+        return memmap_kpis(snapshot['memmap'], lignes, debut, fin)
+    return rollup_kpis(snapshot['cube'], lignes, debut, fin)
+
+
+def history_series(snapshot, lignes, debut, fin):
+    """
+    Série à tracer (Date, Ligne, Taux_Regularite) : tranches de l'historique en mémoire,
+    moyennes journalières de l'historique hors mémoire, requête SQL sinon.
+    """
+    if 'sql' in snapshot:
+        return snapshot['sql'].series(lignes, debut, fin)
+    if 'memmap' in snapshot:
+        return memmap_daily(snapshot['memmap'], lignes, debut, fin)
+    return slice_history(snapshot['df'], snapshot['index'], lignes, debut, fin)
+
+
+def history_chunks(snapshot, lignes, debut, fin, taille):
+    """
+    Série de la sélection en morceaux d'au plus `taille` lignes, pour l'export : sur l'historique
+    en mémoire, des vues (iloc) des tranches (Ligne, Date), sans copie de toute la sélection.
+    Une sélection vide donne un seul morceau vide, qui porte les colonnes et leurs types (voir export.py).
+    """
+    if 'sql' in snapshot or 'memmap' in snapshot:
+        yield from frame_chunks(history_series(snapshot, lignes, debut, fin), taille)
+        return
+    vide = True
+    for debut_tranche, fin_tranche in history_ranges(snapshot['index'], lignes, debut, fin):
+        for a in range(debut_tranche, fin_tranche, taille):
+            yield snapshot['df'].iloc[a:min(a + taille, fin_tranche)]
+            vide = False
+    if vide:
+        yield snapshot['df'].iloc[:0]
+
+
+def history_ranking(snapshot, lignes, debut, fin):
+    if 'sql' in snapshot:
+        return snapshot['sql'].ranking(lignes, debut, fin)
+    if 'memmap' in snapshot:
+        return memmap_ranking(snapshot['memmap'], lignes, debut, fin)
+    return rollup_ranking(snapshot['cube'], lignes, debut, fin)
+
+
+def history_heatmap(snapshot, lignes, debut, fin):
+    if 'sql' in snapshot:
+        return snapshot['sql'].heatmap(lignes, debut, fin)
+    if 'memmap' in snapshot:
+        return memmap_heatmap(snapshot['memmap'], lignes, debut, fin)
+    return rollup_heatmap(snapshot['cube'], lignes, debut, fin)
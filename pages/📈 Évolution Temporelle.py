@@ -2,6 +2,7 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 import numpy as np
+from downsampling import downsample_lines
 
 # --- PRÉPARATION ---
 df_sim_filtered = pd.DataFrame({
@@ -15,9 +16,12 @@ df_sim_filtered = pd.DataFrame({
 with tab1:
     st.subheader("Suivi de la performance jour après jour")
     
+    # Sous-échantillonnage LTTB (sans effet tant que la série tient dans le budget de points)
+    df_line = downsample_lines(df_sim_filtered)
+
     # Création du graphique linéaire
     fig_line = px.line(
-        df_sim_filtered, 
+        df_line, 
         x='Date', 
         y='Taux_Regularite', 
         color='Ligne',
@@ -1,14 +1,31 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from caching import cached
+from spatial import build_map_bins, map_layer, map_zoom, ZOOMS_CARTE, ZOOM_AUTO, ZOOM_POINTS_BRUTS
+
+# Version des données de démo : graine du tirage (mêmes points d'une exécution à l'autre)
+VERSION_DEMO = 0
 
 # --- 1. DONNÉES DE DÉMO (Faux points GPS à Paris) ---
-df_real_filtered = pd.DataFrame({
-    'Ligne': np.random.choice(['1', '4'], 50),
-    'latitude': 48.8566 + np.random.normal(0, 0.02, 50),  # Autour de Paris
-    'longitude': 2.3522 + np.random.normal(0, 0.02, 50),
-    'Station': [f'Station {i}' for i in range(50)]
-})
+@cached('carte_demo', max_entries=1)
+def demo_points(version):
+    rng = np.random.default_rng(version)
+    return pd.DataFrame({
+        'Ligne': rng.choice(['1', '4'], 50),
+        'latitude': 48.8566 + rng.normal(0, 0.02, 50),  # Autour de Paris
+        'longitude': 2.3522 + rng.normal(0, 0.02, 50),
+        'Station': [f'Station {i}' for i in range(50)]
+    })
+
+@cached('carte_demo_cellules', max_entries=len(range(8, ZOOM_POINTS_BRUTS)))
+def demo_map_bins(version, zoom):
+    # Cellules du seul zoom affiché, calculées une fois par (version des données, zoom)
+    if zoom >= ZOOM_POINTS_BRUTS:
+        return {}
+    return build_map_bins(demo_points(version).dropna(subset=['latitude', 'longitude']), zooms=[zoom])
+
+df_real_filtered = demo_points(VERSION_DEMO)
 
 # --- 2. CRÉATION DE L'ONGLET ---
 [tab4] = st.tabs(["🗺️ Carte des Services"])
@@ -25,8 +42,14 @@ with tab4:
         # Nettoyage des coordonnées vides
         map_data = df_real_filtered.dropna(subset=['latitude', 'longitude'])
         
+        # Regroupement des points par cellule selon le zoom de la vue (ajusté aux points par défaut,
+        # points bruts une fois zoomé)
+        choix_zoom = st.select_slider("Niveau de zoom :", ZOOMS_CARTE, value=ZOOM_AUTO)
+        zoom = map_zoom(choix_zoom, map_data)
+        map_bins = demo_map_bins(VERSION_DEMO, zoom)
+        
         # Affichage de la carte avec des points ROUGES
-        st.map(map_data, zoom=11, size=20, color='#FF0000') # <-- Code Hexa pour Rouge pur
+        st.map(map_layer(map_bins, map_data, map_data['Ligne'].unique(), zoom), zoom=zoom, size='taille', color='#FF0000') # <-- Code Hexa pour Rouge pur
         
         with st.expander("Voir le détail des stations"):
             st.dataframe(df_real_filtered)
@@ -0,0 +1,129 @@
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# --- INSTRUMENTATION DES ÉTAPES D'UNE EXÉCUTION STREAMLIT ---
+
+# Une ligne JSON par exécution (rerun) sur ce logger, à agréger côté production
+logger = logging.getLogger("ratp.perf")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# tracemalloc est global au processus et ralentit toutes les allocations :
+# il n'est actif que tant qu'au moins une exécution le demande
+_verrou = threading.Lock()
+_demandes_memoire = 0
+
+
+def _acquire_tracing():
+    global _demandes_memoire
+    with _verrou:
+        if _demandes_memoire == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _demandes_memoire += 1
+
+
+def _release_tracing():
+    global _demandes_memoire
+    with _verrou:
+        _demandes_memoire -= 1
+        if _demandes_memoire == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class RerunProfiler:
+    """
+    Durée (et, si `memoire`, pic d'allocation tracemalloc) de chaque étape d'une exécution.
+
+    Les étapes ne doivent pas être imbriquées : le pic est remis à zéro à l'entrée de chacune.
+    Le pic est mesuré pour tout le processus, donc inclut les sessions exécutées en parallèle.
+
+    À utiliser comme gestionnaire de contexte (`with RerunProfiler(...) as profiler:`) : la mesure
+    mémoire est arrêtée en sortie même si l'exécution lève une exception ou est interrompue
+    (st.rerun, st.stop, nouvelle exécution), sans quoi tracemalloc resterait actif pour tout le processus.
+    """
+
+    def __init__(self, app, session=None, memoire=False):
+        self.app = app
+        self.session = session
+        self.memoire = memoire
+        self.etapes = []
+        self._debut = time.perf_counter()
+        if memoire:
+            _acquire_tracing()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Libère la mesure mémoire de cette exécution (sans effet si c'est déjà fait).
+        """
+        if self.memoire:
+            _release_tracing()
+            self.memoire = False
+
+    @contextmanager
+    def stage(self, nom):
+        courant = 0
+        if self.memoire and tracemalloc.is_tracing():
+            courant = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            etape = {'etape': nom, 'duree_ms': round((time.perf_counter() - debut) * 1000, 2)}
+            if self.memoire:
+                pic = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else courant
+                etape['pic_kio'] = round(max(pic - courant, 0) / 1024, 1)
+            self.etapes.append(etape)
+
+    def finish(self):
+        """
+        Clôt l'exécution : écrit la ligne JSON sur le logger `ratp.perf` et renvoie l'enregistrement.
+        """
+        self.close()
+        enregistrement = {
+            'evenement': 'rerun',
+            'app': self.app,
+            'session': self.session,
+            'horodatage': round(time.time(), 3),
+            'total_ms': round((time.perf_counter() - self._debut) * 1000, 2),
+            'etapes': self.etapes,
+        }
+        logger.info(json.dumps(enregistrement, ensure_ascii=False))
+        return enregistrement
+
+
+def render_perf_panel(container, enregistrement):
+    """
+    Tableau des étapes de la dernière exécution dans `container` (ex. st.sidebar).
+    """
+    panneau = container.expander(f"⏱️ Dernière exécution : {enregistrement['total_ms']:.0f} ms", expanded=True)
+    if enregistrement['etapes']:
+        panneau.dataframe(pd.DataFrame(enregistrement['etapes']).set_index('etape'), width='stretch')
+
+
+def render_cache_panel(container, metriques):
+    """
+    Occupation et compteurs des caches bornés (CacheRegistry.metrics()) dans `container`.
+    """
+    total_mo, budget_mo = metriques['total_octets'] / 1024 ** 2, metriques['budget_octets'] / 1024 ** 2
+    panneau = container.expander(f"🗄️ Caches : {total_mo:.1f} / {budget_mo:.0f} Mo", expanded=False)
+    if metriques['caches']:
+        panneau.dataframe(pd.DataFrame(metriques['caches']).set_index('cache'), width='stretch')
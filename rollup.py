@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from simulation import ORDRE_JOURS
+
+# --- CUBE D'AGRÉGATS PRÉ-CALCULÉS (Ligne x Jour / Jour de semaine / Mois) ---
+
+
+def build_rollup(df):
+    """
+    Calcule une seule fois les agrégats partiels (somme, nombre, minimum) du taux de régularité.
+
+    - par ligne x jour : grilles [lignes, jours] + sommes cumulées pour répondre
+      à n'importe quelle période en O(1) ;
+    - par ligne x jour de semaine : pour chaque jour de semaine, sommes cumulées sur ses seuls
+      jours de la grille (un jour sur sept) pour la heatmap, soit la taille de la grille journalière ;
+    - par ligne x mois : minimums mensuels pour ne parcourir que les jours de bord de période.
+
+    Les moyennes recombinées (somme / nombre) et les minimums sont exacts.
+    """
+    return _finalize(*_day_grids(df))
+
+
+def merge_rollup(cube, df_nouveau):
+    """
+    Ajoute au cube les lignes de `df_nouveau` (nouveaux jours ou nouvelles lignes) sans relire
+    l'historique : seules les grilles journalières sont fusionnées, puis les sommes cumulées
+    et partiels mensuels sont recalculés à partir des grilles (coût en lignes x jours, pas en lignes brutes).
+    """
+    lignes_n, jours_n, sum_n, count_n, min_n = _day_grids(df_nouveau)
+    lignes = np.union1d(cube['lignes'], lignes_n)
+    jours = np.union1d(cube['jours'], jours_n)
+
+    jour_sum = np.zeros((len(lignes), len(jours)))
+    jour_count = np.zeros((len(lignes), len(jours)), dtype=np.int64)
+    jour_min = np.full((len(lignes), len(jours)), np.inf)
+    for l, j, s, c, m in [(cube['lignes'], cube['jours'], cube['jour_sum'], cube['jour_count'], cube['jour_min']),
+                          (lignes_n, jours_n, sum_n, count_n, min_n)]:
+        il = np.searchsorted(lignes, l)[:, None]
+        ij = np.searchsorted(jours, j)[None, :]
+        jour_sum[il, ij] += s
+        jour_count[il, ij] += c
+        jour_min[il, ij] = np.minimum(jour_min[il, ij], m)
+
+    return _finalize(lignes, jours, jour_sum, jour_count, jour_min)
+
+
+def _day_grids(df):
+    """
+    Grilles [lignes, jours] de somme, nombre et minimum du taux, à partir des lignes brutes.
+    """
+    lignes = np.array(sorted(df['Ligne'].astype(str).unique()))
+    codes_ligne = pd.Categorical(df['Ligne'].astype(str), categories=lignes).codes.astype(np.int64)
+    jours, codes_jour = np.unique(df['Date'].to_numpy().astype('datetime64[D]'), return_inverse=True)
+    taux = df['Taux_Regularite'].to_numpy(dtype=np.float64)
+
+    n_lignes, n_jours = len(lignes), len(jours)
+    cellule = codes_ligne * n_jours + codes_jour
+
+    jour_sum = np.bincount(cellule, weights=taux, minlength=n_lignes * n_jours).reshape(n_lignes, n_jours)
+    jour_count = np.bincount(cellule, minlength=n_lignes * n_jours).reshape(n_lignes, n_jours)
+    jour_min = np.full(n_lignes * n_jours, np.inf)
+    np.minimum.at(jour_min, cellule, taux)
+    return lignes, jours, jour_sum, jour_count, jour_min.reshape(n_lignes, n_jours)
+
+
+def _finalize(lignes, jours, jour_sum, jour_count, jour_min):
+    """
+    Assemble le cube à partir des grilles journalières (sommes cumulées, jours de semaine, mois).
+    """
+    n_jours = len(jours)
+
+    # Positions dans la grille des jours de chaque jour de semaine (0 = lundi)
+    jour_semaine = (jours.astype(np.int64) + 3) % 7
+    semaine_pos = [np.flatnonzero(jour_semaine == j) for j in range(7)]
+
+    # Partiels mensuels : indices de début de chaque mois dans la grille
+    mois = jours.astype('datetime64[M]')
+    mois_debut = np.flatnonzero(np.r_[True, mois[1:] != mois[:-1]])
+    mois_fin = np.r_[mois_debut[1:], n_jours]
+
+    return {
+        'lignes': lignes,
+        'jours': jours,
+        'jour_sum': jour_sum,
+        'jour_count': jour_count,
+        'jour_min': jour_min,
+        'cum_sum': _cumsum0(jour_sum),
+        'cum_count': _cumsum0(jour_count),
+        'semaine_pos': semaine_pos,
+        'cum_semaine_sum': [_cumsum0(jour_sum[:, pos]) for pos in semaine_pos],
+        'cum_semaine_count': [_cumsum0(jour_count[:, pos]) for pos in semaine_pos],
+        'mois': mois[mois_debut],
+        'mois_debut': mois_debut,
+        'mois_fin': mois_fin,
+        'mois_sum': np.add.reduceat(jour_sum, mois_debut, axis=1),
+        'mois_count': np.add.reduceat(jour_count, mois_debut, axis=1),
+        'mois_min': np.minimum.reduceat(jour_min, mois_debut, axis=1),
+    }
+
+
+def _cumsum0(valeurs):
+    """
+    Somme cumulée sur le dernier axe, précédée d'un zéro (cum[..., i1] - cum[..., i0] = somme de [i0, i1)).
+    """
+    cum = np.zeros(valeurs.shape[:-1] + (valeurs.shape[-1] + 1,), dtype=valeurs.dtype)
+    np.cumsum(valeurs, axis=-1, out=cum[..., 1:])
+    return cum
+
+
+def _selection(cube, lignes, debut, fin):
+    """
+    Indices des lignes demandées et bornes [i0, i1) de la période dans la grille des jours.
+    """
+    idx = np.flatnonzero(np.isin(cube['lignes'], [str(l) for l in lignes]))
+    i0 = np.searchsorted(cube['jours'], np.datetime64(debut, 'D'), side='left')
+    i1 = np.searchsorted(cube['jours'], np.datetime64(fin, 'D'), side='right')
+    return idx, i0, max(i0, i1)
+
+
+def _range_min(cube, idx, i0, i1):
+    """
+    Minimum par ligne sur [i0, i1) : mois entièrement couverts via les partiels mensuels,
+    jours de bord via la grille journalière.
+    """
+    pleins = np.flatnonzero((cube['mois_debut'] >= i0) & (cube['mois_fin'] <= i1))
+    if len(pleins) == 0:
+        morceaux = [cube['jour_min'][idx, i0:i1]]
+    else:
+        a, b = cube['mois_debut'][pleins[0]], cube['mois_fin'][pleins[-1]]
+        morceaux = [cube['jour_min'][idx, i0:a], cube['mois_min'][idx][:, pleins], cube['jour_min'][idx, b:i1]]
+    res = np.full(len(idx), np.inf)
+    for morceau in morceaux:
+        if morceau.shape[1]:
+            res = np.minimum(res, morceau.min(axis=1))
+    return res
+
+
+def rollup_kpis(cube, lignes, debut, fin):
+    """
+    Régularité moyenne et pire journée pour les lignes et la période demandées (NaN si vide).
+    """
+    idx, i0, i1 = _selection(cube, lignes, debut, fin)
+    total = (cube['cum_sum'][idx, i1] - cube['cum_sum'][idx, i0]).sum()
+    nombre = (cube['cum_count'][idx, i1] - cube['cum_count'][idx, i0]).sum()
+    if nombre == 0:
+        return np.nan, np.nan
+    return total / nombre, _range_min(cube, idx, i0, i1).min()
+
+
+def rollup_ranking(cube, lignes, debut, fin):
+    """
+    Équivalent de groupby('Ligne')['Taux_Regularite'].mean() trié du meilleur au moins bon.
+    """
+    idx, i0, i1 = _selection(cube, lignes, debut, fin)
+    total = cube['cum_sum'][idx, i1] - cube['cum_sum'][idx, i0]
+    nombre = cube['cum_count'][idx, i1] - cube['cum_count'][idx, i0]
+    presentes = nombre > 0
+
+    df_grouped = pd.DataFrame({
+        'Ligne': cube['lignes'][idx][presentes],
+        'Taux_Regularite': total[presentes] / nombre[presentes]
+    })
+    return df_grouped.sort_values(by='Taux_Regularite', ascending=False)
+
+
+def rollup_heatmap(cube, lignes, debut, fin):
+    """
+    Équivalent du pivot_table (index Ligne, colonnes Jour_Semaine, moyenne) sur la période.
+    """
+    idx, i0, i1 = _selection(cube, lignes, debut, fin)
+    total = np.empty((len(idx), 7))
+    nombre = np.empty((len(idx), 7), dtype=np.int64)
+    for j, pos in enumerate(cube['semaine_pos']):
+        # Bornes de la période parmi les seuls jours de ce jour de semaine
+        k0, k1 = np.searchsorted(pos, [i0, i1])
+        total[:, j] = cube['cum_semaine_sum'][j][idx, k1] - cube['cum_semaine_sum'][j][idx, k0]
+        nombre[:, j] = cube['cum_semaine_count'][j][idx, k1] - cube['cum_semaine_count'][j][idx, k0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyenne = np.where(nombre > 0, total / np.maximum(nombre, 1), np.nan)
+
+    heatmap_data = pd.DataFrame(
+        moyenne,
+        index=pd.Index(cube['lignes'][idx], name='Ligne'),
+        columns=pd.CategoricalIndex(ORDRE_JOURS, categories=ORDRE_JOURS, ordered=True, name='Jour_Semaine')
+    )
+    # Comme pivot_table : on retire les lignes et jours sans aucune donnée
+    return heatmap_data.dropna(how='all').dropna(axis=1, how='all')
@@ -0,0 +1,75 @@
+import logging
+
+import pandas as pd
+
+from simulation import ORDRE_JOURS
+
+logger = logging.getLogger(__name__)
+
+# --- SCHÉMAS DE TYPES COMPACTS ---
+
+ORDRE_MOIS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+              'August', 'September', 'October', 'November', 'December']
+
+# Historique simulé : catégories pour les colonnes à faible cardinalité, float32/int32 pour les mesures
+SIM_SCHEMA = {
+    'Ligne': 'category',
+    'Taux_Regularite': 'float32',   # 2 décimales, largement dans la précision float32
+    'Trafic': 'int32',              # ~500 000 voyageurs, loin de la limite int32
+    'Mois': pd.CategoricalDtype(ORDRE_MOIS, ordered=True),
+    'Jour_Semaine': pd.CategoricalDtype(ORDRE_JOURS, ordered=True),
+}
+
+# Fontaines : texte libre en chaînes Arrow, colonnes répétitives en catégories.
+# latitude / longitude restent en float64 (float32 perdrait le mètre près).
+FONTAINES_SCHEMA = {
+    'Ligne': 'category',
+    'Commune': 'category',
+    'En zone contrôlée ou non': 'category',
+    'Station ou Gare': 'string[pyarrow]',
+    'Adresse': 'string[pyarrow]',
+    'Point_geographique': 'string[pyarrow]',
+    'Code postal': 'int32',
+}
+
+
+def apply_schema(df, schema):
+    """
+    Convertit les colonnes présentes de `df` vers les types du schéma (les absentes sont ignorées).
+    """
+    return df.astype({col: dtype for col, dtype in schema.items() if col in df.columns})
+
+
+def memory_report(avant, apres):
+    """
+    Mémoire occupée par colonne (memory_usage(deep=True), en octets) avant et après application du schéma.
+    """
+    report = pd.DataFrame({
+        'avant': avant.memory_usage(deep=True, index=False),
+        'apres': apres.memory_usage(deep=True, index=False)
+    })
+    report.loc['TOTAL'] = report.sum()
+    report['gain_%'] = (100 * (1 - report['apres'] / report['avant'])).round(1)
+    return report
+
+
+def compact(df, schema, nom):
+    """
+    Applique le schéma et journalise le gain mémoire total du DataFrame `nom`.
+    """
+    df_compact = apply_schema(df, schema)
+    total = memory_report(df, df_compact).loc['TOTAL']
+    logger.info("%s : %.2f Mo -> %.2f Mo (-%.1f %%)", nom, total['avant'] / 1e6, total['apres'] / 1e6, total['gain_%'])
+    return df_compact
+
+
+if __name__ == "__main__":
+    # Rapport mémoire détaillé : python schema.py
+    from simulation import generate_regularity
+
+    df_sim = generate_regularity()
+    print("Historique simulé\n", memory_report(df_sim, apply_schema(df_sim, SIM_SCHEMA)), "\n")
+
+    df_real = pd.read_csv("fontaines-a-eau-dans-le-reseau-ratp.csv", sep=';')
+    df_real['Ligne'] = df_real['Ligne'].astype(str)
+    print("Fontaines\n", memory_report(df_real, apply_schema(df_real, FONTAINES_SCHEMA)))
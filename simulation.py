@@ -0,0 +1,169 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# --- PARAMÈTRES DE LA SIMULATION ---
+
+SEED_DEFAUT = 2023
+ORDRE_JOURS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# Démarrage des processus du pool : jamais par fork (voir generate_regularity_parallel)
+METHODE_DEMARRAGE = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+# Mode parallèle : taille fixe (en dates) des blocs temporels, pour que le découpage,
+# donc l'attribution des flux aléatoires, ne dépende jamais du nombre de processus
+BLOC_DATES = 4096
+
+
+def base_regularite(ligne):
+    """
+    Taux de base d'une ligne : lignes automatiques (1, 14) meilleures, ligne 13 la plus fragile.
+    """
+    return 98.0 if ligne in ['1', '14'] else (92.0 if ligne == '13' else 95.0)
+
+
+def generate_regularity(nb_lignes=14, start="2023-01-01", end="2023-12-31", freq='D', seed=SEED_DEFAUT):
+    """
+    Génère l'historique simulé de régularité en un seul passage NumPy.
+
+    Toute la grille (lignes x dates) est tirée d'un coup au lieu d'une boucle
+    ligne par ligne. Les règles restent celles d'origine : taux de base par ligne,
+    bruit normal (écart-type 1.5), malus de 0.5 point le week-end, bornage 0-100
+    et trafic normal autour de 500 000 voyageurs.
+
+    `nb_lignes`, `start`, `end` et `freq` règlent la taille de l'historique
+    (ex. freq='h' pour une granularité horaire), `seed` le rend reproductible.
+    """
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    lignes = [str(i) for i in range(1, nb_lignes + 1)]
+    rng = np.random.default_rng(seed)
+
+    n_lignes, n_dates = len(lignes), len(dates)
+    base = np.array([base_regularite(ligne) for ligne in lignes])[:, None]
+    # Week-end souvent plus calme ou travaux
+    factor = np.where(dates.weekday >= 5, 0.5, 0.0)[None, :]
+
+    variation = rng.normal(0, 1.5, size=(n_lignes, n_dates))
+    taux = np.clip(base + variation - factor, 0, 100).round(2)
+    trafic = rng.normal(500000, 50000, size=(n_lignes, n_dates)).astype(np.int64)
+
+    # Aplatissement ligne par ligne (même ordre que l'ancienne boucle)
+    df = pd.DataFrame({
+        'Date': np.tile(dates, n_lignes),
+        'Ligne': np.repeat(lignes, n_dates),
+        'Taux_Regularite': taux.ravel(),
+        'Trafic': trafic.ravel()
+    })
+
+    return add_calendar_columns(df)
+
+
+def _regularity_block(tache):
+    """
+    Tire un bloc (une ligne x une tranche de dates) depuis son propre flux aléatoire.
+    Fonction de module : elle est exécutée dans les processus du pool.
+    """
+    ligne, weekend, flux = tache
+    rng = np.random.default_rng(flux)
+    variation = rng.normal(0, 1.5, size=len(weekend))
+    taux = np.clip(base_regularite(ligne) + variation - np.where(weekend, 0.5, 0.0), 0, 100).round(2)
+    trafic = rng.normal(500000, 50000, size=len(weekend)).astype(np.int64)
+    return taux, trafic
+
+
+def _draw_blocks(nb_lignes, start, end, freq, seed, workers):
+    """
+    Tirages (taux, trafic) aplatis ligne par ligne puis date par date, répartis sur `workers` processus.
+    """
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    lignes = [str(i) for i in range(1, nb_lignes + 1)]
+    weekend = np.asarray(dates.weekday >= 5)
+    bornes = range(0, len(dates), BLOC_DATES)
+
+    # Ordre ligne puis bloc : la concaténation des résultats donne directement l'ordre aplati
+    taches = [
+        (ligne, weekend[b0:b0 + BLOC_DATES], flux)
+        for ligne, flux_ligne in zip(lignes, np.random.SeedSequence(seed).spawn(nb_lignes))
+        for b0, flux in zip(bornes, flux_ligne.spawn(len(bornes)))
+    ]
+    if workers == 1 or len(taches) <= 1:
+        blocs = list(map(_regularity_block, taches))
+    else:
+        contexte = multiprocessing.get_context(METHODE_DEMARRAGE)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexte) as pool:
+            blocs = list(pool.map(_regularity_block, taches, chunksize=max(1, len(taches) // (4 * workers))))
+
+    if not blocs:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    return np.concatenate([taux for taux, _ in blocs]), np.concatenate([trafic for _, trafic in blocs])
+
+
+def _draw_blocks_in_helper(params, workers):
+    """
+    _draw_blocks exécuté dans un interpréteur dédié (python -m simulation), qui démarre le pool.
+
+    Sous Streamlit, __main__ est le script de la page : les processus forkserver/spawn démarrés
+    depuis le serveur le réimporteraient, donc réexécuteraient l'application. Dans l'interpréteur
+    dédié, __main__ est ce module, sans effet à l'import ; le serveur (multi-thread) n'est jamais
+    forké. Les tirages reviennent par un fichier .npz temporaire.
+    """
+    with tempfile.TemporaryDirectory(prefix="ratp-simulation-") as dossier:
+        sortie = Path(dossier) / "tirages.npz"
+        subprocess.run([sys.executable, "-m", "simulation", json.dumps({**params, 'workers': workers}), str(sortie)],
+                       cwd=Path(__file__).parent, check=True)
+        with np.load(sortie) as tirages:
+            return tirages['taux'], tirages['trafic']
+
+
+def generate_regularity_parallel(nb_lignes=14, start="2023-01-01", end="2023-12-31", freq='D', seed=SEED_DEFAUT,
+                                 workers=None):
+    """
+    Variante de generate_regularity répartie sur un pool de `workers` processus (tous les cœurs si None).
+
+    Chaque ligne reçoit un flux issu de SeedSequence(seed).spawn, lui-même découpé en un
+    sous-flux par bloc de BLOC_DATES dates. Le résultat ne dépend donc que des paramètres,
+    jamais du nombre de processus (workers=1 calcule les mêmes blocs sans pool), mais il
+    diffère des tirages de generate_regularity, qui utilise un flux unique.
+
+    Le pool est démarré par forkserver (spawn à défaut), jamais par fork : un fork du serveur
+    Streamlit, multi-thread, pendant qu'un autre thread tient un verrou (logging, boucle
+    d'événements, pools pyarrow) peut bloquer l'enfant. Voir aussi _draw_blocks_in_helper.
+    """
+    params = {'nb_lignes': nb_lignes, 'start': start, 'end': end, 'freq': freq, 'seed': seed}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        taux, trafic = _draw_blocks(**params, workers=1)
+    else:
+        taux, trafic = _draw_blocks_in_helper(params, workers)
+
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    df = pd.DataFrame({
+        'Date': np.tile(dates, nb_lignes),
+        'Ligne': np.repeat([str(i) for i in range(1, nb_lignes + 1)], len(dates)),
+        'Taux_Regularite': taux,
+        'Trafic': trafic
+    })
+
+    return add_calendar_columns(df)
+
+
+def add_calendar_columns(df):
+    """
+    Ajoute les colonnes temporelles 'Mois' et 'Jour_Semaine' (ordonnée du lundi au dimanche).
+    """
+    df['Mois'] = df['Date'].dt.month_name()
+    df['Jour_Semaine'] = pd.Categorical(df['Date'].dt.day_name(), categories=ORDRE_JOURS, ordered=True)
+    return df
+
+
+if __name__ == "__main__":
+    # Interpréteur dédié de _draw_blocks_in_helper : paramètres JSON et fichier .npz de sortie
+    params = json.loads(sys.argv[1])
+    taux, trafic = _draw_blocks(**params)
+    np.savez(sys.argv[2], taux=taux, trafic=trafic)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from fsutil import write_atomic
+
+# --- CACHE DISQUE COLONNAIRE (Feather / Arrow IPC) ---
+
+# Dossier des instantanés, modifiable par variable d'environnement (ex. volume persistant du pod)
+CACHE_DIR = Path(os.environ.get("RATP_CACHE_DIR", Path(__file__).parent / ".cache" / "snapshots"))
+
+# À incrémenter quand la forme des DataFrames stockés change (tri, colonnes, types...)
+SNAPSHOT_VERSION = 3
+
+# Instantanés conservés par `nom` (les plus récemment utilisés) : plusieurs jeux de paramètres
+# (CV.py et D.py, RATP_SIM_WORKERS actif ou non...) coexistent sans s'invalider mutuellement
+SNAPSHOTS_CONSERVES = int(os.environ.get("RATP_SNAPSHOTS_CONSERVES", "4"))
+# Lignes par groupe des instantanés Parquet : sur un historique trié par (Ligne, Date), les statistiques
+# de chaque groupe permettent au lecteur (DuckDB) de sauter ceux hors de la période demandée
+LIGNES_PAR_GROUPE_PARQUET = 128 * 1024
+
+
+def source_signature(path):
+    """
+    Signature d'un fichier source : chemin absolu, taille et date de modification (ns).
+    Lève FileNotFoundError si le fichier n'existe pas.
+    """
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def snapshot_key(nom, params, source=None):
+    """
+    Clé d'un instantané : hash des paramètres du générateur et de la signature du fichier source.
+    Changer un paramètre ou modifier le CSV donne une nouvelle clé, donc une invalidation automatique.
+    """
+    payload = {
+        'version': SNAPSHOT_VERSION,
+        'params': params,
+        'source': source_signature(source) if source else None
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{nom}-{digest[:16]}"
+
+
+def prune_snapshots(nom, garder=SNAPSHOTS_CONSERVES, suffixe=".feather"):
+    """
+    Supprime les instantanés `suffixe` de `nom` au-delà des `garder` plus récemment utilisés (date de modification).
+    """
+    def utilisation(path):
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:  # supprimé entre-temps par un autre processus
+            return 0
+
+    for old in sorted(CACHE_DIR.glob(f"{nom}-*{suffixe}"), key=utilisation, reverse=True)[garder:]:
+        old.unlink(missing_ok=True)
+
+
+def load_or_build(nom, params, build, source=None):
+    """
+    Renvoie le DataFrame `nom` depuis son instantané disque, ou le construit avec `build()`.
+
+    L'instantané est un fichier Feather non compressé, relu en memory-map au démarrage
+    suivant. Lors de l'écriture, seuls les SNAPSHOTS_CONSERVES instantanés du même `nom`
+    les plus récemment utilisés sont gardés.
+    En cas d'échec d'écriture (disque en lecture seule...), le DataFrame est simplement renvoyé.
+    """
+    key = snapshot_key(nom, params, source)
+    path = CACHE_DIR / f"{key}.feather"
+
+    if path.exists():
+        try:
+            df = feather.read_table(path, memory_map=True).to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            # Instantané corrompu ou tronqué : on le reconstruit
+            pass
+        else:
+            try:
+                # La date de modification sert de date de dernière utilisation (voir prune_snapshots)
+                os.utime(path)
+            except OSError:
+                pass
+            return df
+
+    df = build()
+    if df is None:
+        return df
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, lambda tmp: feather.write_feather(df, tmp, compression='uncompressed'))
+        prune_snapshots(nom)
+    except OSError:
+        pass
+
+    return df
+
+
+def parquet_snapshot(nom, params, build, source=None):
+    """
+    Chemin de l'instantané Parquet de `nom`, écrit à partir de `build()` s'il n'existe pas encore
+    (None si `build()` renvoie None) : pour les lecteurs qui interrogent le fichier sans le charger
+    (DuckDB). Mêmes clés et même rétention que load_or_build.
+    Lève OSError si le fichier ne peut pas être écrit.
+    """
+    path = CACHE_DIR / f"{snapshot_key(nom, params, source)}.parquet"
+    if path.exists():
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    df = build()
+    if df is None:
+        return None
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, lambda tmp: pq.write_table(table, tmp, row_group_size=LIGNES_PAR_GROUPE_PARQUET))
+    prune_snapshots(nom, suffixe=".parquet")
+    return path
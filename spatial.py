@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+# --- INDEX SPATIAL EN GRILLE (requêtes par zone et par proximité) ---
+
+RAYON_TERRE_M = 6371008.8
+TAILLE_CELLULE_M = 250.0
+
+
+def parse_point_geographique(series):
+    """
+    Découpe la colonne 'Point_geographique' ("48.86, 2.39") en deux tableaux latitude / longitude.
+    """
+    parts = series.astype(str).str.split(',', n=1, expand=True)
+    lat = parts[0].str.strip().astype(float).to_numpy()
+    lon = parts[1].str.strip().astype(float).to_numpy()
+    return lat, lon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Distance en mètres sur la sphère terrestre (tableaux NumPy acceptés).
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAYON_TERRE_M * np.arcsin(np.sqrt(a))
+
+
+def build_spatial_index(df, taille_cellule_m=TAILLE_CELLULE_M):
+    """
+    Range les points de `df` (colonnes latitude / longitude, sinon Point_geographique)
+    dans une grille de cellules carrées d'environ `taille_cellule_m` mètres.
+
+    Les positions renvoyées par les requêtes sont des positions iloc dans `df` ;
+    les points sans coordonnées ne sont pas indexés.
+    """
+    if 'latitude' in df.columns and 'longitude' in df.columns:
+        lat = df['latitude'].to_numpy(dtype=np.float64)
+        lon = df['longitude'].to_numpy(dtype=np.float64)
+    else:
+        lat, lon = parse_point_geographique(df['Point_geographique'])
+
+    valides = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    lat0 = np.nanmean(lat) if len(valides) else 0.0
+
+    # Pas de la grille en degrés (projection équirectangulaire locale)
+    pas_lat = np.degrees(taille_cellule_m / RAYON_TERRE_M)
+    pas_lon = pas_lat / max(np.cos(np.radians(lat0)), 1e-6)
+
+    cx = np.floor(lon[valides] / pas_lon).astype(np.int64)
+    cy = np.floor(lat[valides] / pas_lat).astype(np.int64)
+    ordre = np.lexsort((cy, cx))
+    cx, cy, positions = cx[ordre], cy[ordre], valides[ordre]
+
+    change = np.flatnonzero(np.r_[True, (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])])
+    fins = np.r_[change[1:], len(positions)]
+
+    return {
+        'lat': lat,
+        'lon': lon,
+        'taille_cellule_m': taille_cellule_m,
+        'pas_lat': pas_lat,
+        'pas_lon': pas_lon,
+        'positions': positions,
+        'cellules': {(cx[d], cy[d]): (d, f) for d, f in zip(change, fins)},
+    }
+
+
+def _candidates(index, lat_min, lat_max, lon_min, lon_max):
+    """
+    Positions des points situés dans les cellules qui recouvrent la zone.
+    """
+    x0, x1 = int(np.floor(lon_min / index['pas_lon'])), int(np.floor(lon_max / index['pas_lon']))
+    y0, y1 = int(np.floor(lat_min / index['pas_lat'])), int(np.floor(lat_max / index['pas_lat']))
+    cellules = index['cellules']
+
+    if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cellules):
+        # Zone plus grande que la grille occupée : on parcourt les cellules existantes
+        morceaux = [index['positions'][d:f] for (x, y), (d, f) in cellules.items() if x0 <= x <= x1 and y0 <= y <= y1]
+    else:
+        morceaux = [index['positions'][slice(*cellules[(x, y)])]
+                    for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in cellules]
+    return np.concatenate(morceaux) if morceaux else np.array([], dtype=np.int64)
+
+
+def query_bbox(index, lat_min, lat_max, lon_min, lon_max):
+    """
+    Positions (triées) des points à l'intérieur du rectangle lat/lon donné (vue de la carte).
+    """
+    cand = _candidates(index, lat_min, lat_max, lon_min, lon_max)
+    lat, lon = index['lat'][cand], index['lon'][cand]
+    dedans = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    return np.sort(cand[dedans])
+
+
+def query_radius(index, lat, lon, rayon_m):
+    """
+    Points à moins de `rayon_m` mètres de (lat, lon) : (positions, distances) triés par distance.
+    """
+    d_lat = np.degrees(rayon_m / RAYON_TERRE_M)
+    d_lon = d_lat / max(np.cos(np.radians(lat)), 1e-6)
+    cand = _candidates(index, lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon)
+    distances = haversine_m(lat, lon, index['lat'][cand], index['lon'][cand])
+    proches = distances <= rayon_m
+    ordre = np.argsort(distances[proches], kind='stable')
+    return cand[proches][ordre], distances[proches][ordre]
+
+
+def nearest(index, lat, lon, k=1, exclure=()):
+    """
+    Les `k` points les plus proches de (lat, lon), hors positions `exclure` :
+    recherche par anneaux de cellules de taille croissante.
+    """
+    exclure = np.asarray(list(exclure), dtype=np.int64)
+    n_indexes = len(index['positions']) - np.isin(exclure, index['positions']).sum()
+    k = min(k, n_indexes)
+    if k <= 0:
+        return np.array([], dtype=np.int64), np.array([])
+
+    rayon = index['taille_cellule_m']
+    while True:
+        positions, distances = query_radius(index, lat, lon, rayon)
+        garder = ~np.isin(positions, exclure)
+        if garder.sum() >= k:
+            return positions[garder][:k], distances[garder][:k]
+        rayon *= 2
+
+
+# --- AGRÉGATION DES POINTS PAR NIVEAU DE ZOOM (cartes denses) ---
+
+ZOOM_POINTS_BRUTS = 15       # à partir de ce zoom, les points sont envoyés tels quels
+ZOOMS_STANDARD = list(range(8, ZOOM_POINTS_BRUTS))
+PIXELS_PAR_CELLULE = 40
+# Choix du zoom des cartes : ajusté aux points (comme st.map sans zoom) ou imposé
+ZOOM_AUTO = "Auto"
+ZOOMS_CARTE = [ZOOM_AUTO, *range(8, 17)]
+
+
+def cell_size_for_zoom(zoom, lat0, pixels=PIXELS_PAR_CELLULE):
+    """
+    Côté (mètres) d'une cellule couvrant environ `pixels` pixels à ce zoom (tuiles web Mercator 256 px).
+    """
+    metres_par_pixel = 156543.03392 * np.cos(np.radians(lat0)) / 2 ** zoom
+    return pixels * metres_par_pixel
+
+
+def fitted_zoom(df):
+    """
+    Zoom qui cadre tous les points de `df` (même règle que st.map sans zoom : plus grand niveau
+    dont la largeur, 360 / 2**zoom degrés, contient leur étendue) ; ZOOM_POINTS_BRUTS pour un seul point.
+    """
+    etendue = max(df['latitude'].max() - df['latitude'].min(), df['longitude'].max() - df['longitude'].min())
+    if not etendue > 0:
+        return ZOOM_POINTS_BRUTS
+    return int(np.clip(np.floor(np.log2(360 / etendue)), 0, max(ZOOMS_CARTE[1:])))
+
+
+def map_zoom(choix, df):
+    """
+    Zoom de la carte pour le choix `choix` de ZOOMS_CARTE. Il est passé à la fois à st.map et à
+    map_layer : le niveau d'agrégation correspond toujours à la vue affichée.
+    """
+    return fitted_zoom(df) if choix == ZOOM_AUTO else int(choix)
+
+
+def build_map_bins(df, zooms=ZOOMS_STANDARD, par='Ligne'):
+    """
+    Pré-calcule, pour chaque zoom standard, les cellules de grille occupées par `par` x cellule :
+    nombre de points et somme des coordonnées (pour recalculer le barycentre après filtrage).
+    """
+    points = df.dropna(subset=['latitude', 'longitude'])
+    lat = points['latitude'].to_numpy(dtype=np.float64)
+    lon = points['longitude'].to_numpy(dtype=np.float64)
+    lat0 = lat.mean() if len(lat) else 0.0
+
+    bins = {}
+    for zoom in zooms:
+        pas_lat = np.degrees(cell_size_for_zoom(zoom, lat0) / RAYON_TERRE_M)
+        pas_lon = pas_lat / max(np.cos(np.radians(lat0)), 1e-6)
+        cellules = points[[par]].assign(
+            cx=np.floor(lon / pas_lon).astype(np.int64),
+            cy=np.floor(lat / pas_lat).astype(np.int64),
+            somme_lat=lat,
+            somme_lon=lon,
+            nombre=1
+        )
+        bins[zoom] = cellules.groupby([par, 'cx', 'cy'], observed=True, as_index=False).sum()
+    return bins
+
+
+def map_layer(bins, df_points, lignes, zoom, par='Ligne'):
+    """
+    Données à passer à st.map pour ce zoom : points bruts (`df_points`, déjà filtrés)
+    à partir de ZOOM_POINTS_BRUTS, sinon une ligne par cellule (barycentre, nombre de points, rayon 'taille' en mètres).
+    La taille du résultat dépend du nombre de cellules visibles, pas du nombre de points.
+    """
+    if zoom >= ZOOM_POINTS_BRUTS:
+        return df_points.dropna(subset=['latitude', 'longitude']).assign(nombre=1, taille=20.0)
+
+    zoom_bins = max([z for z in bins if z <= zoom], default=min(bins))
+    cellules = bins[zoom_bins]
+    cellules = cellules[cellules[par].isin(lignes)]
+    agg = cellules.groupby(['cx', 'cy'], as_index=False)[['somme_lat', 'somme_lon', 'nombre']].sum()
+
+    lat0 = (agg['somme_lat'].sum() / agg['nombre'].sum()) if len(agg) else 0.0
+    cote = cell_size_for_zoom(zoom_bins, lat0)
+    return pd.DataFrame({
+        'latitude': agg['somme_lat'] / agg['nombre'],
+        'longitude': agg['somme_lon'] / agg['nombre'],
+        'nombre': agg['nombre'],
+        # Rayon croissant avec le nombre de points, plafonné à la moitié de la cellule
+        'taille': cote * 0.5 * np.sqrt(agg['nombre'] / max(agg['nombre'].max(), 1)) if len(agg) else []
+    })
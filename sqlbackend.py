@@ -0,0 +1,249 @@
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fsutil import write_atomic
+from incremental import DropScanner, DROP_DIR, INTERVALLE_SCAN_S
+from simulation import ORDRE_JOURS
+from trends import FENETRES_J, FENETRE_ZSCORE_J, MIN_JOURS_ZSCORE, SEUIL_ZSCORE, COLONNES_TENDANCES
+
+try:
+    import duckdb
+except ImportError:  # moteur optionnel : pip install duckdb
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# --- MOTEUR SQL EMBARQUÉ (DuckDB) SUR L'HISTORIQUE PARQUET ---
+#
+# Avec RATP_MOTEUR=duckdb, l'historique n'est pas chargé en pandas : les KPIs, le classement,
+# la heatmap, la série filtrée et ses tendances glissantes sont calculés par DuckDB (multi-cœur,
+# dans le processus) directement sur l'instantané Parquet et les fichiers de dépôt intégrés.
+# Seuls les petits résultats reviennent en pandas. Sans le paquet duckdb, tout reste en pandas.
+
+# Moteur des requêtes de l'historique : 'pandas' (en mémoire, cube d'agrégats, par défaut) ou 'duckdb'
+MOTEUR = os.environ.get("RATP_MOTEUR", "pandas")
+
+# Filtre commun : lignes demandées et jours complets de `debut` à `fin`
+_FILTRE = "list_contains($lignes, CAST(Ligne AS VARCHAR)) AND Date >= $debut AND Date < $fin"
+
+# Tendances (mêmes définitions que trends.line_trends) : moyennes sur (t - n jours, t],
+# z-score par rapport aux FENETRE_ZSCORE_J jours qui précèdent [t - 30 jours, t)
+_FENETRES = ",\n".join(
+    [f"moyenne_{n} AS (PARTITION BY Ligne ORDER BY Date RANGE BETWEEN INTERVAL '{n - 1} days 23:59:59.999999' PRECEDING AND CURRENT ROW)"
+     for n in FENETRES_J]
+    + [f"precedents AS (PARTITION BY Ligne ORDER BY Date RANGE BETWEEN INTERVAL '{FENETRE_ZSCORE_J} days' PRECEDING AND INTERVAL '1 microsecond' PRECEDING)"]
+)
+_TENDANCES = ", ".join(
+    [f"avg(Taux_Regularite) OVER moyenne_{n} AS Moyenne_{n}j" for n in FENETRES_J]
+    + [f"CASE WHEN count(Taux_Regularite) OVER precedents >= {MIN_JOURS_ZSCORE} THEN "
+       "(Taux_Regularite - avg(Taux_Regularite) OVER precedents) / nullif(stddev_samp(Taux_Regularite) OVER precedents, 0) "
+       "END AS Zscore"]
+)
+
+
+def duckdb_available():
+    return duckdb is not None
+
+
+def sql_engine_selected(moteur=MOTEUR):
+    """
+    Vrai si l'historique doit être servi par DuckDB : `moteur` vaut 'duckdb' et le paquet est installé.
+    """
+    if moteur != 'duckdb':
+        return False
+    if duckdb is None:
+        logger.warning("RATP_MOTEUR=duckdb mais le paquet duckdb est absent : calculs en pandas.")
+        return False
+    return True
+
+
+class SqlHistory:
+    """
+    Historique interrogé par DuckDB, exposé comme la vue `regularite` (Date, Ligne, Taux_Regularite, ...).
+
+    `sources` est un chemin, un motif ou une liste de fichiers Parquet (ex. l'instantané trié
+    par (Ligne, Date) et les fichiers de dépôt intégrés), lus directement par DuckDB : seuls les
+    groupes de lignes utiles à une requête sont lus, l'historique peut dépasser la mémoire.
+    Une connexion est partagée ; chaque requête passe par son propre curseur (sûr entre threads).
+    """
+
+    def __init__(self, sources, threads=None):
+        if duckdb is None:
+            raise ImportError("Le moteur SQL nécessite le paquet duckdb (pip install duckdb).")
+        if isinstance(sources, (str, Path)):
+            sources = [sources]
+        fichiers = ", ".join("'{}'".format(str(source).replace("'", "''")) for source in sources)
+        self._con = duckdb.connect()
+        if threads:
+            self._con.execute(f"SET threads = {int(threads)}")
+        self._con.execute(f"CREATE VIEW regularite AS SELECT * FROM read_parquet([{fichiers}], union_by_name = true)")
+        self._lock = threading.Lock()
+        # L'état est immuable : lignes et période ne sont lues qu'une fois
+        self._lignes = self._periode = None
+
+    def memory_bytes(self):
+        """
+        Mémoire tenue par DuckDB pour cette connexion (tampons, tables de hachage, lecteurs Parquet).
+        """
+        return int(self.query("SELECT coalesce(sum(memory_usage_bytes), 0) AS octets FROM duckdb_memory()")['octets'][0])
+
+    def query(self, sql, params=None):
+        with self._lock:
+            curseur = self._con.cursor()
+        try:
+            return curseur.execute(sql, params or {}).df()
+        finally:
+            curseur.close()
+
+    def _params(self, lignes, debut, fin):
+        return {
+            'lignes': [str(ligne) for ligne in lignes],
+            'debut': pd.Timestamp(debut).normalize().to_pydatetime(),
+            'fin': (pd.Timestamp(fin).normalize() + pd.Timedelta(days=1)).to_pydatetime(),
+        }
+
+    def lines(self):
+        if self._lignes is None:
+            self._lignes = sorted(self.query("SELECT DISTINCT CAST(Ligne AS VARCHAR) AS Ligne FROM regularite")['Ligne'])
+        return self._lignes
+
+    def period(self):
+        if self._periode is None:
+            res = self.query("SELECT min(Date) AS debut, max(Date) AS fin FROM regularite")
+            self._periode = res['debut'][0].date(), res['fin'][0].date()
+        return self._periode
+
+    def existing_keys(self, lignes, debut, fin):
+        """
+        Couples (Ligne, Date) déjà présents pour ces lignes entre `debut` et `fin` inclus (instants exacts).
+        """
+        return self.query(
+            "SELECT CAST(Ligne AS VARCHAR) AS Ligne, Date FROM regularite "
+            "WHERE list_contains($lignes, CAST(Ligne AS VARCHAR)) AND Date >= $debut AND Date <= $fin",
+            {'lignes': [str(ligne) for ligne in lignes], 'debut': pd.Timestamp(debut).to_pydatetime(),
+             'fin': pd.Timestamp(fin).to_pydatetime()}
+        )
+
+    def kpis(self, lignes, debut, fin):
+        """
+        Régularité moyenne et pire valeur sur la sélection (NaN si vide).
+        """
+        res = self.query(
+            f"SELECT avg(Taux_Regularite) AS moyenne, min(Taux_Regularite) AS minimum FROM regularite WHERE {_FILTRE}",
+            self._params(lignes, debut, fin)
+        )
+        moyenne, minimum = res['moyenne'][0], res['minimum'][0]
+        return (np.nan, np.nan) if pd.isna(moyenne) else (float(moyenne), float(minimum))
+
+    def ranking(self, lignes, debut, fin):
+        return self.query(
+            f"""
+            SELECT CAST(Ligne AS VARCHAR) AS Ligne, avg(Taux_Regularite) AS Taux_Regularite
+            FROM regularite WHERE {_FILTRE}
+            GROUP BY 1 ORDER BY Taux_Regularite DESC
+            """,
+            self._params(lignes, debut, fin)
+        )
+
+    def heatmap(self, lignes, debut, fin):
+        """
+        Moyenne par Ligne x Jour_Semaine (même forme que le pivot_table d'origine).
+        """
+        res = self.query(
+            f"""
+            SELECT CAST(Ligne AS VARCHAR) AS Ligne, isodow(Date) - 1 AS jour, avg(Taux_Regularite) AS moyenne
+            FROM regularite WHERE {_FILTRE}
+            GROUP BY 1, 2
+            """,
+            self._params(lignes, debut, fin)
+        )
+        heatmap_data = res.pivot(index='Ligne', columns='jour', values='moyenne').sort_index().sort_index(axis=1)
+        heatmap_data.columns = pd.CategoricalIndex(
+            [ORDRE_JOURS[j] for j in heatmap_data.columns], categories=ORDRE_JOURS, ordered=True, name='Jour_Semaine'
+        )
+        return heatmap_data
+
+    def series(self, lignes, debut, fin):
+        """
+        Série filtrée (Date, Ligne, Taux_Regularite) et ses tendances (COLONNES_TENDANCES, voir trends.py)
+        triée par ligne puis date, pour la courbe temporelle. Les fenêtres glissantes sont calculées
+        par DuckDB sur la sélection et les jours qui la précèdent (la plus longue fenêtre).
+        """
+        params = self._params(lignes, debut, fin)
+        params['contexte'] = params['debut'] - pd.Timedelta(days=max(*FENETRES_J, FENETRE_ZSCORE_J)).to_pytimedelta()
+        serie = self.query(
+            f"""
+            WITH selection AS (
+                SELECT Date, CAST(Ligne AS VARCHAR) AS Ligne, Taux_Regularite FROM regularite
+                WHERE list_contains($lignes, CAST(Ligne AS VARCHAR)) AND Date >= $contexte AND Date < $fin
+            ), tendances AS (
+                SELECT Date, Ligne, Taux_Regularite, {_TENDANCES}
+                FROM selection
+                WINDOW {_FENETRES}
+            )
+            SELECT *, coalesce(abs(Zscore) > {SEUIL_ZSCORE}, false) AS Anomalie
+            FROM tendances WHERE Date >= $debut
+            ORDER BY Ligne, Date
+            """,
+            params
+        )
+        return serie.astype({colonne: np.float32 for colonne in ['Taux_Regularite', *COLONNES_TENDANCES[:-1]]})
+
+
+class SqlStore(DropScanner):
+    """
+    Historique servi par DuckDB sur disque, avec la même interface que incremental.HistoryStore
+    (`current()`, `refresh()`) : ni DataFrame de l'historique, ni cube d'agrégats, ni tendances
+    précalculées en mémoire.
+
+    Les fichiers du dossier de dépôt sont lus et validés comme pour HistoryStore (mode ajout seul),
+    puis écrits en Parquet dans un dossier temporaire du processus et ajoutés à la vue
+    d'un nouvel état, publié en une seule affectation.
+    """
+
+    def __init__(self, source, drop_dir=DROP_DIR, intervalle_s=INTERVALLE_SCAN_S, threads=None):
+        super().__init__(drop_dir, intervalle_s)
+        self.source = Path(source)
+        self.threads = threads
+        # Fichiers de dépôt intégrés, propres à ce processus (relus au démarrage suivant, comme en mémoire)
+        self._dossier = tempfile.TemporaryDirectory(prefix="ratp-sql-")
+        self._snapshot = self._state([self.source], frozenset(), 0)
+
+    def _state(self, fichiers, partitions, version):
+        return {
+            'sql': SqlHistory(fichiers, threads=self.threads),
+            'fichiers': tuple(fichiers),
+            'partitions': partitions,
+            'version': f"sql:{self.source.stem}:{version}",
+            'numero': version,
+        }
+
+    def current(self):
+        return self._snapshot
+
+    def memory_bytes(self):
+        return self._snapshot['sql'].memory_bytes()
+
+    def _integrate(self, df_nouveau, noms):
+        snap = self._snapshot
+        df_nouveau = df_nouveau.astype({'Ligne': str})
+        existants = snap['sql'].existing_keys(df_nouveau['Ligne'].unique(), df_nouveau['Date'].min(), df_nouveau['Date'].max())
+        cles = pd.MultiIndex.from_frame(df_nouveau[['Ligne', 'Date']])
+        df_nouveau = df_nouveau[~cles.isin(pd.MultiIndex.from_frame(existants.astype({'Date': df_nouveau['Date'].dtype})))]
+
+        partitions = snap['partitions'] | noms
+        if df_nouveau.empty:
+            self._snapshot = {**snap, 'partitions': partitions}
+            return 0
+
+        numero = snap['numero'] + 1
+        path = Path(self._dossier.name) / f"depot-{numero:06d}.parquet"
+        write_atomic(path, lambda tmp: df_nouveau.to_parquet(tmp, index=False))
+        self._snapshot = self._state([*snap['fichiers'], path], partitions, numero)
+        return len(df_nouveau)
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Les modules de l'application sont à la racine du dépôt (lancés par `streamlit run`), pas dans un paquet
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from history_index import sort_history  # noqa: E402
+from schema import apply_schema, SIM_SCHEMA  # noqa: E402
+from simulation import generate_regularity_parallel  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def historique_brut():
+    """
+    Historique simulé non trié ni compacté : 6 lignes sur trois ans, avec des jours manquants.
+    """
+    df = generate_regularity_parallel(nb_lignes=6, start="2021-01-01", end="2023-12-31", workers=1)
+    trous = pd.to_datetime(["2021-03-04", "2022-07-07", "2022-07-08"])
+    return df[~df['Date'].isin(trous) & ~((df['Ligne'] == '4') & (df['Date'] < "2021-06-01"))].reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def historique(historique_brut):
+    """
+    Historique trié par (Ligne, Date) et compacté, comme celui servi par datasets.simulation_frame.
+    """
+    return apply_schema(sort_history(historique_brut), SIM_SCHEMA)
+
+
+@pytest.fixture
+def deposer(tmp_path):
+    """
+    Écrit un fichier journalier dans le dossier de dépôt `tmp_path`, déjà stable (voir DELAI_STABILITE_S).
+    """
+    def deposer(nom, date, lignes, taux):
+        path = tmp_path / f"{nom}.csv"
+        pd.DataFrame({
+            'Date': [pd.Timestamp(date)] * len(lignes),
+            'Ligne': list(lignes),
+            'Taux_Regularite': np.asarray(taux, dtype=np.float64),
+            'Trafic': 500000,
+        }).to_csv(path, sep=';', index=False)
+        passe = time.time() - 60
+        os.utime(path, (passe, passe))
+        return path
+
+    return deposer
+
+
+@pytest.fixture(scope="session")
+def periodes():
+    """
+    Périodes (début, fin) tirées au hasard, dont certaines débordent de l'historique.
+    """
+    rng = np.random.default_rng(0)
+    jours = pd.date_range("2020-12-01", "2024-02-01")
+    return [tuple(pd.Timestamp(j) for j in sorted(rng.choice(jours, 2))) for _ in range(40)]
@@ -0,0 +1,175 @@
+import gc
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from caching import BoundedCache, CacheRegistry, cached, PART_MIN_CACHES
+
+
+def octets(n):
+    return np.zeros(n, dtype=np.uint8)
+
+
+def attendre(condition, delai_s=5):
+    fin = time.monotonic() + delai_s
+    while not condition():
+        assert time.monotonic() < fin, "délai dépassé"
+        time.sleep(0.005)
+
+
+def test_eviction_lru_par_nombre_d_entrees():
+    cache = BoundedCache('t', max_entries=3, registry=None)
+    for cle in 'abc':
+        cache.get_or_build(cle, lambda: cle)
+    cache.get_or_build('a', lambda: pytest.fail("'a' doit être en cache"))
+    cache.get_or_build('d', lambda: 'd')
+    assert list(cache._entries) == ['c', 'a', 'd']
+    assert cache.stats()['evictions'] == 1
+
+
+def test_eviction_par_octets():
+    cache = BoundedCache('t', max_bytes=1000, registry=None)
+    for cle in range(4):
+        cache.get_or_build(cle, lambda: octets(300))
+    assert list(cache._entries) == [1, 2, 3] and cache.bytes == 900
+    # Une valeur plus grande que le cache est renvoyée sans être gardée
+    assert len(cache.get_or_build('gros', lambda: octets(2000))) == 2000
+    assert 'gros' not in cache._entries and cache.bytes == 900
+
+
+def test_expiration():
+    cache = BoundedCache('t', ttl=0.05, registry=None)
+    appels = []
+    construire = lambda: appels.append(1) or len(appels)
+    assert cache.get_or_build('k', construire) == 1
+    assert cache.get_or_build('k', construire) == 1
+    time.sleep(0.1)
+    assert cache.get_or_build('k', construire) == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_une_seule_construction_par_cle():
+    cache = BoundedCache('t', registry=None)
+    libere = threading.Event()
+    appels = []
+
+    def construire():
+        appels.append(1)
+        libere.wait()
+        return 'valeur'
+
+    resultats = []
+    sessions = [threading.Thread(target=lambda: resultats.append(cache.get_or_build('k', construire))) for _ in range(8)]
+    for session in sessions:
+        session.start()
+    attendre(lambda: cache.stats()['attentes'] == 7)
+    # Une autre clé n'est pas bloquée par la construction en cours
+    assert cache.get_or_build('autre', lambda: 'libre') == 'libre'
+    libere.set()
+    for session in sessions:
+        session.join()
+    assert resultats == ['valeur'] * 8 and len(appels) == 1
+    assert cache.stats()['defauts'] == 2
+
+
+def test_echec_de_construction_non_mis_en_cache():
+    cache = BoundedCache('t', registry=None)
+    libere = threading.Event()
+
+    def echouer():
+        libere.wait()
+        raise RuntimeError("échec")
+
+    erreurs, resultats = [], []
+
+    def premiere():
+        try:
+            cache.get_or_build('k', echouer)
+        except RuntimeError as e:
+            erreurs.append(e)
+
+    sessions = [threading.Thread(target=premiere),
+                threading.Thread(target=lambda: resultats.append(cache.get_or_build('k', lambda: 'reprise')))]
+    sessions[0].start()
+    attendre(lambda: 'k' in cache._en_cours)
+    sessions[1].start()
+    attendre(lambda: cache.stats()['attentes'] == 1)
+    libere.set()
+    for session in sessions:
+        session.join()
+    # La session en attente retente la construction elle-même
+    assert len(erreurs) == 1 and resultats == ['reprise']
+    assert cache.get_or_build('k', lambda: pytest.fail("'k' doit être en cache")) == 'reprise'
+    assert not cache._en_cours
+
+
+def test_budget_global_evince_la_plus_ancienne_tous_caches_confondus():
+    registre = CacheRegistry(budget_octets=1000)
+    a = BoundedCache('a', registry=registre)
+    b = BoundedCache('b', registry=registre)
+    a.get_or_build(1, lambda: octets(400))
+    b.get_or_build(1, lambda: octets(400))
+    a.get_or_build(1, lambda: pytest.fail("en cache"))
+    b.get_or_build(2, lambda: octets(400))
+    # Entrée la moins récemment utilisée : b[1]
+    assert list(a._entries) == [1] and list(b._entries) == [2]
+    assert registre.total_bytes() == 800
+
+
+class Historique:
+    def __init__(self, taille):
+        self.taille = taille
+        self.mesures = 0
+
+    def memory_bytes(self):
+        self.mesures += 1
+        return self.taille
+
+
+def test_ressources_deduites_du_budget_avec_plancher():
+    registre = CacheRegistry(budget_octets=10_000)
+    cache = BoundedCache('t', registry=registre)
+    historique = registre.track('historique', Historique(6000))
+    assert registre.cache_budget() == 4000
+
+    for cle in range(10):
+        cache.get_or_build(cle, lambda: octets(1000))
+    assert cache.bytes == 4000
+    # Taille remesurée au plus toutes les INTERVALLE_MESURE_S secondes, pas à chaque insertion
+    assert historique.mesures == 1
+
+    historique.taille = 20_000
+    registre.resource_sizes(age_max_s=0)
+    assert registre.cache_budget() == 10_000 * PART_MIN_CACHES
+    assert registre.metrics()['ressources_octets'] == 20_000
+
+    # Ressource libérée : elle ne compte plus
+    del historique
+    gc.collect()
+    registre.resource_sizes(age_max_s=0)
+    assert registre.cache_budget() == 10_000
+
+
+def test_decorateur_reprend_le_cache_du_meme_nom():
+    registre = CacheRegistry(budget_octets=float('inf'))
+    appels = []
+
+    def definir():
+        @cached('carre', registry=registre)
+        def carre(x):
+            appels.append(x)
+            if x < 0:
+                raise ValueError(x)
+            return x * x
+        return carre
+
+    assert definir()(3) == 9
+    # Fonction redéfinie (nouvelle exécution du script) : même cache
+    carre = definir()
+    assert carre(3) == 9 and appels == [3]
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            carre(-1)
+    assert appels == [3, -1, -1]
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import (lttb_indices, downsample_series, downsample_lines, point_budget,
+                          LARGEUR_GRAPHIQUE_PX, POINTS_PAR_PIXEL, MIN_POINTS_PAR_COURBE)
+
+
+@pytest.fixture(scope="module")
+def serie():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000, dtype=np.float64)
+    y = 96 + np.cumsum(rng.normal(0, 0.1, len(x)))
+    return x, y
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 500, 4999])
+def test_lttb_garde_n_out_points_dont_les_extremites(serie, n_out):
+    x, y = serie
+    indices = lttb_indices(x, y, n_out)
+    assert len(indices) == n_out
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_un_point_par_seau(serie):
+    x, y = serie
+    n_out = 50
+    bords = np.linspace(1, len(x) - 1, n_out - 1).astype(np.int64)
+    interieurs = lttb_indices(x, y, n_out)[1:-1]
+    assert ((interieurs >= bords[:-1]) & (interieurs < bords[1:])).all()
+
+
+def test_lttb_garde_un_pic_isole(serie):
+    x, y = serie
+    y = y.copy()
+    y[1234] += 50
+    assert 1234 in lttb_indices(x, y, 100)
+
+
+@pytest.mark.parametrize("n_out", [2, 5000, 6000])
+def test_lttb_sans_reduction(serie, n_out):
+    x, y = serie
+    np.testing.assert_array_equal(lttb_indices(x, y, n_out), np.arange(len(x)))
+
+
+def test_sous_echantillonnage_garde_les_creux(serie):
+    x, y = serie
+    y = np.full(len(x), 97.0)
+    creux = [17, 2500, 4321]
+    y[creux] = 80.0
+    indices = downsample_series(x, y, 200)
+    assert len(indices) <= 200
+    assert set(creux) <= set(indices)
+
+
+def test_budget_partage_entre_les_courbes():
+    total = LARGEUR_GRAPHIQUE_PX * POINTS_PAR_PIXEL
+    assert point_budget() == total
+    assert point_budget(n_courbes=2) == total // 2
+    assert point_budget(n_courbes=1000) == MIN_POINTS_PAR_COURBE
+
+
+def test_courbes_reduites_au_budget_partage(historique):
+    # 6 lignes x ~1 090 jours : au-delà du budget partagé (400 points par courbe)
+    reduit = downsample_lines(historique)
+    budget = point_budget(n_courbes=historique['Ligne'].nunique())
+    tailles = reduit.groupby('Ligne', observed=True).size()
+    assert (tailles <= budget).all() and (tailles > budget // 2).all()
+    # Sous-ensemble de l'historique dans son ordre, extrémités de chaque courbe comprises
+    assert reduit.index.is_monotonic_increasing and reduit.index.isin(historique.index).all()
+    bornes = historique.groupby('Ligne', observed=True)['Date'].agg(['min', 'max'])
+    pd.testing.assert_frame_equal(reduit.groupby('Ligne', observed=True)['Date'].agg(['min', 'max']), bornes)
+
+
+def test_courbes_courtes_inchangees(historique):
+    court = historique[historique['Date'] < "2021-03-01"]
+    assert downsample_lines(court) is court
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_index import sort_history, build_line_index, merge_history, slice_history
+from schema import apply_schema, SIM_SCHEMA
+
+
+@pytest.mark.parametrize("lignes", [['1'], ['3', '1'], ['2', '4', '6'], ['ZZ'], ['5', 'ZZ']])
+def test_tranche_egale_au_filtre(historique, periodes, lignes):
+    index = build_line_index(historique)
+    for debut, fin in periodes:
+        masque = (historique['Ligne'].isin(lignes) & (historique['Date'] >= debut)
+                  & (historique['Date'] < fin + pd.Timedelta(days=1)))
+        pd.testing.assert_frame_equal(slice_history(historique, index, lignes, debut, fin), historique[masque])
+
+
+def test_fusion_egale_au_tri_complet(historique_brut):
+    # Dans l'historique : jours manquants au milieu et en fin de bloc, ligne absente ('5'),
+    # ligne de nom intermédiaire ('10', rangée entre '1' et '2') et ligne de nom supérieur ('ZZ')
+    rng = np.random.default_rng(1)
+    nouveau = rng.random(len(historique_brut)) < 0.05
+    nouveau |= historique_brut['Date'] >= "2023-12-20"
+    nouveau |= historique_brut['Ligne'] == '5'
+    existant = historique_brut[~nouveau]
+    ajout = pd.concat([historique_brut[nouveau],
+                       historique_brut[historique_brut['Ligne'] == '2'].assign(Ligne='10'),
+                       historique_brut[historique_brut['Ligne'] == '3'].assign(Ligne='ZZ')], ignore_index=True)
+
+    df = apply_schema(sort_history(existant), SIM_SCHEMA)
+    fusion, index = merge_history(df, build_line_index(df), apply_schema(ajout.sample(frac=1, random_state=0), SIM_SCHEMA))
+
+    attendu = apply_schema(sort_history(pd.concat([existant, ajout], ignore_index=True)), SIM_SCHEMA)
+    attendu_index = build_line_index(attendu)
+    pd.testing.assert_frame_equal(fusion, attendu)
+    assert index['bornes'] == attendu_index['bornes']
+    np.testing.assert_array_equal(index['dates'], attendu_index['dates'])
+
+
+def test_fusion_refusee_si_blocs_non_ranges(historique):
+    # Blocs rangés par ordre d'apparition et non par nom : la fusion doit passer par sort_history
+    desordre = pd.concat([historique[historique['Ligne'] == '2'], historique[historique['Ligne'] == '1']],
+                         ignore_index=True)
+    ajout = historique[historique['Ligne'] == '3']
+    assert merge_history(desordre, build_line_index(desordre), ajout) is None
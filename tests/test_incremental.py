@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import incremental
+from history_index import sort_history
+from incremental import HistoryStore, make_snapshot, read_partition, QUARANTAINE
+from schema import apply_schema, SIM_SCHEMA
+
+LIGNES = [str(i) for i in range(1, 7)]
+
+# (nom du fichier, date, lignes) : jour manquant au milieu des blocs, début du bloc de la ligne 4,
+# couple déjà présent (ignoré en mode ajout seul), nouveau jour et nouvelle ligne
+DEPOTS = [
+    [('2022-07-07', '2022-07-07', LIGNES), ('2021-02-01', '2021-02-01', ['4', '2'])],
+    [('2024-01-01', '2024-01-01', LIGNES + ['ZZ']), ('2024-01-02', '2024-01-02', ['ZZ', '1'])],
+]
+
+
+def reconstruction(historique, fichiers):
+    """
+    Instantané reconstruit de zéro : historique et fichiers concaténés, premier couple (Ligne, Date) gardé, retriés.
+    """
+    df = pd.concat([historique] + [read_partition(f) for f in fichiers], ignore_index=True)
+    df = df.drop_duplicates(['Ligne', 'Date'], keep='first')
+    return make_snapshot(apply_schema(sort_history(df), SIM_SCHEMA))
+
+
+def assert_snapshots_egaux(snap, attendu):
+    pd.testing.assert_frame_equal(snap['df'], attendu['df'], check_categorical=False)
+    assert list(snap['df']['Ligne'].cat.categories) == list(attendu['df']['Ligne'].cat.categories)
+    assert snap['index']['bornes'] == attendu['index']['bornes']
+    np.testing.assert_array_equal(snap['index']['dates'], attendu['index']['dates'])
+    for cle, valeur in attendu['cube'].items():
+        # Sommes en float64 : l'ordre d'accumulation de merge_rollup diffère de build_rollup
+        tableaux = zip(snap['cube'][cle], valeur) if isinstance(valeur, list) else [(snap['cube'][cle], valeur)]
+        for a, b in tableaux:
+            if b.dtype.kind == 'f':
+                np.testing.assert_allclose(a, b, rtol=1e-12)
+            else:
+                np.testing.assert_array_equal(a, b)
+
+
+def test_integration_egale_a_la_reconstruction(historique, tmp_path, deposer):
+    store = HistoryStore(historique, drop_dir=tmp_path)
+    rng = np.random.default_rng(0)
+    fichiers = []
+    for version, depots in enumerate(DEPOTS, start=1):
+        for nom, date, lignes in depots:
+            fichiers.append(deposer(nom, date, lignes, rng.uniform(80, 100, len(lignes))))
+        assert store.refresh(force=True)
+        snap = store.current()
+        assert snap['version'] == version
+        assert snap['partitions'] == {f.name for f in fichiers}
+        assert_snapshots_egaux(snap, reconstruction(historique, fichiers))
+
+
+def test_couples_deja_presents_ignores(historique, tmp_path, deposer):
+    store = HistoryStore(historique, drop_dir=tmp_path)
+    avant = store.current()
+    deposer('2023-06-01', '2023-06-01', ['2', '3'], [1.0, 2.0])
+    assert not store.refresh(force=True)
+    snap = store.current()
+    assert snap['df'] is avant['df'] and snap['version'] == avant['version']
+    assert snap['partitions'] == {'2023-06-01.csv'}
+
+
+def test_fichier_mal_forme_mis_en_quarantaine(historique, tmp_path, deposer):
+    store = HistoryStore(historique, drop_dir=tmp_path)
+    mal_forme = deposer('2024-01-01', '2024-01-01', ['1'], [95.0])
+    stat = mal_forme.stat()
+    pd.read_csv(mal_forme, sep=';').drop(columns='Trafic').to_csv(mal_forme, sep=';', index=False)
+    os.utime(mal_forme, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    valide = deposer('2024-01-02', '2024-01-02', ['1'], [95.0])
+
+    assert store.refresh(force=True)
+    assert not mal_forme.exists() and (tmp_path / QUARANTAINE / mal_forme.name).exists()
+    assert store.current()['partitions'] == {valide.name}
+    assert len(store.current()['df']) == len(historique) + 1
+
+
+def test_fichier_en_cours_de_copie_laisse_au_scan_suivant(historique, tmp_path, deposer):
+    store = HistoryStore(historique, drop_dir=tmp_path)
+    recent = deposer('2024-01-01', '2024-01-01', ['1'], [95.0])
+    recent.touch()
+    assert not store.refresh(force=True)
+    assert store.current()['partitions'] == frozenset()
+
+
+def test_taille_mesuree_une_fois_par_version(historique, tmp_path, deposer, monkeypatch):
+    store = HistoryStore(historique, drop_dir=tmp_path)
+    mesures = []
+    monkeypatch.setattr(incremental, 'estimate_size', lambda obj: mesures.append(1) or 123)
+    assert store.memory_bytes() == store.memory_bytes() == 123
+    deposer('2024-01-01', '2024-01-01', ['1'], [95.0])
+    store.refresh(force=True)
+    store.memory_bytes()
+    assert len(mesures) == 2
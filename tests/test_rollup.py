@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup import build_rollup, merge_rollup, rollup_kpis, rollup_ranking, rollup_heatmap
+
+CHOIX_LIGNES = [['1'], ['2', '4'], ['1', '3', '5', '6'], ['4', 'ZZ'], ['ZZ']]
+
+
+@pytest.fixture(scope="module")
+def cube(historique):
+    return build_rollup(historique)
+
+
+@pytest.fixture(scope="module")
+def reference(historique):
+    """
+    Historique en float64 : les agrégats du cube sont calculés en float64 à partir des valeurs float32.
+    """
+    return historique.astype({'Taux_Regularite': 'float64', 'Ligne': str})
+
+
+def selection(df, lignes, debut, fin):
+    return df[df['Ligne'].isin(lignes) & (df['Date'] >= debut) & (df['Date'] < fin + pd.Timedelta(days=1))]
+
+
+@pytest.mark.parametrize("lignes", CHOIX_LIGNES)
+def test_kpis_egaux_a_pandas(cube, reference, periodes, lignes):
+    for debut, fin in periodes:
+        sel = selection(reference, lignes, debut, fin)
+        moyenne, pire = rollup_kpis(cube, lignes, debut, fin)
+        if sel.empty:
+            assert np.isnan(moyenne) and np.isnan(pire)
+        else:
+            assert moyenne == pytest.approx(sel['Taux_Regularite'].mean(), rel=1e-12)
+            assert pire == sel['Taux_Regularite'].min()
+
+
+@pytest.mark.parametrize("lignes", CHOIX_LIGNES)
+def test_classement_egal_au_groupby(cube, reference, periodes, lignes):
+    for debut, fin in periodes:
+        attendu = (selection(reference, lignes, debut, fin)
+                   .groupby('Ligne')['Taux_Regularite'].mean()
+                   .sort_values(ascending=False))
+        classement = rollup_ranking(cube, lignes, debut, fin)
+        assert list(classement['Ligne']) == list(attendu.index)
+        np.testing.assert_allclose(classement['Taux_Regularite'], attendu.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize("lignes", CHOIX_LIGNES)
+def test_heatmap_egale_au_pivot_table(cube, reference, periodes, lignes):
+    for debut, fin in periodes:
+        sel = selection(reference, lignes, debut, fin)
+        heatmap = rollup_heatmap(cube, lignes, debut, fin)
+        if sel.empty:
+            assert heatmap.empty
+            continue
+        attendu = sel.pivot_table(index='Ligne', columns='Jour_Semaine', values='Taux_Regularite',
+                                  aggfunc='mean', observed=True)
+        assert list(heatmap.index) == list(attendu.index)
+        assert [str(c) for c in heatmap.columns] == [str(c) for c in attendu.columns]
+        np.testing.assert_allclose(heatmap.to_numpy(), attendu.to_numpy(), rtol=1e-12)
+
+
+def test_fusion_egale_a_la_reconstruction(historique, cube):
+    # Nouveaux jours pour toutes les lignes, et une ligne jusque-là inconnue
+    avant = historique[historique['Date'] < "2023-01-01"]
+    apres = historique[historique['Date'] >= "2023-01-01"]
+    nouvelle = apres[apres['Ligne'] == '1'].assign(Ligne='ZZ')
+    fusion = merge_rollup(build_rollup(avant), pd.concat([apres, nouvelle], ignore_index=True))
+    attendu = build_rollup(pd.concat([historique, nouvelle], ignore_index=True))
+
+    assert fusion.keys() == attendu.keys()
+    for cle, valeur in attendu.items():
+        if isinstance(valeur, list):
+            for a, b in zip(fusion[cle], valeur):
+                np.testing.assert_array_equal(a, b)
+        else:
+            np.testing.assert_array_equal(fusion[cle], valeur)
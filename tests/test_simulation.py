@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation import generate_regularity_parallel, _draw_blocks, BLOC_DATES
+
+# Granularité horaire sur un an : plusieurs blocs de BLOC_DATES dates par ligne
+PARAMS = {'nb_lignes': 4, 'start': "2023-01-01", 'end': "2023-12-31 23:00", 'freq': 'h', 'seed': 7}
+
+
+@pytest.fixture(scope="module")
+def sequentiel():
+    return generate_regularity_parallel(**PARAMS, workers=1)
+
+
+def test_plusieurs_blocs_par_ligne(sequentiel):
+    assert len(sequentiel) // PARAMS['nb_lignes'] > 2 * BLOC_DATES
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_identique_quel_que_soit_le_nombre_de_processus(sequentiel, workers):
+    pd.testing.assert_frame_equal(generate_regularity_parallel(**PARAMS, workers=workers), sequentiel)
+
+
+def test_pool_dans_le_processus_courant(sequentiel):
+    taux, trafic = _draw_blocks(**PARAMS, workers=2)
+    np.testing.assert_array_equal(taux, sequentiel['Taux_Regularite'].to_numpy())
+    np.testing.assert_array_equal(trafic, sequentiel['Trafic'].to_numpy())
+
+
+def test_depend_de_la_graine(sequentiel):
+    autre = generate_regularity_parallel(**{**PARAMS, 'seed': 8}, workers=1)
+    pd.testing.assert_frame_equal(autre[['Date', 'Ligne']], sequentiel[['Date', 'Ligne']])
+    assert not np.array_equal(autre['Taux_Regularite'], sequentiel['Taux_Regularite'])
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial import (build_spatial_index, query_radius, query_bbox, nearest, haversine_m,
+                     build_map_bins, map_layer, fitted_zoom, ZOOM_POINTS_BRUTS)
+
+
+@pytest.fixture(scope="module")
+def points():
+    """
+    Points autour de Paris, regroupés comme des stations, dont quelques-uns sans coordonnées.
+    """
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        'Ligne': rng.choice([str(i) for i in range(1, 15)], n),
+        'latitude': 48.86 + rng.normal(0, 0.05, n),
+        'longitude': 2.35 + rng.normal(0, 0.08, n),
+    })
+    df.loc[rng.choice(n, 30, replace=False), 'latitude'] = np.nan
+    return df
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    return build_spatial_index(points)
+
+
+def centres(points, n=25):
+    rng = np.random.default_rng(1)
+    valides = points.dropna()
+    choisis = valides.iloc[rng.choice(len(valides), n - 2, replace=False)]
+    # Plus deux centres hors du nuage de points
+    return [*zip(choisis['latitude'], choisis['longitude']), (48.5, 2.0), (49.5, 3.5)]
+
+
+@pytest.mark.parametrize("rayon_m", [50, 400, 2500])
+def test_rayon_egal_a_la_recherche_exhaustive(points, index, rayon_m):
+    lat, lon = points['latitude'].to_numpy(), points['longitude'].to_numpy()
+    for c_lat, c_lon in centres(points):
+        distances = haversine_m(c_lat, c_lon, lat, lon)
+        attendu = np.flatnonzero(distances <= rayon_m)
+        positions, trouvees = query_radius(index, c_lat, c_lon, rayon_m)
+        np.testing.assert_array_equal(np.sort(positions), attendu)
+        np.testing.assert_array_equal(trouvees, distances[positions])
+        assert (np.diff(trouvees) >= 0).all()
+
+
+def test_rectangle_egal_au_filtre(points, index):
+    for c_lat, c_lon in centres(points):
+        lat_min, lat_max, lon_min, lon_max = c_lat - 0.01, c_lat + 0.02, c_lon - 0.03, c_lon + 0.01
+        attendu = np.flatnonzero(points['latitude'].between(lat_min, lat_max)
+                                 & points['longitude'].between(lon_min, lon_max))
+        np.testing.assert_array_equal(query_bbox(index, lat_min, lat_max, lon_min, lon_max), attendu)
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_plus_proches_egaux_a_la_recherche_exhaustive(points, index, k):
+    lat, lon = points['latitude'].to_numpy(), points['longitude'].to_numpy()
+    for c_lat, c_lon in centres(points):
+        distances = haversine_m(c_lat, c_lon, lat, lon)
+        exclure = np.argsort(np.nan_to_num(distances, nan=np.inf))[:2]
+        distances[exclure] = np.nan
+        attendu = np.sort(np.nan_to_num(distances, nan=np.inf))[:k]
+        positions, trouvees = nearest(index, c_lat, c_lon, k=k, exclure=exclure)
+        assert not np.isin(positions, exclure).any()
+        np.testing.assert_array_equal(trouvees, attendu)
+
+
+def test_plus_proches_au_plus_le_nombre_de_points(points, index):
+    valides = int(points['latitude'].notna().sum())
+    positions, _ = nearest(index, 48.86, 2.35, k=valides + 10)
+    assert len(positions) == valides
+
+
+def test_cellules_de_carte_conservent_les_points(points):
+    bins = build_map_bins(points)
+    lignes = ['1', '2', '3']
+    filtres = points[points['Ligne'].isin(lignes)].dropna()
+    for zoom in bins:
+        couche = map_layer(bins, filtres, lignes, zoom)
+        assert couche['nombre'].sum() == len(filtres)
+        # Barycentre global inchangé par l'agrégation
+        assert (couche['latitude'] * couche['nombre']).sum() / len(filtres) == pytest.approx(filtres['latitude'].mean())
+    assert len(map_layer(bins, filtres, lignes, ZOOM_POINTS_BRUTS)) == len(filtres)
+
+
+def test_zoom_ajuste_aux_points(points):
+    zoom = fitted_zoom(points)
+    etendue = max(np.ptp(points['latitude'].dropna()), np.ptp(points['longitude']))
+    assert 360 / 2 ** zoom >= etendue > 360 / 2 ** (zoom + 1)
+    assert fitted_zoom(points.dropna().iloc[:1]) == ZOOM_POINTS_BRUTS
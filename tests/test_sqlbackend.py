@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from incremental import HistoryStore  # noqa: E402
+from outofcore import (history_series, history_kpis, history_ranking, history_heatmap,  # noqa: E402
+                       history_lines, history_period)
+from sqlbackend import SqlStore  # noqa: E402
+
+COLONNES_SERIE = ['Date', 'Ligne', 'Taux_Regularite', 'Moyenne_7j', 'Moyenne_30j', 'Zscore', 'Anomalie']
+SELECTIONS = [
+    (['1', '4', '6'], '2021-01-01', '2023-12-31'),
+    (['2'], '2022-06-15', '2022-08-02'),
+    (['4', '5'], '2020-12-01', '2021-07-01'),
+]
+
+
+@pytest.fixture
+def moteurs(historique, tmp_path):
+    """
+    Le même historique servi en mémoire (pandas) et par DuckDB depuis un fichier Parquet.
+    """
+    depot = tmp_path / "depot"
+    depot.mkdir()
+    parquet = tmp_path / "historique.parquet"
+    historique.to_parquet(parquet, index=False)
+    return HistoryStore(historique, drop_dir=depot), SqlStore(parquet, drop_dir=depot), depot
+
+
+def assert_resultats_egaux(memoire, sql, lignes, debut, fin):
+    m, s = memoire.current(), sql.current()
+
+    serie_m = history_series(m, lignes, debut, fin)[COLONNES_SERIE].astype({'Ligne': str}).reset_index(drop=True)
+    serie_s = history_series(s, lignes, debut, fin).astype({'Date': serie_m['Date'].dtype})
+    # Tendances en float64 côté DuckDB, float32 côté pandas
+    pd.testing.assert_frame_equal(serie_m, serie_s, check_dtype=False, atol=1e-3)
+
+    np.testing.assert_allclose(history_kpis(m, lignes, debut, fin), history_kpis(s, lignes, debut, fin), rtol=1e-9)
+
+    classement_m = history_ranking(m, lignes, debut, fin)
+    classement_s = history_ranking(s, lignes, debut, fin)
+    assert list(classement_m['Ligne'].astype(str)) == list(classement_s['Ligne'])
+    np.testing.assert_allclose(classement_m['Taux_Regularite'], classement_s['Taux_Regularite'], rtol=1e-9)
+
+    heatmap_m, heatmap_s = history_heatmap(m, lignes, debut, fin), history_heatmap(s, lignes, debut, fin)
+    assert list(heatmap_m.index.astype(str)) == list(heatmap_s.index.astype(str))
+    np.testing.assert_allclose(heatmap_m.to_numpy(), heatmap_s.to_numpy(), rtol=1e-9)
+
+
+@pytest.mark.parametrize("lignes, debut, fin", SELECTIONS)
+def test_duckdb_egal_a_pandas(moteurs, lignes, debut, fin):
+    memoire, sql, _ = moteurs
+    assert_resultats_egaux(memoire, sql, lignes, debut, fin)
+
+
+def test_lignes_et_periode(moteurs):
+    memoire, sql, _ = moteurs
+    assert history_lines(memoire.current()) == history_lines(sql.current())
+    assert history_period(memoire.current()) == history_period(sql.current())
+
+
+def test_depots_integres_comme_en_memoire(moteurs, deposer):
+    memoire, sql, depot = moteurs
+    depots = [('2024-01-01', ['1', '2', 'ZZ'], [91.0, 88.5, 99.0]),
+              ('2022-07-07', ['1', '6'], [70.0, 99.5]),
+              ('2023-06-01', ['2'], [1.0])]  # déjà présent : ignoré
+    for date, lignes, taux in depots:
+        deposer(date, date, lignes, taux).rename(depot / f"{date}.csv")
+
+    assert memoire.refresh(force=True) and sql.refresh(force=True)
+    assert sql.current()['partitions'] == memoire.current()['partitions']
+    assert history_lines(sql.current()) == history_lines(memoire.current())
+    assert_resultats_egaux(memoire, sql, ['1', '2', '6', 'ZZ'], '2022-06-01', '2024-01-01')
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# --- TENDANCES GLISSANTES ET JOURS ANORMAUX DE RÉGULARITÉ ---
+#
+# Colonnes ajoutées à l'historique en mémoire, une fois au chargement puis seulement
+# pour les jours touchés par les nouveaux fichiers : aucun calcul par interaction.
+
+FENETRES_J = (7, 30)
+FENETRE_ZSCORE_J = 30
+MIN_JOURS_ZSCORE = 7       # en deçà, pas assez d'historique pour juger un jour
+SEUIL_ZSCORE = 3.0
+COLONNES_TENDANCES = ['Moyenne_7j', 'Moyenne_30j', 'Zscore', 'Anomalie']
+
+
+def line_trends(dates, taux):
+    """
+    Moyennes glissantes (7 et 30 jours calendaires) et z-score d'une ligne, dates croissantes.
+
+    Le z-score compare chaque valeur à la moyenne et à l'écart-type des 30 jours qui la
+    précèdent (valeur exclue) ; `Anomalie` vaut True au-delà de SEUIL_ZSCORE en valeur absolue.
+    """
+    s = pd.Series(np.asarray(taux, dtype=np.float64), index=pd.DatetimeIndex(dates))
+    tendances = {f'Moyenne_{n}j': s.rolling(f'{n}D').mean().to_numpy(np.float32) for n in FENETRES_J}
+    precedents = s.rolling(f'{FENETRE_ZSCORE_J}D', closed='left', min_periods=MIN_JOURS_ZSCORE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = ((s - precedents.mean()) / precedents.std()).to_numpy()
+    tendances['Zscore'] = zscore.astype(np.float32)
+    tendances['Anomalie'] = np.abs(np.nan_to_num(zscore, nan=0.0)) > SEUIL_ZSCORE
+    return tendances
+
+
+def _fill(df, index, colonnes, depuis=None):
+    """
+    Recalcule les tendances des lignes de `depuis` ({ligne: première date touchée}),
+    ou de toutes les lignes si None, dans les tableaux `colonnes` alignés sur `df`.
+    """
+    dates = index['dates']
+    taux = df['Taux_Regularite'].to_numpy()
+    # Contexte nécessaire avant la première date touchée : la plus longue fenêtre
+    contexte = np.timedelta64(max(*FENETRES_J, FENETRE_ZSCORE_J), 'D')
+    for ligne, (d, f) in index['bornes'].items():
+        if depuis is None:
+            a = b = d
+        elif ligne in depuis:
+            premiere = np.datetime64(pd.Timestamp(depuis[ligne]))
+            a = d + np.searchsorted(dates[d:f], (premiere - contexte).astype(dates.dtype), side='left')
+            b = d + np.searchsorted(dates[d:f], premiere.astype(dates.dtype), side='left')
+        else:
+            continue
+        for nom, valeurs in line_trends(dates[a:f], taux[a:f]).items():
+            colonnes[nom][b:f] = valeurs[b - a:]
+
+
+def add_trends(df, index):
+    """
+    `df` (trié par (Ligne, Date), voir history_index) complété des COLONNES_TENDANCES.
+    """
+    colonnes = {nom: np.empty(len(df), dtype=np.float32) for nom in COLONNES_TENDANCES[:-1]}
+    colonnes['Anomalie'] = np.zeros(len(df), dtype=bool)
+    _fill(df, index, colonnes)
+    return df.assign(**colonnes)
+
+
+def update_trends(df, index, depuis):
+    """
+    Mise à jour incrémentale après ajout de jours : seules les lignes de `depuis`
+    ({ligne: première date ajoutée}) sont recalculées, à partir de cette date.
+    Les autres valeurs sont reprises telles quelles de `df`.
+    """
+    if not set(COLONNES_TENDANCES) <= set(df.columns):
+        return add_trends(df, index)
+    colonnes = {nom: df[nom].to_numpy(dtype=np.float32, na_value=np.nan, copy=True) for nom in COLONNES_TENDANCES[:-1]}
+    colonnes['Anomalie'] = df['Anomalie'].to_numpy(dtype=bool, na_value=False, copy=True)
+    _fill(df, index, colonnes, {str(ligne): date for ligne, date in depuis.items()})
+    return df.assign(**colonnes)
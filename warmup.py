@@ -0,0 +1,221 @@
+import atexit
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# --- WARM-UP AU DÉMARRAGE DU CONTENEUR ---
+#
+# python warmup.py                 remplit les instantanés disque puis écrit le fichier de disponibilité
+# python warmup.py CV.py [args]    idem, prépare aussi les objets partagés et figures par défaut
+#                                  dans ce processus, puis lance `streamlit run CV.py [args]`
+# python warmup.py --check         sonde de disponibilité : code 0 seulement une fois le warm-up terminé
+#                                  et, avec une application, son serveur à l'écoute
+
+# Fichier de disponibilité local au conteneur (et non dans RATP_CACHE_DIR, qui peut être un volume
+# persistant ou partagé) ; il porte le pid et l'identifiant de démarrage de la machine qui l'ont écrit
+READY_FILE = Path(os.environ.get("RATP_READY_FILE", Path(tempfile.gettempdir()) / "ratp-warmup-ready.json"))
+BOOT_ID_FILE = Path("/proc/sys/kernel/random/boot_id")
+TIMEOUT_SONDE_S = 2
+
+# Filtres par défaut de chaque application (mêmes valeurs que leurs multiselect)
+DEFAUTS = {
+    'CV.py': {'theme': 'cv', 'lignes': ['1', '14', '13']},
+    'D.py': {'theme': 'd', 'lignes': ['1', '4', '13']},
+}
+
+# Objets partagés préparés avant le démarrage du serveur, repris par les st.cache_resource des applications
+_PRECHARGE = {}
+
+
+def preloaded(nom):
+    """
+    Objet préparé par le warm-up dans ce processus (None si le serveur a été lancé sans warm-up).
+    """
+    return _PRECHARGE.get(nom)
+
+
+@contextmanager
+def _stage(durees, nom):
+    debut = time.perf_counter()
+    yield
+    durees[nom] = round(time.perf_counter() - debut, 4)
+    logger.info("warm-up %-16s %.3f s", nom, durees[nom])
+
+
+def warm_up(app=None):
+    """
+    Exécute les étapes du warm-up et renvoie leur durée (secondes) par étape.
+
+    Sans `app`, seuls les instantanés disque (simulation, fontaines) sont construits.
+    Avec `app` ('CV.py' ou 'D.py'), l'historique partagé, les index, le cache de figures
+    et les figures des filtres par défaut sont aussi préparés dans le processus courant.
+    """
+    # Imports différés : --check doit rester instantané
+    from charts import dashboard_figure
+    from datasets import simulation_frame, simulation_parquet, fontaines_frame, memmap_history, STOCKAGE
+    from figure_cache import FigureCache
+    from incremental import HistoryStore
+    from outofcore import MemmapStore, history_period
+    from sqlbackend import SqlStore, sql_engine_selected
+    from spatial import build_spatial_index, build_map_bins
+
+    durees = {}
+    # Paramètres par défaut : mêmes instantanés disque que load_simulation_data / load_real_csv_data
+    with _stage(durees, 'simulation'):
+        if STOCKAGE == 'memmap':
+            chemin_memmap = memmap_history()
+        elif sql_engine_selected():
+            chemin_parquet = simulation_parquet()
+        else:
+            df_sim = simulation_frame()
+    with _stage(durees, 'fontaines'):
+        df_real = fontaines_frame()
+
+    if app is not None:
+        defauts = DEFAUTS[Path(app).name]
+        with _stage(durees, 'historique'):
+            if STOCKAGE == 'memmap':
+                history = MemmapStore(chemin_memmap)
+            elif sql_engine_selected():
+                history = SqlStore(chemin_parquet)
+            else:
+                history = HistoryStore(df_sim)
+            history.refresh(force=True)
+        with _stage(durees, 'index_spatial'):
+            _PRECHARGE['spatial_index'] = build_spatial_index(df_real)
+            _PRECHARGE['map_bins'] = build_map_bins(df_real)
+        with _stage(durees, 'figures'):
+            figures = FigureCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+            snapshot = history.current()
+            debut, fin = history_period(snapshot)
+            for kind in ('line', 'bar', 'heat'):
+                dashboard_figure(figures, kind, defauts['theme'], snapshot, defauts['lignes'], debut, fin)
+        _PRECHARGE['history'] = history
+        _PRECHARGE['figures'] = figures
+
+    durees['total'] = round(sum(durees.values()), 4)
+    return durees
+
+
+def boot_id():
+    """
+    Identifiant du démarrage courant de la machine (None hors Linux).
+    """
+    try:
+        return BOOT_ID_FILE.read_text().strip()
+    except OSError:
+        return None
+
+
+def server_option(argv, nom, env, defaut):
+    """
+    Option `--server.<nom>` de la ligne de commande streamlit (`--server.port 8502` ou `=8502`),
+    sinon la variable d'environnement `env`, sinon `defaut`.
+    """
+    cle = f"--server.{nom}"
+    for i, arg in enumerate(argv):
+        if arg == cle and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(cle + "="):
+            return arg.split("=", 1)[1]
+    return os.environ.get(env, defaut)
+
+
+def write_ready(app, durees, serveur=None):
+    """
+    Écrit le fichier de disponibilité de ce processus (supprimé à sa sortie s'il sert une application).
+    `serveur` : URL de la sonde de santé du serveur Streamlit lancé ensuite dans ce processus.
+    """
+    READY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    READY_FILE.write_text(json.dumps({
+        'app': app,
+        'pid': os.getpid() if serveur else None,
+        'boot_id': boot_id(),
+        'serveur': serveur,
+        'etapes': durees,
+        'termine_a': time.time(),
+    }, indent=2))
+    if serveur:
+        atexit.register(_remove_ready, os.getpid())
+
+
+def _remove_ready(pid):
+    # Seulement si le fichier est encore celui de ce processus
+    try:
+        if json.loads(READY_FILE.read_text()).get('pid') == pid:
+            READY_FILE.unlink(missing_ok=True)
+    except (OSError, ValueError):
+        pass
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_ready():
+    """
+    Vrai si le warm-up est terminé depuis le démarrage courant de la machine et, s'il a lancé
+    une application, si ce processus vit encore et que son serveur répond à la sonde de santé.
+    """
+    try:
+        etat = json.loads(READY_FILE.read_text())
+    except (OSError, ValueError):
+        return False
+    if etat.get('boot_id') != boot_id():
+        return False
+    if etat.get('serveur') is None:
+        return True
+    if not _process_alive(etat['pid']):
+        return False
+    try:
+        with urllib.request.urlopen(etat['serveur'], timeout=TIMEOUT_SONDE_S) as reponse:
+            return reponse.status == 200
+    except OSError:
+        return False
+
+
+def main(argv):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if argv[:1] == ['--check']:
+        sys.exit(0 if is_ready() else 1)
+
+    READY_FILE.unlink(missing_ok=True)
+    app = argv[0] if argv else None
+    durees = warm_up(app)
+    print(json.dumps(durees))
+
+    if app is None:
+        write_ready(app, durees)
+        return
+
+    # Le serveur démarre dans ce processus : les sessions retrouvent les objets préparés.
+    # La sonde interroge son point de santé : disponible seulement une fois le serveur à l'écoute
+    port = server_option(argv, 'port', 'STREAMLIT_SERVER_PORT', '8501')
+    base = server_option(argv, 'baseUrlPath', 'STREAMLIT_SERVER_BASE_URL_PATH', '').strip('/')
+    write_ready(app, durees, serveur=f"http://127.0.0.1:{port}/{base + '/' if base else ''}_stcore/health")
+
+    from streamlit.web import cli as stcli
+    sys.argv = ['streamlit', 'run', *argv]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    # Passage par le module importé (et non __main__) pour que les applications,
+    # qui font `import warmup`, partagent le même registre _PRECHARGE
+    import warmup
+    warmup.main(sys.argv[1:])